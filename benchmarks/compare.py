@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Сравнение результатов измерения производительности двух версий
+
+Пример запуска:
+    python benchmarks/compare.py old.json new.json
+"""
+
+
+# =============================================================================
+
+
+import sys
+import json
+import argparse
+
+
+# =============================================================================
+
+
+def compare(old, new, threshold):
+    """
+    Сравнение результатов измерений
+    :param old: результаты базовой версии
+    :param new: результаты новой версии
+    :param threshold: относительное ухудшение, считающееся регрессией
+    :return: список строк отчета, флаг наличия регрессий
+    """
+    old_items = dict(
+        ((item['n_tasks'], item['t_max']), item) for item in old['results'])
+    lines = [f'{old["version"]} -> {new["version"]}']
+    regression = False
+    for item in new['results']:
+        key = (item['n_tasks'], item['t_max'])
+        if key not in old_items:
+            continue
+        old_item = old_items[key]
+        lines.append(f'n_tasks={key[0]}, t_max={key[1]}')
+
+        # Скорость (больше - лучше)
+        old_rates = old_item['evaluation']['rate']
+        for name, rate in item['evaluation']['rate'].items():
+            if name in old_rates and old_rates[name] > 0:
+                ratio = rate / old_rates[name]
+                mark = ' !' if ratio < 1 - threshold else ''
+                regression = regression or bool(mark)
+                lines.append(
+                    f'  {name:28s} {old_rates[name]:12.1f} -> '
+                    f'{rate:12.1f} /s  x{ratio:.2f}{mark}')
+
+        # Память (меньше - лучше)
+        old_memory = old_item['evaluation']['memory']
+        for name, memory in item['evaluation']['memory'].items():
+            if name in old_memory and memory > 0:
+                ratio = old_memory[name] / memory
+                mark = ' !' if ratio < 1 - threshold else ''
+                regression = regression or bool(mark)
+                lines.append(
+                    f'  {name + " memory":28s} {old_memory[name]:12d} -> '
+                    f'{memory:12d} B   x{ratio:.2f}{mark}')
+
+        # Качество оптимизации (меньше - лучше)
+        if 'optimization' in item and 'optimization' in old_item:
+            old_score = old_item['optimization']['best_score']
+            score = item['optimization']['best_score']
+            mark = ' !' if score > old_score * (1 + threshold) else ''
+            regression = regression or bool(mark)
+            lines.append(
+                f'  {"best score":28s} {old_score:12.4f} -> '
+                f'{score:12.4f}{mark}')
+
+    return lines, regression
+
+
+def main(argv=None):
+    """Точка входа"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('old', help='результаты базовой версии (JSON)')
+    parser.add_argument('new', help='результаты новой версии (JSON)')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='относительное ухудшение, считающееся '
+                             'регрессией')
+    args = parser.parse_args(argv)
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    lines, regression = compare(old, new, args.threshold)
+    print('\n'.join(lines))
+    return 1 if regression else 0
+
+
+# =============================================================================
+
+
+if __name__ == '__main__':
+    sys.exit(main())
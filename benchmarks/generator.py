@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Генератор синтетических наборов задач для измерения производительности
+"""
+
+
+# =============================================================================
+
+
+import random
+from taskdisttools.task import RootTask, Task, TaskManager
+from taskdisttools.constraint import DelayConstraint, PriorityConstraint
+from taskdisttools.constraint import StepConstraint
+
+
+# =============================================================================
+
+
+__all__ = [
+    'DEFAULT_FREQUENCIES',
+    'DEFAULT_CONSTRAINT_MIX',
+    'make_task_manager',
+]
+
+
+# =============================================================================
+
+
+# Частоты запуска по умолчанию (эпоха - минута): от 15 минут до недели
+DEFAULT_FREQUENCIES = (15, 30, 60, 120, 240, 360, 720, 1440, 10080)
+
+# Доли видов ограничений по умолчанию
+DEFAULT_CONSTRAINT_MIX = {
+    'step': 0.4,
+    'delay': 0.4,
+    'priority': 0.2,
+}
+
+
+# =============================================================================
+
+
+def make_task_manager(n_tasks, *, t_max=1440, seed=0, max_depth=2,
+                      max_dependents=2, frequencies=DEFAULT_FREQUENCIES,
+                      max_span=30, max_weight=3, constraint_ratio=0.1,
+                      constraint_mix=None):
+    """
+    Формирование менеджера задач со случайным (воспроизводимым) набором
+    :param n_tasks: общее кол-во задач (корневых и зависимых)
+    :param t_max: максимальная эпоха моделирования (частоты больше t_max
+        не используются)
+    :param seed: начальное значение ДСЧ
+    :param max_depth: максимальная глубина цепочки зависимых задач
+    :param max_dependents: максимальное кол-во зависимых задач у задачи
+    :param frequencies: возможные частоты запуска корневых задач
+    :param max_span: максимальная продолжительность выполнения
+    :param max_weight: максимальный "вес" задачи
+    :param constraint_ratio: доля задач с ограничениями
+    :param constraint_mix: доли видов ограничений ('step', 'delay',
+        'priority'), None - DEFAULT_CONSTRAINT_MIX
+    :return: менеджер задач
+    """
+    rng = random.Random(seed)
+    frequencies = [f for f in frequencies if f <= t_max] or [t_max]
+    constraint_mix = constraint_mix or DEFAULT_CONSTRAINT_MIX
+
+    tm = TaskManager()
+    names = list()
+    while len(names) < n_tasks:
+        frequency = rng.choice(frequencies)
+        root = RootTask(
+            f'{len(names):06d}', rng.randint(1, min(max_span, frequency)),
+            frequency, t0_max=frequency - 1,
+            weight=rng.randint(1, max_weight)
+        )
+        names.append(root.name)
+        _add_dependent_tasks(
+            rng, root, names, n_tasks, max_depth, max_dependents,
+            min(max_span, frequency))
+        tm.add_root_task(root)
+
+    # Не более одного ограничения на задачу, цели - ранее созданные задачи
+    # (исключает циклические и заведомо конфликтующие ограничения)
+    kinds = list(constraint_mix.keys())
+    shares = [constraint_mix[kind] for kind in kinds]
+    for i in rng.sample(range(len(names)), int(constraint_ratio * n_tasks)):
+        kind = rng.choices(kinds, shares)[0]
+        if kind == 'step':
+            tm.add_constraint(names[i], StepConstraint(rng.choice([5, 15])))
+        elif i > 0:
+            target = names[rng.randrange(i)]
+            cls = DelayConstraint if kind == 'delay' else PriorityConstraint
+            tm.add_constraint(names[i], cls(target, rng.randint(5, 60)))
+
+    return tm
+
+
+def _add_dependent_tasks(rng, task, names, n_tasks, depth, max_dependents,
+                         max_span):
+    """
+    Добавление случайных зависимых задач
+    :param rng: ДСЧ
+    :param task: родительская задача
+    :param names: список идентификаторов задач (дополняется)
+    :param n_tasks: общее кол-во задач
+    :param depth: оставшаяся глубина цепочки
+    :param max_dependents: максимальное кол-во зависимых задач у задачи
+    :param max_span: максимальная продолжительность выполнения
+    """
+    if depth <= 0:
+        return
+    for _ in range(rng.randint(0, max_dependents)):
+        if len(names) >= n_tasks:
+            return
+        dependent = Task(
+            f'{len(names):06d}', rng.randint(1, max_span),
+            weight=rng.randint(1, 2)
+        )
+        names.append(dependent.name)
+        task.add_dependent_task(dependent, rng.randint(0, task.span))
+        _add_dependent_tasks(
+            rng, dependent, names, n_tasks, depth - 1, max_dependents,
+            max_span)
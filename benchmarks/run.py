@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Измерение производительности расчета и оптимизации расписания
+
+Пример запуска (из корня репозитория):
+    PYTHONPATH=. python benchmarks/run.py --preset quick -o results.json
+    python benchmarks/compare.py old.json results.json
+"""
+
+
+# =============================================================================
+
+
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import contextlib
+import tracemalloc
+import numpy as np
+import taskdisttools
+from taskdisttools.optimizer import GreedyOptimizer, IncrementalEvaluator
+from taskdisttools.optimizer import SimulatedAnnealingOptimizer
+from taskdisttools.utils import make_timetable, get_loading, make_loading
+from taskdisttools.utils import compute_loading, compute_periodic_loading
+from taskdisttools.utils import compute_loading_chunks, score_loading_chunks
+from generator import make_task_manager
+
+
+# =============================================================================
+
+
+# Наборы конфигураций (кол-во задач, максимальная эпоха моделирования)
+PRESETS = {
+    'quick': [(10, 1440), (100, 1440), (1000, 1440)],
+    'default': [(10, 1440), (100, 1440), (1000, 10080), (10000, 10080)],
+    'full': [(10, 1440), (100, 1440), (1000, 10080), (1000, 43200),
+             (10000, 43200), (10000, 525600)],
+}
+
+# Предельный размер задачи (задачи x эпохи) для медленных путей расчета
+LEGACY_LIMIT = 2 * 10 ** 6
+
+# Предельный размер задачи для итерации 'жадного' алгоритма (итерация
+# для 1000 задач x 1440 эпох - порядка 10 с, время растет как
+# задачи x эпохи x кол-во вариантов t0)
+GREEDY_LIMIT = 2 * 10 ** 6
+
+# Бюджеты оценок для измерения зависимости качества от времени
+ANNEALING_BUDGETS = (100, 1000, 10000)
+
+
+# =============================================================================
+
+
+def measure_rate(func, min_time):
+    """
+    Измерение кол-ва вызовов функции в секунду
+    :param func: функция без аргументов
+    :param min_time: минимальное время измерения, с
+    :return: кол-во вызовов в секунду
+    """
+    func()  # прогрев
+    n_calls = 0
+    started = time.perf_counter()
+    elapsed = 0.
+    while elapsed < min_time:
+        func()
+        n_calls += 1
+        elapsed = time.perf_counter() - started
+    return n_calls / elapsed
+
+
+def measure_memory(func):
+    """
+    Измерение пикового объема памяти, выделяемой при вызове функции
+    :param func: функция без аргументов
+    :return: объем памяти, байт
+    """
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# =============================================================================
+
+
+def bench_evaluation(tm, t_max, min_time, seed):
+    """
+    Измерение скорости и памяти расчета расписания
+    :param tm: менеджер задач
+    :param t_max: максимальная эпоха моделирования
+    :param min_time: минимальное время измерения, с
+    :param seed: начальное значение ДСЧ
+    :return: словарь результатов
+    """
+    started = time.perf_counter()
+    model = tm.freeze()
+    freeze_time = time.perf_counter() - started
+
+    rng = random.Random(seed)
+    root_start_times = model.t0_min.copy()
+    root_dict = dict(zip(model.root_names, root_start_times.tolist()))
+    start_times, tasks_data = tm.make_model_input(root_dict)
+    evaluator = IncrementalEvaluator(model, np.std, t_max, root_start_times)
+
+    def random_move():
+        root = rng.randrange(len(model.root_ids))
+        return root, rng.choice(model.get_start_times(root, t_max))
+
+    def evaluate_move():
+        evaluator.evaluate_move(*random_move())
+
+    def evaluate_moves():
+        root = rng.randrange(len(model.root_ids))
+        evaluator.evaluate_moves(root, model.get_start_times(root, t_max))
+
+    def compute():
+        compute_loading(
+            model.make_start_times(root_start_times), model.frequency,
+            model.span, model.weight, t_max
+        )
+
+    def compute_periodic():
+        compute_periodic_loading(
+            model.make_start_times(root_start_times), model.frequency,
+            model.span, model.weight, t_max
+        ).score(np.std)
+
+    def compute_chunks():
+        score_loading_chunks(compute_loading_chunks(
+            model.make_start_times(root_start_times), model.frequency,
+            model.span, model.weight, t_max
+        ), np.std)
+
+    paths = {
+        'make_model_input': lambda: tm.make_model_input(root_dict),
+        'make_loading': lambda: make_loading(start_times, tasks_data, t_max),
+        'compute_loading': compute,
+        'periodic_loading': compute_periodic,
+        'streaming_loading': compute_chunks,
+        'evaluate_move': evaluate_move,
+        'evaluate_moves': evaluate_moves,
+    }
+    if len(model) * t_max <= LEGACY_LIMIT:
+        paths['make_timetable'] = lambda: get_loading(
+            make_timetable(start_times, tasks_data, t_max), tasks_data)
+
+    results = {'freeze_s': freeze_time, 'rate': dict(), 'memory': dict()}
+    for name, func in paths.items():
+        results['rate'][name] = measure_rate(func, min_time)
+        results['memory'][name] = measure_memory(func)
+
+    # evaluate_moves оценивает все t0 корневой задачи за вызов
+    n_candidates = np.mean([
+        len(model.get_start_times(root, t_max))
+        for root in range(len(model.root_ids))
+    ])
+    results['rate']['evaluate_moves_candidates'] = \
+        results['rate']['evaluate_moves'] * float(n_candidates)
+    return results
+
+
+def bench_optimization(tm, t_max, seed, tolerance):
+    """
+    Измерение зависимости качества оптимизации от времени
+    :param tm: менеджер задач
+    :param t_max: максимальная эпоха моделирования
+    :param seed: начальное значение ДСЧ
+    :param tolerance: допустимое относительное отклонение от лучшего
+        найденного значения метрики
+    :return: словарь результатов
+    """
+    runs = list()
+    for budget in ANNEALING_BUDGETS:
+        optimizer = SimulatedAnnealingOptimizer(
+            np.std, n_evaluations=budget, random_state=seed)
+        runs.append(_run_optimizer(
+            'annealing', {'n_evaluations': budget}, optimizer, tm, t_max))
+
+    skipped = list()
+    if len(tm.freeze()) * t_max <= GREEDY_LIMIT:
+        optimizer = GreedyOptimizer(
+            np.std, n_iterations=1, random_state=seed)
+        runs.append(_run_optimizer(
+            'greedy', {'n_iterations': 1}, optimizer, tm, t_max))
+    else:
+        skipped.append('greedy')
+
+    # Время достижения качества - время первого (самого быстрого) запуска
+    # каждого алгоритма, результат которого близок к лучшему
+    best = min(run['score'] for run in runs)
+    time_to_quality = dict()
+    for run in sorted(runs, key=lambda item: item['time_s']):
+        if run['score'] <= best + tolerance * abs(best):
+            time_to_quality.setdefault(run['optimizer'], run['time_s'])
+
+    return {
+        'runs': runs,
+        'best_score': best,
+        'tolerance': tolerance,
+        'time_to_quality_s': time_to_quality,
+        'skipped': skipped,
+    }
+
+
+def _run_optimizer(name, params, optimizer, tm, t_max):
+    """
+    Запуск оптимизатора
+    :param name: название алгоритма
+    :param params: параметры запуска (для отчета)
+    :param optimizer: оптимизатор
+    :param tm: менеджер задач
+    :param t_max: максимальная эпоха моделирования
+    :return: словарь результатов
+    """
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = optimizer.optimize(tm, t_max)
+    return {
+        'optimizer': name,
+        'params': params,
+        'time_s': time.perf_counter() - started,
+        'score': float(results.score),
+    }
+
+
+# =============================================================================
+
+
+def run(configs, *, seed=0, min_time=0.5, tolerance=0.01,
+        optimize=True, log=sys.stderr):
+    """
+    Выполнение измерений
+    :param configs: список пар (кол-во задач, максимальная эпоха)
+    :param seed: начальное значение ДСЧ
+    :param min_time: минимальное время измерения скорости, с
+    :param tolerance: допустимое отклонение для времени достижения качества
+    :param optimize: флаг измерения оптимизации
+    :param log: поток вывода хода измерений
+    :return: словарь результатов
+    """
+    report = {
+        'version': taskdisttools.__version__,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'seed': seed,
+        'results': list(),
+    }
+    for n_tasks, t_max in configs:
+        print(f'n_tasks={n_tasks}, t_max={t_max}', file=log)
+        tm = make_task_manager(n_tasks, t_max=t_max, seed=seed)
+        item = {
+            'n_tasks': n_tasks,
+            't_max': t_max,
+            'n_roots': len(tm.root_tasks),
+            'evaluation': bench_evaluation(tm, t_max, min_time, seed),
+        }
+        if optimize:
+            item['optimization'] = bench_optimization(
+                tm, t_max, seed, tolerance)
+        report['results'].append(item)
+    return report
+
+
+def main(argv=None):
+    """Точка входа"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--preset', choices=sorted(PRESETS),
+                        default='quick', help='набор конфигураций')
+    parser.add_argument('--config', nargs=2, type=int, action='append',
+                        metavar=('N_TASKS', 'T_MAX'),
+                        help='конфигурация (заменяет набор)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--min-time', type=float, default=0.5,
+                        help='минимальное время измерения скорости, с')
+    parser.add_argument('--tolerance', type=float, default=0.01,
+                        help='отклонение для времени достижения качества')
+    parser.add_argument('--no-optimize', action='store_true',
+                        help='не измерять оптимизацию')
+    parser.add_argument('-o', '--output', help='файл JSON (иначе stdout)')
+    args = parser.parse_args(argv)
+
+    report = run(
+        args.config or PRESETS[args.preset], seed=args.seed,
+        min_time=args.min_time, tolerance=args.tolerance,
+        optimize=not args.no_optimize
+    )
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+# =============================================================================
+
+
+if __name__ == '__main__':
+    main()
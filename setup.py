@@ -9,4 +9,8 @@ setup(
     packages=find_packages(),
     long_description=open(join(dirname(__file__), 'README.txt')).read(),
     install_requires=['numpy'],
+    extras_require={
+        'exact': ['pulp'],
+        'ortools': ['ortools'],
+    },
 )
@@ -11,6 +11,7 @@ __version__ = '0.0.15'
 
 # Модули
 from . import constraint
+from . import metric
 from . import optimizer
 from . import task
 from . import utils
@@ -2,3 +2,8 @@ from .constraint import *
 from .delay_constraint import *
 from .priority_constraint import *
 from .step_constraint import *
+from .plan import *
+from .node_constraint import *
+from .affinity_constraint import *
+from .colocation_constraint import *
+from .anti_affinity_constraint import *
@@ -0,0 +1,45 @@
+"""
+Абсолютное ограничение на узел выполнения (допустимые узлы)
+"""
+
+
+# =============================================================================
+
+
+from taskdisttools.constraint import AbsoluteNodeConstraint
+
+
+# =============================================================================
+
+
+__all__ = [
+    'AffinityConstraint',
+]
+
+
+# =============================================================================
+
+
+class AffinityConstraint(AbsoluteNodeConstraint):
+    """Абсолютное ограничение на узел выполнения (допустимые узлы)"""
+
+    def __init__(self, nodes):
+        """
+        Инициализация
+        :param nodes: допустимые узлы
+        """
+        self._nodes = frozenset(nodes)
+
+    @property
+    def nodes(self):
+        """Допустимые узлы"""
+        return self._nodes
+
+    def test(self, node, nodes):
+        """
+        Проверка ограничения
+        :param node: тестируемый узел
+        :param nodes: узлы для всех задач
+        :return: True если узел удовлетворяет ограничению, иначе False
+        """
+        return node in self._nodes
@@ -0,0 +1,37 @@
+"""
+Относительное ограничение на узел выполнения (узел, отличный от узла
+целевой задачи)
+"""
+
+
+# =============================================================================
+
+
+from taskdisttools.constraint import RelativeNodeConstraint
+
+
+# =============================================================================
+
+
+__all__ = [
+    'AntiAffinityConstraint',
+]
+
+
+# =============================================================================
+
+
+class AntiAffinityConstraint(RelativeNodeConstraint):
+    """
+    Относительное ограничение на узел выполнения (узел, отличный от узла
+    целевой задачи)
+    """
+
+    def test(self, node, nodes):
+        """
+        Проверка ограничения
+        :param node: тестируемый узел
+        :param nodes: узлы для всех задач
+        :return: True если узел удовлетворяет ограничению, иначе False
+        """
+        return node != nodes[self.target]
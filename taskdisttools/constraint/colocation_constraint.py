@@ -0,0 +1,37 @@
+"""
+Относительное ограничение на узел выполнения (тот же узел,
+что и у целевой задачи)
+"""
+
+
+# =============================================================================
+
+
+from taskdisttools.constraint import RelativeNodeConstraint
+
+
+# =============================================================================
+
+
+__all__ = [
+    'ColocationConstraint',
+]
+
+
+# =============================================================================
+
+
+class ColocationConstraint(RelativeNodeConstraint):
+    """
+    Относительное ограничение на узел выполнения (тот же узел,
+    что и у целевой задачи)
+    """
+
+    def test(self, node, nodes):
+        """
+        Проверка ограничения
+        :param node: тестируемый узел
+        :param nodes: узлы для всех задач
+        :return: True если узел удовлетворяет ограничению, иначе False
+        """
+        return node == nodes[self.target]
@@ -7,6 +7,7 @@
 
 
 import abc
+import numpy as _np
 
 
 # =============================================================================
@@ -45,6 +46,53 @@ class Constraint(abc.ABC):
         """
         pass
 
+    def test_array(self, t0, target_t0=None):
+        """
+        Проверка ограничения для массива значений
+        (по умолчанию - поэлементный вызов test)
+        :param t0: массив тестируемых значений
+        :param target_t0: массив t0 целевой задачи (для относительных
+            ограничений)
+        :return: массив флагов выполнения ограничения
+        """
+        return _np.array([
+            self.test(int(t), self._make_start_times(target_t0, i))
+            for i, t in enumerate(t0)
+        ], dtype=bool)
+
+    def apply_array(self, t0, target_t0=None):
+        """
+        Применение ограничения к массиву значений
+        (по умолчанию - поэлементный вызов apply)
+        :param t0: массив корректируемых значений
+        :param target_t0: массив t0 целевой задачи (для относительных
+            ограничений)
+        :return: массив скорректированных значений t0
+        """
+        return _np.array([
+            self.apply(int(t), self._make_start_times(target_t0, i))
+            for i, t in enumerate(t0)
+        ], dtype=_np.int64)
+
+    def rescale(self, factor):
+        """
+        Получение ограничения для шкалы эпох, укрупненной в factor раз
+        (по умолчанию ограничение не пересчитывается)
+        :param factor: коэффициент укрупнения эпох
+        :return: ограничение или None (на укрупненной шкале
+                 не учитывается)
+        """
+        return None
+
+    def _make_start_times(self, target_t0, i):
+        """
+        Формирование словаря t0, необходимого для проверки ограничения
+        :param target_t0: массив t0 целевой задачи
+        :param i: номер элемента
+        :return: словарь t0
+        """
+        return dict()
+
 
 # =============================================================================
 
@@ -66,3 +114,12 @@ class RelativeConstraint(Constraint, abc.ABC):
         :param target: целевая задача
         """
         self.target = target
+
+    def _make_start_times(self, target_t0, i):
+        """
+        Формирование словаря t0, необходимого для проверки ограничения
+        :param target_t0: массив t0 целевой задачи
+        :param i: номер элемента
+        :return: словарь t0
+        """
+        return {self.target: int(target_t0[i])}
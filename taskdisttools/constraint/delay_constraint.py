@@ -6,6 +6,7 @@
 # =============================================================================
 
 
+import numpy as _np
 from taskdisttools.constraint import RelativeConstraint
 
 
@@ -32,6 +33,11 @@ class DelayConstraint(RelativeConstraint):
         super().__init__(target)
         self._max_delay = max_delay
 
+    @property
+    def max_delay(self):
+        """Максимальная задержка старта"""
+        return self._max_delay
+
     def test(self, t0, start_times):
         """
         Проверка ограничения
@@ -56,3 +62,32 @@ class DelayConstraint(RelativeConstraint):
             return target_t0 + self._max_delay
         else:
             return t0
+
+    def rescale(self, factor):
+        """
+        Получение ограничения для шкалы эпох, укрупненной в factor раз
+        :param factor: коэффициент укрупнения эпох
+        :return: ограничение
+        """
+        return self.__class__(self.target, self._max_delay // factor)
+
+    def test_array(self, t0, target_t0=None):
+        """
+        Проверка ограничения для массива значений
+        :param t0: массив тестируемых значений
+        :param target_t0: массив t0 целевой задачи
+        :return: массив флагов выполнения ограничения
+        """
+        return _np.abs(target_t0 - t0) <= self._max_delay
+
+    def apply_array(self, t0, target_t0=None):
+        """
+        Применение ограничения к массиву значений
+        :param t0: массив корректируемых значений
+        :param target_t0: массив t0 целевой задачи
+        :return: массив скорректированных значений t0
+        """
+        t_lower = target_t0 - self._max_delay
+        t_upper = target_t0 + self._max_delay
+        return _np.where(
+            t0 < t_lower, t_lower, _np.where(t0 > t_upper, t_upper, t0))
@@ -0,0 +1,62 @@
+"""
+Ограничение на узел выполнения ТЦ
+"""
+
+
+# =============================================================================
+
+
+import abc
+
+
+# =============================================================================
+
+
+__all__ = [
+    'NodeConstraint',
+    'AbsoluteNodeConstraint',
+    'RelativeNodeConstraint',
+]
+
+
+# =============================================================================
+
+
+class NodeConstraint(abc.ABC):
+    """
+    Ограничение на узел выполнения ТЦ
+     - корневая задача выполняется на одном узле вместе с зависимыми
+       задачами, поэтому ограничения задач цепочки относятся к ней целиком
+    """
+
+    @abc.abstractmethod
+    def test(self, node, nodes):
+        """
+        Проверка ограничения
+        :param node: тестируемый узел
+        :param nodes: узлы для всех задач
+        :return: True если узел удовлетворяет ограничению, иначе False
+        """
+        pass
+
+
+# =============================================================================
+
+
+class AbsoluteNodeConstraint(NodeConstraint, abc.ABC):
+    """Абсолютное ограничение на узел"""
+    pass
+
+
+# =============================================================================
+
+
+class RelativeNodeConstraint(NodeConstraint, abc.ABC):
+    """Относительное ограничение на узел"""
+
+    def __init__(self, target):
+        """
+        Инициализация
+        :param target: целевая задача
+        """
+        self.target = target
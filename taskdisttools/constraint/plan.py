@@ -0,0 +1,276 @@
+"""
+Скомпилированный план применения ограничений
+"""
+
+
+# =============================================================================
+
+
+import numpy as _np
+from taskdisttools.constraint import RelativeConstraint
+
+
+# =============================================================================
+
+
+__all__ = [
+    'ConstraintPlan',
+]
+
+
+# =============================================================================
+
+
+class ConstraintPlan(object):
+    """
+    Скомпилированный план применения ограничений
+     - задачи упорядочены так, что цели относительных ограничений
+       разрешаются раньше зависящих от них задач
+     - ограничения применяются к массивам t0 (строка - вариант расписания,
+       столбец - задача)
+    """
+
+    def __init__(self, columns, steps):
+        """
+        Инициализация
+        :param columns: идентификаторы задач, соответствующие столбцам
+        :param steps: список шагов (столбец задачи, список пар
+            (ограничение, столбец целевой задачи или None))
+        """
+        self.columns = list(columns)
+        self.index = dict((name, i) for i, name in enumerate(self.columns))
+        self.steps = steps
+        self._targeted_by = None
+
+    @classmethod
+    def compile(cls, constraints):
+        """
+        Компиляция плана (порядок разрешения и проверки ограничений
+        совпадает с рекурсивным разрешением в порядке добавления)
+        :param constraints: словарь списков ограничений задач
+        :return: план применения ограничений
+        """
+        constraints = dict(
+            (task, sorted(cnts, key=cls._is_relative))
+            for task, cnts in constraints.items() if len(cnts) > 0
+        )
+
+        order = list()
+        resolved = set()
+        for root in constraints.keys():
+            if root in resolved:
+                continue
+            unresolved = [root]
+            stack = [(root, cls._iter_targets(constraints[root]))]
+            while len(stack) > 0:
+                task, targets = stack[-1]
+                target = next(targets, None)
+                if target is None:
+                    stack.pop()
+                    unresolved.remove(task)
+                    resolved.add(task)
+                    order.append(task)
+                elif target in resolved or target not in constraints:
+                    continue
+                elif target in unresolved:
+                    raise RuntimeError(
+                        f'Circular constraints on task "{target}"')
+                else:
+                    unresolved.append(target)
+                    stack.append(
+                        (target, cls._iter_targets(constraints[target])))
+
+        columns = list(order)
+        index = dict((name, i) for i, name in enumerate(columns))
+        for task in order:
+            for cnt in constraints[task]:
+                if isinstance(cnt, RelativeConstraint) and \
+                        cnt.target not in index:
+                    index[cnt.target] = len(columns)
+                    columns.append(cnt.target)
+
+        steps = list()
+        for task in order:
+            steps.append((index[task], [
+                (cnt, index[cnt.target]
+                 if isinstance(cnt, RelativeConstraint) else None)
+                for cnt in constraints[task]
+            ]))
+
+        return cls(columns, steps)
+
+    @staticmethod
+    def _is_relative(constraint):
+        """Признак относительного ограничения"""
+        return isinstance(constraint, RelativeConstraint)
+
+    @staticmethod
+    def _iter_targets(constraints):
+        """
+        Генератор целевых задач относительных ограничений
+        :param constraints: список ограничений задачи
+        :return: генератор идентификаторов целевых задач
+        """
+        for cnt in constraints:
+            if isinstance(cnt, RelativeConstraint):
+                yield cnt.target
+
+    @property
+    def tasks(self):
+        """Получение задач, для которых заданы ограничения (по порядку)"""
+        return [self.columns[column] for column, _ in self.steps]
+
+    def extend(self, task, constraints):
+        """
+        Дополнение плана ограничениями задачи без повторной компиляции
+        (порядок шагов совпадает с компиляцией дополненного словаря
+        ограничений)
+         - задача не должна быть целью ограничений других задач; если
+           у задачи уже есть ограничения, их шаг должен быть последним
+        :param task: идентификатор задачи
+        :param constraints: все ограничения задачи
+        :return: план применения ограничений
+                 (None - требуется полная компиляция)
+        """
+        steps = list(self.steps)
+        column = self.index.get(task)
+        if column is not None:
+            if len(steps) == 0 or steps[-1][0] != column:
+                return None
+            steps.pop()
+        if any(isinstance(cnt, RelativeConstraint) and cnt.target == task
+               for cnt in constraints):
+            return None
+
+        plan = ConstraintPlan.__new__(ConstraintPlan)
+        plan.columns = list(self.columns)
+        plan.index = dict(self.index)
+        for name in [task] + [
+                cnt.target for cnt in constraints
+                if isinstance(cnt, RelativeConstraint)]:
+            if name not in plan.index:
+                plan.index[name] = len(plan.columns)
+                plan.columns.append(name)
+
+        column = plan.index[task]
+        steps.append((column, [
+            (cnt, plan.index[cnt.target]
+             if isinstance(cnt, RelativeConstraint) else None)
+            for cnt in sorted(constraints, key=self._is_relative)
+        ]))
+        plan.steps = steps
+
+        # Обратный индекс дополняется, если шаг задачи добавлен (при замене
+        # шага строится заново при обращении)
+        plan._targeted_by = None
+        if self._targeted_by is not None and len(steps) > len(self.steps):
+            plan._targeted_by = dict(self._targeted_by)
+            for _, target in steps[-1][1]:
+                if target is not None:
+                    plan._targeted_by[target] = \
+                        plan._targeted_by.get(target, ()) + (len(steps) - 1,)
+        return plan
+
+    def get_targeted_by(self, tasks):
+        """
+        Получение шагов, ограничения которых ссылаются на заданные задачи
+        (с кешированием обратного индекса)
+        :param tasks: идентификаторы задач
+        :return: список номеров шагов (по порядку, без повторов)
+        """
+        if self._targeted_by is None:
+            targeted_by = dict()
+            for i, (_, cnts) in enumerate(self.steps):
+                for _, target in cnts:
+                    if target is not None:
+                        targeted_by[target] = \
+                            targeted_by.get(target, ()) + (i,)
+            self._targeted_by = targeted_by
+
+        steps = set()
+        for task in tasks:
+            column = self.index.get(task)
+            if column is not None:
+                steps.update(self._targeted_by.get(column, ()))
+        return sorted(steps)
+
+    def subset(self, tasks):
+        """
+        Получение плана для части задач (ограничения остальных задач
+        считаются уже разрешенными)
+        :param tasks: идентификаторы задач
+        :return: план применения ограничений
+        """
+        tasks = set(tasks)
+        steps = [
+            step for step in self.steps if self.columns[step[0]] in tasks
+        ]
+
+        columns = list()
+        index = dict()
+        for column in self._iter_step_columns(steps):
+            if column not in index:
+                index[column] = len(columns)
+                columns.append(self.columns[column])
+
+        return ConstraintPlan(columns, [
+            (index[column], [
+                (cnt, None if target is None else index[target])
+                for cnt, target in cnts
+            ])
+            for column, cnts in steps
+        ])
+
+    @staticmethod
+    def _iter_step_columns(steps):
+        """
+        Генератор столбцов, задействованных в шагах плана
+        :param steps: список шагов
+        :return: генератор номеров столбцов
+        """
+        for column, cnts in steps:
+            yield column
+            for _, target in cnts:
+                if target is not None:
+                    yield target
+
+    def apply(self, start_times, *, strict=True):
+        """
+        Применение ограничений (массив изменяется на месте)
+        :param start_times: массив t0 (вариант x столбец или столбец)
+        :param strict: флаг генерации исключения при конфликте ограничений
+        :return: массив флагов выполнения ограничений для каждого варианта
+        """
+        rows = start_times.reshape(-1, len(self.columns))
+        feasible = _np.ones(len(rows), dtype=bool)
+        for column, cnts in self.steps:
+            t0 = rows[:, column]
+            for cnt, target in cnts:
+                t0 = cnt.apply_array(
+                    t0, None if target is None else rows[:, target])
+            rows[:, column] = t0
+
+            for cnt, target in cnts:
+                feasible &= cnt.test_array(
+                    t0, None if target is None else rows[:, target])
+            if strict and not feasible.all():
+                raise RuntimeError(
+                    f'Constraints conflict on task "{self.columns[column]}"')
+
+        return feasible
+
+    def resolve(self, start_times):
+        """
+        Применение ограничений к словарю значений t0
+        :param start_times: словарь значений t0 (изменяется на месте)
+        :return: словарь скорректированных значений t0
+        """
+        if len(self.steps) == 0:
+            return start_times
+
+        values = _np.array(
+            [start_times[name] for name in self.columns], dtype=_np.int64)
+        self.apply(values)
+        for column, _ in self.steps:
+            start_times[self.columns[column]] = int(values[column])
+        return start_times
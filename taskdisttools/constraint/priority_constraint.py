@@ -6,6 +6,7 @@
 # =============================================================================
 
 
+import numpy as _np
 from taskdisttools.constraint import DelayConstraint
 
 
@@ -54,3 +55,26 @@ class PriorityConstraint(DelayConstraint):
         elif t0 < target_t0:
             t0 = target_t0
         return t0
+
+    def test_array(self, t0, target_t0=None):
+        """
+        Проверка ограничения для массива значений
+        :param t0: массив тестируемых значений
+        :param target_t0: массив t0 целевой задачи
+        :return: массив флагов выполнения ограничения
+        """
+        delay = t0 - target_t0
+        return (0 <= delay) & (delay <= self._max_delay)
+
+    def apply_array(self, t0, target_t0=None):
+        """
+        Применение ограничения к массиву значений
+        :param t0: массив корректируемых значений
+        :param target_t0: массив t0 целевой задачи
+        :return: массив скорректированных значений t0
+        """
+        t_upper = target_t0 + self._max_delay
+        return _np.where(
+            t0 - target_t0 > self._max_delay, t_upper,
+            _np.where(t0 < target_t0, target_t0, t0)
+        )
@@ -6,6 +6,7 @@
 # =============================================================================
 
 
+import numpy as _np
 from taskdisttools.constraint import AbsoluteConstraint
 
 
@@ -30,6 +31,11 @@ class StepConstraint(AbsoluteConstraint):
         """
         self._step_size = step_size
 
+    @property
+    def step_size(self):
+        """Размер шага"""
+        return self._step_size
+
     def test(self, t0, start_times):
         """
         Проверка ограничения
@@ -56,3 +62,38 @@ class StepConstraint(AbsoluteConstraint):
                 t0 = t_upper
 
         return t0
+
+    def rescale(self, factor):
+        """
+        Получение ограничения для шкалы эпох, укрупненной в factor раз
+        :param factor: коэффициент укрупнения эпох
+        :return: ограничение или None (factor кратен шагу - на укрупненной
+                 шкале ограничение выполняется всегда)
+        """
+        if factor % self._step_size == 0:
+            return None
+        return StepConstraint(max(round(self._step_size / factor), 1))
+
+    def test_array(self, t0, target_t0=None):
+        """
+        Проверка ограничения для массива значений
+        :param t0: массив тестируемых значений
+        :param target_t0: не используется
+        :return: массив флагов выполнения ограничения
+        """
+        return t0 % self._step_size == 0
+
+    def apply_array(self, t0, target_t0=None):
+        """
+        Применение ограничения к массиву значений
+        :param t0: массив корректируемых значений
+        :param target_t0: не используется
+        :return: массив скорректированных значений t0
+        """
+        remainder = t0 % self._step_size
+        t_lower = t0 - remainder
+        t_upper = t_lower + self._step_size
+        return _np.where(
+            remainder == 0, t0,
+            _np.where(t0 - t_lower <= t_upper - t0, t_lower, t_upper)
+        )
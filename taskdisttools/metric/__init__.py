@@ -0,0 +1,8 @@
+from .metric import *
+from .var_metric import *
+from .std_metric import *
+from .peak_metric import *
+from .overload_metric import *
+from .norm_metric import *
+from .percentile_metric import *
+from .resource_metric import *
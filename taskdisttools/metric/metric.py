@@ -0,0 +1,322 @@
+"""
+Метрика загрузки системы
+"""
+
+
+# =============================================================================
+
+
+import abc
+import copy
+import numbers
+import numpy as _np
+
+
+# =============================================================================
+
+
+__all__ = [
+    'Metric',
+    'FunctionMetric',
+    'CompositeMetric',
+]
+
+
+# =============================================================================
+
+
+class Metric(abc.ABC):
+    """
+    Метрика загрузки системы
+     - полный расчет: metric(loading) или metric(loadings, axis=1)
+       для матрицы загрузок (вариант x эпоха)
+     - инкрементальный расчет: reset(loading) сохраняет накопленные
+       величины, peek/update оценивают/применяют изменение загрузки
+       в отдельных эпохах
+     - расчет по гистограмме уровней загрузки: from_histogram(values,
+       counts) (для сжатого представления загрузки)
+     - расчет за один проход по фрагментам загрузки: from_chunks(chunks)
+       (накопленные величины фрагментов - _start_chunks, _add_chunk,
+       _finish_chunks)
+     - метрики складываются и умножаются на числа (CompositeMetric)
+    """
+
+    def __init__(self):
+        """Инициализация"""
+        self.value = None  # значение метрики для текущей загрузки
+
+    @abc.abstractmethod
+    def __call__(self, loading, axis=None):
+        """
+        Расчет значения метрики
+        :param loading: массив уровней загрузки системы
+        :param axis: ось эпох (None - одномерный массив)
+        :return: значение метрики (массив значений при axis != None)
+        """
+        pass
+
+    def reset(self, loading):
+        """
+        Инициализация накопленных величин
+        :param loading: массив уровней загрузки системы
+        :return: значение метрики
+        """
+        self.value = self(loading)
+        return self.value
+
+    def peek(self, loading, delta_indices, delta_values):
+        """
+        Оценка изменения загрузки (накопленные величины не изменяются)
+        :param loading: массив уровней загрузки до изменения
+        :param delta_indices: массив эпох (без повторов)
+        :param delta_values: массив изменений загрузки в этих эпохах
+        :return: значение метрики после изменения
+        """
+        loading = _np.array(loading)
+        loading[delta_indices] += delta_values
+        return self(loading)
+
+    def update(self, loading, delta_indices, delta_values):
+        """
+        Применение изменения загрузки к накопленным величинам
+        (сам массив загрузки не изменяется)
+        :param loading: массив уровней загрузки до изменения
+        :param delta_indices: массив эпох (без повторов)
+        :param delta_values: массив изменений загрузки в этих эпохах
+        :return: значение метрики после изменения
+        """
+        self.value = self.peek(loading, delta_indices, delta_values)
+        return self.value
+
+    def from_histogram(self, values, counts):
+        """
+        Расчет значения метрики по уровням загрузки и кол-ву эпох с каждым
+        уровнем (метрика не должна зависеть от порядка эпох)
+        :param values: массив уровней загрузки
+        :param counts: массив кол-ва эпох с соответствующим уровнем
+        :return: значение метрики
+        """
+        return self(_np.repeat(values, counts))
+
+    def from_chunks(self, chunks):
+        """
+        Расчет значения метрики за один проход по фрагментам загрузки
+        (метрики библиотеки хранят только накопленные величины, поэтому
+        объем памяти не зависит от длины интервала моделирования)
+        :param chunks: последовательность массивов загрузки (по порядку эпох)
+        :return: значение метрики
+        """
+        state = self._start_chunks()
+        for chunk in chunks:
+            state = self._add_chunk(state, _np.asarray(chunk))
+        return self._finish_chunks(state)
+
+    def _start_chunks(self):
+        """
+        Инициализация накопленных величин для расчета по фрагментам
+        (по умолчанию фрагменты сохраняются целиком)
+        :return: накопленные величины
+        """
+        return list()
+
+    def _add_chunk(self, state, chunk):
+        """
+        Учет фрагмента загрузки
+        :param state: накопленные величины
+        :param chunk: массив загрузки фрагмента
+        :return: накопленные величины
+        """
+        state.append(chunk)
+        return state
+
+    def _finish_chunks(self, state):
+        """
+        Расчет значения метрики по накопленным величинам
+        :param state: накопленные величины
+        :return: значение метрики
+        """
+        return self(_np.concatenate(state) if len(state) > 0
+                    else _np.array([]))
+
+    def __add__(self, other):
+        """Сумма метрик"""
+        return CompositeMetric([(self, 1)]) + other
+
+    def __radd__(self, other):
+        """Сумма метрик (в т.ч. с sum())"""
+        if isinstance(other, numbers.Number) and other == 0:
+            return CompositeMetric([(self, 1)])
+        return CompositeMetric([(self, 1)]) + other
+
+    def __mul__(self, weight):
+        """Умножение метрики на вес"""
+        if not isinstance(weight, numbers.Number):
+            return NotImplemented
+        return CompositeMetric([(self, weight)])
+
+    __rmul__ = __mul__
+
+
+# =============================================================================
+
+
+class FunctionMetric(Metric):
+    """
+    Метрика, заданная функцией (например, np.std)
+     - инкрементальный расчет сводится к полному пересчету
+    """
+
+    def __init__(self, func):
+        """
+        Инициализация
+        :param func: функция загрузки системы
+        """
+        super().__init__()
+        self.func = func
+
+    def __call__(self, loading, axis=None):
+        """
+        Расчет значения метрики
+        :param loading: массив уровней загрузки системы
+        :param axis: ось эпох (None - одномерный массив)
+        :return: значение метрики (массив значений при axis != None)
+        """
+        if axis is None:
+            return self.func(loading)
+        try:
+            values = _np.asarray(self.func(loading, axis=axis))
+            if values.shape == tuple(_np.delete(loading.shape, axis)):
+                return values
+        except TypeError:
+            pass
+        return _np.apply_along_axis(self.func, axis, loading)
+
+
+# =============================================================================
+
+
+class CompositeMetric(Metric):
+    """Взвешенная сумма метрик"""
+
+    def __init__(self, terms):
+        """
+        Инициализация
+        :param terms: список пар (метрика или функция, вес)
+        """
+        super().__init__()
+        # Каждое слагаемое хранит собственные накопленные величины,
+        # поэтому метрики копируются (одна метрика может входить дважды)
+        self.terms = [
+            (copy.deepcopy(metric) if isinstance(metric, Metric)
+             else FunctionMetric(metric), weight)
+            for metric, weight in terms
+        ]
+
+    def __call__(self, loading, axis=None):
+        """
+        Расчет значения метрики
+        :param loading: массив уровней загрузки системы
+        :param axis: ось эпох (None - одномерный массив)
+        :return: значение метрики (массив значений при axis != None)
+        """
+        return sum(
+            weight * metric(loading, axis=axis)
+            for metric, weight in self.terms
+        )
+
+    def reset(self, loading):
+        """
+        Инициализация накопленных величин
+        :param loading: массив уровней загрузки системы
+        :return: значение метрики
+        """
+        self.value = sum(
+            weight * metric.reset(loading) for metric, weight in self.terms)
+        return self.value
+
+    def peek(self, loading, delta_indices, delta_values):
+        """
+        Оценка изменения загрузки (накопленные величины не изменяются)
+        :param loading: массив уровней загрузки до изменения
+        :param delta_indices: массив эпох (без повторов)
+        :param delta_values: массив изменений загрузки в этих эпохах
+        :return: значение метрики после изменения
+        """
+        return sum(
+            weight * metric.peek(loading, delta_indices, delta_values)
+            for metric, weight in self.terms
+        )
+
+    def update(self, loading, delta_indices, delta_values):
+        """
+        Применение изменения загрузки к накопленным величинам
+        :param loading: массив уровней загрузки до изменения
+        :param delta_indices: массив эпох (без повторов)
+        :param delta_values: массив изменений загрузки в этих эпохах
+        :return: значение метрики после изменения
+        """
+        self.value = sum(
+            weight * metric.update(loading, delta_indices, delta_values)
+            for metric, weight in self.terms
+        )
+        return self.value
+
+    def from_histogram(self, values, counts):
+        """
+        Расчет значения метрики по уровням загрузки и кол-ву эпох с каждым
+        уровнем (метрика не должна зависеть от порядка эпох)
+        :param values: массив уровней загрузки
+        :param counts: массив кол-ва эпох с соответствующим уровнем
+        :return: значение метрики
+        """
+        return sum(
+            weight * metric.from_histogram(values, counts)
+            for metric, weight in self.terms
+        )
+
+    def _start_chunks(self):
+        """
+        Инициализация накопленных величин для расчета по фрагментам
+        :return: накопленные величины
+        """
+        return [metric._start_chunks() for metric, _ in self.terms]
+
+    def _add_chunk(self, state, chunk):
+        """
+        Учет фрагмента загрузки
+        :param state: накопленные величины
+        :param chunk: массив загрузки фрагмента
+        :return: накопленные величины
+        """
+        return [
+            metric._add_chunk(term_state, chunk)
+            for (metric, _), term_state in zip(self.terms, state)
+        ]
+
+    def _finish_chunks(self, state):
+        """
+        Расчет значения метрики по накопленным величинам
+        :param state: накопленные величины
+        :return: значение метрики
+        """
+        return sum(
+            weight * metric._finish_chunks(term_state)
+            for (metric, weight), term_state in zip(self.terms, state)
+        )
+
+    def __add__(self, other):
+        """Сумма метрик"""
+        if isinstance(other, CompositeMetric):
+            return CompositeMetric(self.terms + other.terms)
+        if isinstance(other, Metric) or callable(other):
+            return CompositeMetric(self.terms + [(other, 1)])
+        return NotImplemented
+
+    def __mul__(self, weight):
+        """Умножение метрики на вес"""
+        if not isinstance(weight, numbers.Number):
+            return NotImplemented
+        return CompositeMetric(
+            [(metric, w * weight) for metric, w in self.terms])
+
+    __rmul__ = __mul__
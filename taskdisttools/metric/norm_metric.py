@@ -0,0 +1,144 @@
+"""
+Норма L_p загрузки системы
+"""
+
+
+# =============================================================================
+
+
+import numpy as _np
+from taskdisttools.metric import Metric
+
+
+# =============================================================================
+
+
+__all__ = [
+    'NormMetric',
+]
+
+
+# =============================================================================
+
+
+class NormMetric(Metric):
+    """
+    Норма L_p загрузки системы: sum(|x| ** p) ** (1 / p)
+     - инкрементальный расчет по накопленной сумме |x| ** p
+       (для целочисленной загрузки и целого p сумма точная)
+    """
+
+    def __init__(self, p=2):
+        """
+        Инициализация
+        :param p: порядок нормы (p >= 1)
+        """
+        assert 1 <= p < _np.inf
+        super().__init__()
+        self.p = p
+
+    def __call__(self, loading, axis=None):
+        """
+        Расчет значения метрики
+        :param loading: массив уровней загрузки системы
+        :param axis: ось эпох (None - одномерный массив)
+        :return: значение метрики (массив значений при axis != None)
+        """
+        return self._from_sum(
+            self._get_powers(_np.asarray(loading)).sum(axis=axis))
+
+    def reset(self, loading):
+        """
+        Инициализация накопленных величин
+        :param loading: массив уровней загрузки системы
+        :return: значение метрики
+        """
+        self._sum = self._get_powers(_np.asarray(loading)).sum()
+        self.value = self._from_sum(self._sum)
+        return self.value
+
+    def peek(self, loading, delta_indices, delta_values):
+        """
+        Оценка изменения загрузки (накопленные величины не изменяются)
+        :param loading: массив уровней загрузки до изменения
+        :param delta_indices: массив эпох (без повторов)
+        :param delta_values: массив изменений загрузки в этих эпохах
+        :return: значение метрики после изменения
+        """
+        return self._from_sum(
+            self._make_sum(loading, delta_indices, delta_values))
+
+    def update(self, loading, delta_indices, delta_values):
+        """
+        Применение изменения загрузки к накопленным величинам
+        :param loading: массив уровней загрузки до изменения
+        :param delta_indices: массив эпох (без повторов)
+        :param delta_values: массив изменений загрузки в этих эпохах
+        :return: значение метрики после изменения
+        """
+        self._sum = self._make_sum(loading, delta_indices, delta_values)
+        self.value = self._from_sum(self._sum)
+        return self.value
+
+    def from_histogram(self, values, counts):
+        """
+        Расчет значения метрики по уровням загрузки и кол-ву эпох с каждым
+        уровнем
+        :param values: массив уровней загрузки
+        :param counts: массив кол-ва эпох с соответствующим уровнем
+        :return: значение метрики
+        """
+        return self._from_sum(
+            (self._get_powers(_np.asarray(values)) * counts).sum())
+
+    def _start_chunks(self):
+        """
+        Инициализация накопленных величин для расчета по фрагментам
+        :return: сумма |x| ** p
+        """
+        return 0
+
+    def _add_chunk(self, state, chunk):
+        """
+        Учет фрагмента загрузки
+        :param state: накопленные величины
+        :param chunk: массив загрузки фрагмента
+        :return: накопленные величины
+        """
+        return state + self._get_powers(chunk).sum()
+
+    def _finish_chunks(self, state):
+        """
+        Расчет значения метрики по накопленным величинам
+        :param state: накопленные величины
+        :return: значение метрики
+        """
+        return self._from_sum(state)
+
+    def _make_sum(self, loading, delta_indices, delta_values):
+        """
+        Расчет суммы |x| ** p после изменения загрузки
+        :param loading: массив уровней загрузки до изменения
+        :param delta_indices: массив эпох (без повторов)
+        :param delta_values: массив изменений загрузки в этих эпохах
+        :return: сумма |x| ** p
+        """
+        old_values = loading[delta_indices]
+        return self._sum + (
+            self._get_powers(old_values + delta_values).sum() -
+            self._get_powers(old_values).sum()
+        )
+
+    def _get_powers(self, values):
+        """
+        Расчет |x| ** p (целочисленно для целочисленной загрузки)
+        :param values: массив уровней загрузки
+        :return: массив |x| ** p
+        """
+        if values.dtype.kind in 'iub' and float(self.p).is_integer():
+            return _np.abs(values.astype(_np.int64)) ** int(self.p)
+        return _np.abs(values) ** self.p
+
+    def _from_sum(self, total):
+        """Значение метрики по сумме |x| ** p"""
+        return _np.power(total, 1. / self.p)
@@ -0,0 +1,123 @@
+"""
+Перегрузка системы (превышение допустимого уровня загрузки)
+"""
+
+
+# =============================================================================
+
+
+import numpy as _np
+from taskdisttools.metric import Metric
+
+
+# =============================================================================
+
+
+__all__ = [
+    'OverloadMetric',
+]
+
+
+# =============================================================================
+
+
+class OverloadMetric(Metric):
+    """
+    Перегрузка системы: sum(max(x - capacity, 0) ** power)
+     - инкрементальный расчет по накопленной сумме
+    """
+
+    def __init__(self, capacity, power=1):
+        """
+        Инициализация
+        :param capacity: допустимый уровень загрузки
+        :param power: показатель степени превышения
+        """
+        super().__init__()
+        self.capacity = capacity
+        self.power = power
+
+    def __call__(self, loading, axis=None):
+        """
+        Расчет значения метрики
+        :param loading: массив уровней загрузки системы
+        :param axis: ось эпох (None - одномерный массив)
+        :return: значение метрики (массив значений при axis != None)
+        """
+        return self._get_excess(_np.asarray(loading)).sum(axis=axis)
+
+    def reset(self, loading):
+        """
+        Инициализация накопленных величин
+        :param loading: массив уровней загрузки системы
+        :return: значение метрики
+        """
+        self.value = self(loading)
+        return self.value
+
+    def peek(self, loading, delta_indices, delta_values):
+        """
+        Оценка изменения загрузки (накопленные величины не изменяются)
+        :param loading: массив уровней загрузки до изменения
+        :param delta_indices: массив эпох (без повторов)
+        :param delta_values: массив изменений загрузки в этих эпохах
+        :return: значение метрики после изменения
+        """
+        old_values = loading[delta_indices]
+        return self.value + (
+            self._get_excess(old_values + delta_values).sum() -
+            self._get_excess(old_values).sum()
+        )
+
+    def update(self, loading, delta_indices, delta_values):
+        """
+        Применение изменения загрузки к накопленным величинам
+        :param loading: массив уровней загрузки до изменения
+        :param delta_indices: массив эпох (без повторов)
+        :param delta_values: массив изменений загрузки в этих эпохах
+        :return: значение метрики после изменения
+        """
+        self.value = self.peek(loading, delta_indices, delta_values)
+        return self.value
+
+    def from_histogram(self, values, counts):
+        """
+        Расчет значения метрики по уровням загрузки и кол-ву эпох с каждым
+        уровнем
+        :param values: массив уровней загрузки
+        :param counts: массив кол-ва эпох с соответствующим уровнем
+        :return: значение метрики
+        """
+        return (self._get_excess(_np.asarray(values)) * counts).sum()
+
+    def _start_chunks(self):
+        """
+        Инициализация накопленных величин для расчета по фрагментам
+        :return: сумма превышений
+        """
+        return 0
+
+    def _add_chunk(self, state, chunk):
+        """
+        Учет фрагмента загрузки
+        :param state: накопленные величины
+        :param chunk: массив загрузки фрагмента
+        :return: накопленные величины
+        """
+        return state + self._get_excess(chunk).sum()
+
+    def _finish_chunks(self, state):
+        """
+        Расчет значения метрики по накопленным величинам
+        :param state: накопленные величины
+        :return: значение метрики
+        """
+        return state
+
+    def _get_excess(self, values):
+        """
+        Расчет превышения допустимого уровня загрузки
+        :param values: массив уровней загрузки
+        :return: массив превышений (в степени power)
+        """
+        return _np.maximum(values - self.capacity, 0) ** self.power
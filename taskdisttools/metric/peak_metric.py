@@ -0,0 +1,175 @@
+"""
+Пиковая загрузка системы
+"""
+
+
+# =============================================================================
+
+
+import numpy as _np
+from taskdisttools.metric import Metric
+
+
+# =============================================================================
+
+
+__all__ = [
+    'PeakMetric',
+]
+
+
+# =============================================================================
+
+
+class _SegmentTree(object):
+    """Дерево отрезков для поиска максимума (с точечными изменениями)"""
+
+    def __init__(self, values):
+        """
+        Инициализация
+        :param values: массив значений
+        """
+        self._size = 1
+        while self._size < len(values):
+            self._size *= 2
+        if values.dtype.kind in 'iub':
+            values = values.astype(_np.int64, copy=False)
+            fill = _np.iinfo(_np.int64).min
+        else:
+            fill = -_np.inf
+        self._tree = _np.full(2 * self._size, fill, dtype=values.dtype)
+        self._tree[self._size:self._size + len(values)] = values
+        size = self._size // 2
+        while size > 0:
+            self._tree[size:2 * size] = _np.maximum(
+                self._tree[2 * size:4 * size:2],
+                self._tree[2 * size + 1:4 * size:2]
+            )
+            size //= 2
+
+    @property
+    def max(self):
+        """Максимальное значение"""
+        return self._tree[1]
+
+    def set(self, indices, values):
+        """
+        Изменение значений
+        :param indices: массив номеров значений (без повторов)
+        :param values: массив новых значений
+        """
+        nodes = _np.asarray(indices) + self._size
+        self._tree[nodes] = values
+        size = self._size
+        while size > 1:
+            # Повторяющиеся узлы получают одинаковые значения
+            nodes = nodes // 2
+            size //= 2
+            self._tree[nodes] = _np.maximum(
+                self._tree[2 * nodes], self._tree[2 * nodes + 1])
+
+
+# =============================================================================
+
+
+class PeakMetric(Metric):
+    """
+    Пиковая загрузка системы
+     - инкрементальный расчет: если изменение не затрагивает текущий
+       максимум, оно оценивается по измененным эпохам, иначе - по дереву
+       отрезков за O(k log n)
+    """
+
+    def __call__(self, loading, axis=None):
+        """
+        Расчет значения метрики
+        :param loading: массив уровней загрузки системы
+        :param axis: ось эпох (None - одномерный массив)
+        :return: значение метрики (массив значений при axis != None)
+        """
+        return _np.max(loading, axis=axis)
+
+    def reset(self, loading):
+        """
+        Инициализация накопленных величин
+        :param loading: массив уровней загрузки системы
+        :return: значение метрики
+        """
+        self._tree = _SegmentTree(_np.asarray(loading))
+        self.value = self(loading)
+        return self.value
+
+    def peek(self, loading, delta_indices, delta_values):
+        """
+        Оценка изменения загрузки (накопленные величины не изменяются)
+        :param loading: массив уровней загрузки до изменения
+        :param delta_indices: массив эпох (без повторов)
+        :param delta_values: массив изменений загрузки в этих эпохах
+        :return: значение метрики после изменения
+        """
+        if len(delta_indices) == 0:
+            return self.value
+        old_values = loading[delta_indices]
+        new_max = _np.max(old_values + delta_values)
+        if new_max >= self.value:
+            return new_max
+        if _np.max(old_values) < self.value:
+            # Эпохи с максимальной загрузкой не изменились
+            return self.value
+
+        self._tree.set(delta_indices, old_values + delta_values)
+        try:
+            return self._tree.max
+        finally:
+            self._tree.set(delta_indices, old_values)
+
+    def from_histogram(self, values, counts):
+        """
+        Расчет значения метрики по уровням загрузки и кол-ву эпох с каждым
+        уровнем
+        :param values: массив уровней загрузки
+        :param counts: массив кол-ва эпох с соответствующим уровнем
+        :return: значение метрики
+        """
+        return _np.max(_np.asarray(values)[_np.asarray(counts) > 0])
+
+    def _start_chunks(self):
+        """
+        Инициализация накопленных величин для расчета по фрагментам
+        :return: максимальное значение (None - фрагментов нет)
+        """
+        return None
+
+    def _add_chunk(self, state, chunk):
+        """
+        Учет фрагмента загрузки
+        :param state: накопленные величины
+        :param chunk: массив загрузки фрагмента
+        :return: накопленные величины
+        """
+        if len(chunk) == 0:
+            return state
+        peak = _np.max(chunk)
+        return peak if state is None else max(state, peak)
+
+    def _finish_chunks(self, state):
+        """
+        Расчет значения метрики по накопленным величинам
+        :param state: накопленные величины
+        :return: значение метрики
+        """
+        return self(_np.array([])) if state is None else state
+
+    def update(self, loading, delta_indices, delta_values):
+        """
+        Применение изменения загрузки к накопленным величинам
+        :param loading: массив уровней загрузки до изменения
+        :param delta_indices: массив эпох (без повторов)
+        :param delta_values: массив изменений загрузки в этих эпохах
+        :return: значение метрики после изменения
+        """
+        if len(delta_indices) > 0:
+            self._tree.set(
+                delta_indices, loading[delta_indices] + delta_values)
+            self.value = self._tree.max
+        return self.value
@@ -0,0 +1,220 @@
+"""
+Процентиль загрузки системы
+"""
+
+
+# =============================================================================
+
+
+import numpy as _np
+from taskdisttools.metric import Metric
+
+
+# =============================================================================
+
+
+__all__ = [
+    'PercentileMetric',
+]
+
+
+# =============================================================================
+
+
+class PercentileMetric(Metric):
+    """
+    Процентиль загрузки системы (линейная интерполяция, как в np.percentile)
+     - инкрементальный расчет для целочисленной загрузки по гистограмме
+       уровней загрузки, для вещественной - полный пересчет
+    """
+
+    def __init__(self, q=95):
+        """
+        Инициализация
+        :param q: процентиль (от 0 до 100)
+        """
+        assert 0 <= q <= 100
+        super().__init__()
+        self.q = q
+
+    def __call__(self, loading, axis=None):
+        """
+        Расчет значения метрики
+        :param loading: массив уровней загрузки системы
+        :param axis: ось эпох (None - одномерный массив)
+        :return: значение метрики (массив значений при axis != None)
+        """
+        loading = _np.asarray(loading)
+        if axis is None:
+            loading = loading.ravel()
+            axis = 0
+        n = loading.shape[axis]
+        lower, upper, gamma = self._get_ranks(n)
+        values = _np.partition(loading, [lower, upper], axis=axis)
+        return self._interpolate(
+            _np.take(values, lower, axis=axis),
+            _np.take(values, upper, axis=axis),
+            gamma
+        )
+
+    def reset(self, loading):
+        """
+        Инициализация накопленных величин
+        :param loading: массив уровней загрузки системы
+        :return: значение метрики
+        """
+        loading = _np.asarray(loading)
+        self._counts = None
+        if loading.dtype.kind in 'iub' and len(loading) > 0:
+            loading = loading.astype(_np.int64, copy=False)
+            # Запас уровней гистограммы в обе стороны
+            pad = max(int(loading.max() - loading.min()) + 1, 16)
+            self._offset = int(loading.min()) - pad
+            self._counts = _np.bincount(
+                loading - self._offset,
+                minlength=int(loading.max()) - self._offset + 1 + pad
+            )
+            self._ranks = self._get_ranks(len(loading))
+        self.value = self(loading)
+        return self.value
+
+    def peek(self, loading, delta_indices, delta_values):
+        """
+        Оценка изменения загрузки (накопленные величины не изменяются)
+        :param loading: массив уровней загрузки до изменения
+        :param delta_indices: массив эпох (без повторов)
+        :param delta_values: массив изменений загрузки в этих эпохах
+        :return: значение метрики после изменения
+        """
+        if self._counts is None:
+            return super().peek(loading, delta_indices, delta_values)
+        old_levels = loading[delta_indices] - self._offset
+        new_levels = old_levels + delta_values
+        if not self._move(old_levels, new_levels):
+            return super().peek(loading, delta_indices, delta_values)
+        try:
+            return self._from_counts()
+        finally:
+            self._move(new_levels, old_levels)
+
+    def update(self, loading, delta_indices, delta_values):
+        """
+        Применение изменения загрузки к накопленным величинам
+        :param loading: массив уровней загрузки до изменения
+        :param delta_indices: массив эпох (без повторов)
+        :param delta_values: массив изменений загрузки в этих эпохах
+        :return: значение метрики после изменения
+        """
+        if self._counts is None:
+            return super().update(loading, delta_indices, delta_values)
+        old_levels = loading[delta_indices] - self._offset
+        new_levels = old_levels + delta_values
+        if self._move(old_levels, new_levels):
+            self.value = self._from_counts()
+            return self.value
+
+        loading = _np.array(loading)
+        loading[delta_indices] += delta_values
+        return self.reset(loading)
+
+    def from_histogram(self, values, counts):
+        """
+        Расчет значения метрики по уровням загрузки и кол-ву эпох с каждым
+        уровнем
+        :param values: массив уровней загрузки
+        :param counts: массив кол-ва эпох с соответствующим уровнем
+        :return: значение метрики
+        """
+        values = _np.asarray(values)
+        order = _np.argsort(values, kind='stable')
+        cum_counts = _np.cumsum(_np.asarray(counts)[order])
+        lower, upper, gamma = self._get_ranks(int(cum_counts[-1]))
+        positions = _np.searchsorted(
+            cum_counts, [lower, upper], side='right')
+        return self._interpolate(
+            values[order[positions[0]]], values[order[positions[1]]], gamma)
+
+    def _start_chunks(self):
+        """
+        Инициализация накопленных величин для расчета по фрагментам
+        :return: гистограмма загрузки (уровни и кол-во эпох)
+        """
+        return None
+
+    def _add_chunk(self, state, chunk):
+        """
+        Учет фрагмента загрузки (гистограмма объединяется с гистограммой
+        фрагмента, ее размер ограничен кол-вом различных уровней)
+        :param state: накопленные величины
+        :param chunk: массив загрузки фрагмента
+        :return: накопленные величины
+        """
+        values, counts = _np.unique(chunk, return_counts=True)
+        if state is None:
+            return values, counts
+        values, inverse = _np.unique(
+            _np.concatenate([state[0], values]), return_inverse=True)
+        return values, _np.bincount(
+            inverse.ravel(), _np.concatenate([state[1], counts]),
+            len(values)).astype(_np.int64)
+
+    def _finish_chunks(self, state):
+        """
+        Расчет значения метрики по накопленным величинам
+        :param state: накопленные величины
+        :return: значение метрики
+        """
+        if state is None or len(state[0]) == 0:
+            return self(_np.array([]))
+        return self.from_histogram(*state)
+
+    def _get_ranks(self, n):
+        """
+        Расчет порядковых номеров значений, между которыми
+        интерполируется процентиль
+        :param n: кол-во значений
+        :return: нижний номер, верхний номер, вес верхнего значения
+        """
+        index = (self.q / 100) * (n - 1)
+        lower = int(_np.floor(index))
+        upper = min(lower + 1, n - 1)
+        return lower, upper, index - lower
+
+    @staticmethod
+    def _interpolate(lower, upper, gamma):
+        """
+        Линейная интерполяция между значениями (как в np.percentile)
+        :param lower: нижнее значение (или массив)
+        :param upper: верхнее значение (или массив)
+        :param gamma: вес верхнего значения
+        :return: интерполированное значение
+        """
+        lower = _np.asarray(lower, dtype=float)
+        upper = _np.asarray(upper, dtype=float)
+        diff = upper - lower
+        if gamma >= 0.5:
+            return (upper - diff * (1 - gamma))[()]
+        return (lower + diff * gamma)[()]
+
+    def _move(self, old_levels, new_levels):
+        """
+        Перенос значений между уровнями гистограммы
+        :param old_levels: массив исходных уровней
+        :param new_levels: массив новых уровней
+        :return: False если новые уровни вне гистограммы (перенос
+                 не выполняется), иначе True
+        """
+        if len(new_levels) > 0 and (
+                new_levels.min() < 0 or new_levels.max() >= len(self._counts)):
+            return False
+        _np.subtract.at(self._counts, old_levels, 1)
+        _np.add.at(self._counts, new_levels, 1)
+        return True
+
+    def _from_counts(self):
+        """Расчет значения метрики по гистограмме"""
+        lower, upper, gamma = self._ranks
+        levels = _np.searchsorted(
+            _np.cumsum(self._counts), [lower, upper], side='right')
+        return self._interpolate(
+            levels[0] + self._offset, levels[1] + self._offset, gamma)
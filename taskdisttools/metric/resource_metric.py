@@ -0,0 +1,175 @@
+"""
+Загрузка системы по нескольким ресурсам
+"""
+
+
+# =============================================================================
+
+
+import copy
+import numpy as _np
+from taskdisttools.metric import Metric, FunctionMetric
+from taskdisttools.metric.peak_metric import PeakMetric
+
+
+# =============================================================================
+
+
+__all__ = [
+    'ResourceMetric',
+]
+
+
+# =============================================================================
+
+
+class ResourceMetric(Metric):
+    """
+    Метрика загрузки системы по нескольким ресурсам
+     - загрузка - матрица эпоха x ресурс (векторные "веса" задач);
+       для каждого ресурса рассчитывается метрика загрузки, нормированной
+       на его емкость, значения объединяются функцией reduce
+       (по умолчанию - максимум по ресурсам нормированной пиковой загрузки)
+     - инкрементальный расчет выполняется метриками ресурсов
+       по нормированным загрузкам ресурсов
+    """
+
+    def __init__(self, metric=None, capacity=None, reduce=_np.max):
+        """
+        Инициализация
+        :param metric: метрика загрузки ресурса (Metric или функция
+            загрузки системы, None - PeakMetric)
+        :param capacity: емкости ресурсов (по столбцам загрузки,
+            см. TaskModel.resources; None - без нормирования)
+        :param reduce: функция объединения значений по ресурсам
+            (вызывается с axis=0, например np.max, np.sum, np.mean)
+        """
+        super().__init__()
+        if metric is None:
+            metric = PeakMetric()
+        elif not isinstance(metric, Metric):
+            metric = FunctionMetric(metric)
+        self.metric = metric
+        self.capacity = None if capacity is None \
+            else _np.asarray(capacity, dtype=float)
+        self.reduce = reduce
+        self._metrics = None
+        self._loading = None
+
+    def __call__(self, loading, axis=None):
+        """
+        Расчет значения метрики
+        :param loading: матрица загрузки (эпоха x ресурс)
+        :param axis: ось эпох (None - матрица эпоха x ресурс,
+            иначе - массив, последняя ось которого - ресурсы)
+        :return: значение метрики (массив значений при axis != None)
+        """
+        loading = _np.asarray(loading)
+        axis = 0 if axis is None else axis % loading.ndim
+        values = self.metric(self._normalize(loading), axis=axis + 1)
+        return self.reduce(_np.asarray(values), axis=0)
+
+    def reset(self, loading):
+        """
+        Инициализация накопленных величин
+        :param loading: матрица загрузки (эпоха x ресурс)
+        :return: значение метрики
+        """
+        self._loading = self._normalize(loading)
+        self._metrics = [copy.deepcopy(self.metric)
+                         for _ in range(len(self._loading))]
+        self.value = self.reduce(_np.array([
+            metric.reset(self._loading[k])
+            for k, metric in enumerate(self._metrics)
+        ]), axis=0)
+        return self.value
+
+    def peek(self, loading, delta_indices, delta_values):
+        """
+        Оценка изменения загрузки (накопленные величины не изменяются)
+        :param loading: матрица загрузки до изменения
+        :param delta_indices: массив эпох (без повторов)
+        :param delta_values: матрица изменений загрузки в этих эпохах
+            (эпоха x ресурс)
+        :return: значение метрики после изменения
+        """
+        delta_values = self._normalize(delta_values)
+        return self.reduce(_np.array([
+            metric.peek(self._loading[k], delta_indices, delta_values[k])
+            for k, metric in enumerate(self._metrics)
+        ]), axis=0)
+
+    def update(self, loading, delta_indices, delta_values):
+        """
+        Применение изменения загрузки к накопленным величинам
+        (сам массив загрузки не изменяется)
+        :param loading: матрица загрузки до изменения
+        :param delta_indices: массив эпох (без повторов)
+        :param delta_values: матрица изменений загрузки в этих эпохах
+            (эпоха x ресурс)
+        :return: значение метрики после изменения
+        """
+        delta_values = self._normalize(delta_values)
+        self.value = self.reduce(_np.array([
+            metric.update(self._loading[k], delta_indices, delta_values[k])
+            for k, metric in enumerate(self._metrics)
+        ]), axis=0)
+        self._loading[:, delta_indices] += delta_values
+        return self.value
+
+    def from_histogram(self, values, counts):
+        """
+        Расчет значения метрики по уровням загрузки и кол-ву эпох с каждым
+        уровнем
+        :param values: матрица уровней загрузки (уровень x ресурс)
+        :param counts: массив кол-ва эпох с соответствующим уровнем
+        :return: значение метрики
+        """
+        return self(_np.repeat(values, counts, axis=0))
+
+    def _start_chunks(self):
+        """
+        Инициализация накопленных величин для расчета по фрагментам
+        :return: накопленные величины (None - фрагментов нет)
+        """
+        return None
+
+    def _add_chunk(self, state, chunk):
+        """
+        Учет фрагмента загрузки
+        :param state: накопленные величины
+        :param chunk: матрица загрузки фрагмента (эпоха x ресурс)
+        :return: накопленные величины
+        """
+        chunk = self._normalize(chunk)
+        if state is None:
+            state = [self.metric._start_chunks() for _ in range(len(chunk))]
+        return [self.metric._add_chunk(item, chunk[k])
+                for k, item in enumerate(state)]
+
+    def _finish_chunks(self, state):
+        """
+        Расчет значения метрики по накопленным величинам
+        :param state: накопленные величины
+        :return: значение метрики
+        """
+        if state is None:
+            return self.metric._finish_chunks(self.metric._start_chunks())
+        return self.reduce(_np.array([
+            self.metric._finish_chunks(item) for item in state
+        ]), axis=0)
+
+    def _normalize(self, loading):
+        """
+        Нормирование загрузки на емкости ресурсов (ось ресурсов
+        переносится в начало, чтобы эпохи каждого ресурса шли в памяти
+        подряд)
+        :param loading: массив загрузки (последняя ось - ресурсы)
+        :return: нормированный массив загрузки (первая ось - ресурсы)
+        """
+        loading = _np.moveaxis(_np.asarray(loading), -1, 0)
+        if self.capacity is None:
+            return _np.array(loading, order='C')
+        loading = loading.astype(float, order='C')
+        loading /= self.capacity.reshape((-1,) + (1,) * (loading.ndim - 1))
+        return loading
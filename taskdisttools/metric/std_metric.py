@@ -0,0 +1,30 @@
+"""
+СКО загрузки системы
+"""
+
+
+# =============================================================================
+
+
+import numpy as _np
+from taskdisttools.metric import VarMetric
+
+
+# =============================================================================
+
+
+__all__ = [
+    'StdMetric',
+]
+
+
+# =============================================================================
+
+
+class StdMetric(VarMetric):
+    """СКО загрузки системы"""
+
+    @staticmethod
+    def _from_var(var):
+        """Значение метрики по дисперсии"""
+        return _np.sqrt(var)
@@ -0,0 +1,196 @@
+"""
+Дисперсия загрузки системы
+"""
+
+
+# =============================================================================
+
+
+import numpy as _np
+from taskdisttools.metric import Metric
+
+
+# =============================================================================
+
+
+__all__ = [
+    'VarMetric',
+]
+
+
+# =============================================================================
+
+
+class VarMetric(Metric):
+    """
+    Дисперсия загрузки системы
+     - инкрементальный расчет по суммам значений и их квадратов
+       (для целочисленной загрузки суммы точные, поэтому результат
+       совпадает с полным расчетом)
+    """
+
+    def __call__(self, loading, axis=None):
+        """
+        Расчет значения метрики
+        :param loading: массив уровней загрузки системы
+        :param axis: ось эпох (None - одномерный массив)
+        :return: значение метрики (массив значений при axis != None)
+        """
+        loading = _np.asarray(loading)
+        if loading.dtype.kind not in 'iub':
+            return self._from_var(_np.var(loading, axis=axis))
+
+        loading = loading.astype(_np.int64, copy=False)
+        n = loading.size if axis is None else loading.shape[axis]
+        s1 = loading.sum(axis=axis)
+        s2 = (loading * loading).sum(axis=axis)
+        if axis is None:
+            s1, s2 = int(s1), int(s2)
+        return self.from_moments(s1, s2, n)
+
+    def reset(self, loading):
+        """
+        Инициализация накопленных величин
+        :param loading: массив уровней загрузки системы
+        :return: значение метрики
+        """
+        loading = _np.asarray(loading)
+        self._n = len(loading)
+        self._exact = loading.dtype.kind in 'iub'
+        self._s1, self._s2 = self._get_sums(loading)
+        self.value = self(loading)
+        return self.value
+
+    def peek(self, loading, delta_indices, delta_values):
+        """
+        Оценка изменения загрузки (накопленные величины не изменяются)
+        :param loading: массив уровней загрузки до изменения
+        :param delta_indices: массив эпох (без повторов)
+        :param delta_values: массив изменений загрузки в этих эпохах
+        :return: значение метрики после изменения
+        """
+        s1, s2 = self._make_sums(loading, delta_indices, delta_values)
+        return self.from_moments(s1, s2, self._n)
+
+    def update(self, loading, delta_indices, delta_values):
+        """
+        Применение изменения загрузки к накопленным величинам
+        :param loading: массив уровней загрузки до изменения
+        :param delta_indices: массив эпох (без повторов)
+        :param delta_values: массив изменений загрузки в этих эпохах
+        :return: значение метрики после изменения
+        """
+        self._s1, self._s2 = self._make_sums(
+            loading, delta_indices, delta_values)
+        self.value = self.from_moments(self._s1, self._s2, self._n)
+        return self.value
+
+    def from_histogram(self, values, counts):
+        """
+        Расчет значения метрики по уровням загрузки и кол-ву эпох с каждым
+        уровнем
+        :param values: массив уровней загрузки
+        :param counts: массив кол-ва эпох с соответствующим уровнем
+        :return: значение метрики
+        """
+        values = _np.asarray(values)
+        counts = _np.asarray(counts, dtype=_np.int64)
+        n = int(counts.sum())
+        if values.dtype.kind in 'iub':
+            values = values.astype(_np.int64, copy=False)
+            s1 = int((values * counts).sum())
+            s2 = int((values * values * counts).sum())
+            return self.from_moments(s1, s2, n)
+        mean = (values * counts).sum() / n
+        return self._from_var(((values - mean) ** 2 * counts).sum() / n)
+
+    def _start_chunks(self):
+        """
+        Инициализация накопленных величин для расчета по фрагментам
+        :return: флаг точного расчета, кол-во значений и суммы значений
+                 и их квадратов (для вещественной загрузки - среднее
+                 и сумма квадратов отклонений)
+        """
+        return True, 0, 0, 0
+
+    def _add_chunk(self, state, chunk):
+        """
+        Учет фрагмента загрузки
+        :param state: накопленные величины
+        :param chunk: массив загрузки фрагмента
+        :return: накопленные величины
+        """
+        exact, n, a, b = state
+        if exact and chunk.dtype.kind in 'iub':
+            chunk = chunk.astype(_np.int64, copy=False)
+            return (True, n + len(chunk), a + int(chunk.sum()),
+                    b + int((chunk * chunk).sum()))
+        if exact:
+            # Переход к среднему и сумме квадратов отклонений
+            a, b = (a / n, b - a * a / n) if n > 0 else (0., 0.)
+        if len(chunk) == 0:
+            return False, n, a, b
+
+        # Объединение моментов (алгоритм Чана)
+        chunk_mean = float(chunk.mean())
+        chunk_m2 = float(((chunk - chunk_mean) ** 2).sum())
+        total = n + len(chunk)
+        delta = chunk_mean - a
+        return (False, total, a + delta * len(chunk) / total,
+                b + chunk_m2 + delta * delta * n * len(chunk) / total)
+
+    def _finish_chunks(self, state):
+        """
+        Расчет значения метрики по накопленным величинам
+        :param state: накопленные величины
+        :return: значение метрики
+        """
+        exact, n, a, b = state
+        if n == 0:
+            return self(_np.array([]))
+        if exact:
+            return self.from_moments(a, b, n)
+        return self._from_var(max(b / n, 0.))
+
+    def _get_sums(self, values):
+        """
+        Расчет суммы значений и суммы их квадратов
+        :param values: массив значений
+        :return: сумма значений, сумма квадратов
+        """
+        if self._exact:
+            values = values.astype(_np.int64, copy=False)
+            return int(values.sum()), int((values * values).sum())
+        return float(values.sum()), float((values * values).sum())
+
+    def _make_sums(self, loading, delta_indices, delta_values):
+        """
+        Расчет сумм после изменения загрузки
+        :param loading: массив уровней загрузки до изменения
+        :param delta_indices: массив эпох (без повторов)
+        :param delta_values: массив изменений загрузки в этих эпохах
+        :return: сумма значений, сумма квадратов
+        """
+        old_values = loading[delta_indices]
+        old_s1, old_s2 = self._get_sums(old_values)
+        new_s1, new_s2 = self._get_sums(old_values + delta_values)
+        return self._s1 + new_s1 - old_s1, self._s2 + new_s2 - old_s2
+
+    def from_moments(self, s1, s2, n):
+        """
+        Расчет значения метрики по сумме значений и сумме их квадратов
+        :param s1: сумма значений (или массив сумм)
+        :param s2: сумма квадратов (или массив сумм)
+        :param n: кол-во значений
+        :return: значение метрики
+        """
+        if isinstance(s1, _np.ndarray):
+            var = (n * s2 - s1 * s1) / (n * n)
+            return self._from_var(_np.maximum(var, 0.))
+        var = float(n * s2 - s1 * s1) / float(n * n)
+        return self._from_var(max(var, 0.))
+
+    @staticmethod
+    def _from_var(var):
+        """Значение метрики по дисперсии"""
+        return var
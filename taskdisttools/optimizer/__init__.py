@@ -1,2 +1,11 @@
 from .optimizer import *
 from .greedy_optimizer import *
+from .annealing_optimizer import *
+from .exact_optimizer import *
+from .multiresolution_optimizer import *
+from .evaluator import *
+from .cache import *
+from .online_scheduler import *
+from .node_optimizer import *
+from .storage import *
+from .instrumentation import *
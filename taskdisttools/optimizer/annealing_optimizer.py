@@ -0,0 +1,270 @@
+"""
+Алгоритм оптимизации методом имитации отжига
+"""
+
+
+# =============================================================================
+
+
+import math
+import time
+import random
+from .optimizer import Optimizer
+from .evaluator import IncrementalEvaluator
+
+
+# =============================================================================
+
+
+__all__ = [
+    'SimulatedAnnealingOptimizer',
+]
+
+
+# =============================================================================
+
+
+def _exponential_schedule(t_start, t_end, progress):
+    """Экспоненциальное (геометрическое) снижение температуры"""
+    return t_start * (t_end / t_start) ** progress
+
+
+def _linear_schedule(t_start, t_end, progress):
+    """Линейное снижение температуры"""
+    return t_start + (t_end - t_start) * progress
+
+
+# Доступные законы снижения температуры
+_SCHEDULES = {
+    'exponential': _exponential_schedule,
+    'linear': _linear_schedule,
+}
+
+# Вероятность принятия среднего ухудшения в начале отжига
+# (используется при автоматическом выборе начальной температуры)
+_INITIAL_ACCEPTANCE = 0.8
+
+
+# =============================================================================
+
+
+class SimulatedAnnealingOptimizer(Optimizer):
+    """
+    Алгоритм оптимизации методом имитации отжига
+     - ход: изменение t0 случайной корневой задачи в пределах ее окна
+       [t0_min, t0_max] (локальный сдвиг или случайное значение)
+     - ход, нарушающий ограничения, отклоняется; после принятия хода
+       t0 корневых задач приводятся к значениям с учетом ограничений
+     - оптимизация ограничена кол-вом оценок и/или временем работы
+    """
+
+    def __init__(self, metric, *, n_evaluations=10000, time_limit=None,
+                 initial_temperature=None, final_temperature=None,
+                 schedule='exponential', max_shift=None,
+                 random_state=None, cache_memory=64 * 2 ** 20,
+                 instrumentation=None, periodic=False):
+        """
+        Инициализация
+        :param metric: оптимизируемая метрика
+        :param n_evaluations: максимальное кол-во оценок расписания
+            (None - не ограничено)
+        :param time_limit: максимальное время оптимизации, с
+            (None - не ограничено)
+        :param initial_temperature: начальная температура (None - выбор
+            по среднему ухудшению метрики для случайных ходов)
+        :param final_temperature: конечная температура
+            (None - 0.001 от начальной)
+        :param schedule: закон снижения температуры ('exponential',
+            'linear' или функция (t_start, t_end, progress) -> t,
+            где progress - доля израсходованного бюджета от 0 до 1)
+        :param max_shift: максимальный сдвиг t0 при ходе (не менее 1)
+            (None - случайное значение из окна задачи)
+        :param random_state: состояние ДСЧ
+        :param cache_memory: предельный объем памяти кеша значений
+            метрики, байт (None или 0 - без кеширования)
+        :param instrumentation: сбор статистики работы
+            (None - статистика не собирается)
+        :param periodic: флаг расчета метрики результатов по гиперпериоду
+            расписания
+        """
+        assert n_evaluations is not None or time_limit is not None
+        assert callable(schedule) or schedule in _SCHEDULES
+        assert max_shift is None or max_shift >= 1
+        super().__init__(metric, cache_memory=cache_memory,
+                         instrumentation=instrumentation, periodic=periodic)
+        self._n_evaluations = n_evaluations
+        self._time_limit = time_limit
+        self._initial_temperature = initial_temperature
+        self._final_temperature = final_temperature
+        self._schedule = _SCHEDULES.get(schedule, schedule)
+        self._max_shift = max_shift
+        self._random_state = random_state
+        # Расход бюджета текущего запуска
+        self._started = None
+        self._n_evaluated = 0
+
+    def _do_optimize(self, model, t_max):
+        """
+        Непосредственно оптимизация
+        :param model: компактная модель набора задач
+        :param t_max: максимальная эпоха моделирования
+        """
+        rng = random.Random(self._random_state)
+        instrumentation = self.instrumentation
+        # Первая корневая задача не сдвигается (как в GreedyOptimizer)
+        windows = dict(
+            (root, model.get_start_times(root, t_max))
+            for root in range(1, len(model.root_ids))
+        )
+        roots = [root for root, window in windows.items() if len(window) > 1]
+        if len(roots) == 0:
+            return
+
+        evaluator = IncrementalEvaluator(
+            model, self._metric, t_max,
+            model.get_root_start_times(
+                self.results_.start_times_array, raw=True),
+            cache=self.cache_
+        )
+        cur_score = opt_score = evaluator.measure(self.results_.loading)
+        opt_root_start_times = None
+
+        self._started = time.perf_counter()
+        self._n_evaluated = 0
+        t_start = self._initial_temperature
+        if t_start is None:
+            t_start = self._estimate_temperature(evaluator, roots, windows,
+                                                 rng)
+        t_end = self._final_temperature
+        if t_end is None:
+            t_end = t_start * 1e-3
+
+        while True:
+            progress = self._get_progress()
+            if progress >= 1:
+                break
+
+            root = rng.choice(roots)
+            t0 = self._make_move(evaluator, root, windows[root], rng)
+            if t0 is None:
+                # Ход расходует бюджет, чтобы оптимизация завершилась,
+                # даже если сдвинуть нельзя ни одну задачу
+                self._n_evaluated += 1
+                continue
+            score = self._evaluate_move(evaluator, root, t0)
+            if not math.isfinite(score):
+                continue
+
+            temperature = 0.
+            if t_start > 0:
+                temperature = self._schedule(t_start, t_end, progress)
+            delta = score - cur_score
+            accepted = delta <= 0 or (
+                temperature > 0 and
+                rng.random() < math.exp(-delta / temperature))
+            if instrumentation is not None:
+                instrumentation.count('accepted' if accepted else 'declined')
+                instrumentation.emit(
+                    'evaluation', root=root, t0=t0, score=score,
+                    temperature=temperature, accepted=accepted)
+            if not accepted:
+                continue
+
+            with self._timer('apply'):
+                evaluator.apply_move(root, t0)
+                evaluator.normalize()
+            cur_score = evaluator.score
+            if cur_score < opt_score:
+                opt_score = cur_score
+                opt_root_start_times = evaluator.root_start_times.copy()
+
+        if opt_root_start_times is not None:
+            self.results_ = self._evaluate(opt_root_start_times, model, t_max)
+
+    def _get_progress(self):
+        """
+        Расчет доли израсходованного бюджета оптимизации
+        :return: доля от 0 до 1 (по кол-ву оценок или времени работы)
+        """
+        progress = 0.
+        if self._n_evaluations is not None:
+            progress = self._n_evaluated / max(self._n_evaluations, 1)
+        if self._time_limit is not None:
+            elapsed = time.perf_counter() - self._started
+            progress = max(progress, elapsed / max(self._time_limit, 1e-9))
+        return min(progress, 1.)
+
+    def _make_move(self, evaluator, root, window, rng):
+        """
+        Выбор нового значения t0 корневой задачи
+        :param evaluator: инкрементальный расчет параметров расписания
+        :param root: позиция корневой задачи
+        :param window: диапазон допустимых значений t0
+        :param rng: ДСЧ
+        :return: новое значение t0 (отличное от текущего; None - в пределах
+                 max_shift нет допустимых значений)
+        """
+        cur_t0 = int(evaluator.root_start_times[root])
+        if self._max_shift is None:
+            t0 = rng.choice(window)
+            while t0 == cur_t0:
+                t0 = rng.choice(window)
+            return t0
+
+        lo = max(window.start, cur_t0 - self._max_shift)
+        hi = min(window.stop - 1, cur_t0 + self._max_shift)
+        if not lo <= cur_t0 <= hi:
+            # t0 вне окна (например, после применения ограничений)
+            return rng.randint(lo, hi) if lo <= hi else None
+        if lo == hi:
+            return None
+        t0 = rng.randint(lo, hi - 1)
+        return t0 + 1 if t0 >= cur_t0 else t0
+
+    def _evaluate_move(self, evaluator, root, t0):
+        """
+        Оценка хода с учетом расхода бюджета
+        :param evaluator: инкрементальный расчет параметров расписания
+        :param root: позиция корневой задачи
+        :param t0: новое значение t0
+        :return: значение метрики (inf при конфликте ограничений)
+        """
+        self._n_evaluated += 1
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            instrumentation.count('evaluations')
+        try:
+            with self._timer('evaluate'):
+                return evaluator.evaluate_move(root, t0)
+        except RuntimeError:
+            if instrumentation is not None:
+                instrumentation.count('rejected')
+            return math.inf
+
+    def _estimate_temperature(self, evaluator, roots, windows, rng):
+        """
+        Выбор начальной температуры, при которой среднее ухудшение метрики
+        принимается с заданной вероятностью
+        :param evaluator: инкрементальный расчет параметров расписания
+        :param roots: позиции сдвигаемых корневых задач
+        :param windows: диапазоны допустимых значений t0
+        :param rng: ДСЧ
+        :return: начальная температура
+        """
+        n_samples = 100
+        if self._n_evaluations is not None:
+            n_samples = min(n_samples, max(self._n_evaluations // 10, 1))
+
+        deltas = list()
+        for _ in range(n_samples):
+            root = rng.choice(roots)
+            t0 = self._make_move(evaluator, root, windows[root], rng)
+            if t0 is None:
+                continue
+            delta = self._evaluate_move(evaluator, root, t0) - evaluator.score
+            if math.isfinite(delta) and delta > 0:
+                deltas.append(delta)
+
+        if len(deltas) == 0:
+            return 0.
+        return -(sum(deltas) / len(deltas)) / math.log(_INITIAL_ACCEPTANCE)
@@ -0,0 +1,178 @@
+"""
+Кеш значений метрики для оцененных расписаний
+"""
+
+
+# =============================================================================
+
+
+from collections import OrderedDict
+import numpy as _np
+
+
+# =============================================================================
+
+
+__all__ = [
+    'ScoreCache',
+]
+
+
+# =============================================================================
+
+
+# Оценка объема памяти, занимаемой одной записью кеша, байт
+# (128-битный ключ, значение и узел упорядоченного словаря)
+_ENTRY_SIZE = 176
+
+# Константы перемешивания (SplitMix64)
+_GOLDEN = _np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = _np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = _np.uint64(0x94D049BB133111EB)
+
+# Константы второго (независимого) хеша
+_GOLDEN_2 = _np.uint64(0xD6E8FEB86659FD93)
+_SALT_2 = _np.uint64(0x2545F4914F6CDD1D)
+
+
+# =============================================================================
+
+
+def _mix(z):
+    """
+    Перемешивание 64-битных значений (финализатор SplitMix64)
+    :param z: массив uint64
+    :return: массив uint64
+    """
+    z = (z ^ (z >> _np.uint64(30))) * _MIX_1
+    z = (z ^ (z >> _np.uint64(27))) * _MIX_2
+    return z ^ (z >> _np.uint64(31))
+
+
+def _join(keys):
+    """
+    Формирование ключей словаря по парам хешей
+    :param keys: матрица хешей (ключ x 2)
+    :return: список 128-битных целых чисел
+    """
+    return [(high << 64) | low
+            for high, low in _np.asarray(keys).reshape(-1, 2).tolist()]
+
+
+# =============================================================================
+
+
+class ScoreCache(object):
+    """
+    Кеш значений метрики для оцененных расписаний (LRU)
+     - ключ - пара независимых 64-битных хешей вектора t0 всех задач
+       после применения ограничений: каждый хеш - сумма хешей пар
+       (задача, t0), поэтому при изменении t0 части задач ключ
+       пересчитывается по этим задачам
+     - полный вектор t0 не хранится: при совпадении обоих хешей
+       для разных расписаний (вероятность порядка N^2 / 2^129 для N
+       оцененных расписаний) возвращается значение другого расписания
+     - объем кеша ограничен оценкой занимаемой памяти, при превышении
+       удаляются записи, к которым дольше всего не обращались
+    """
+
+    def __init__(self, max_memory=64 * 2 ** 20):
+        """
+        Инициализация
+        :param max_memory: предельный объем памяти кеша, байт
+        """
+        assert max_memory > 0
+        self.max_memory = max_memory
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+
+    def __len__(self):
+        """Кол-во записей"""
+        return len(self._items)
+
+    @property
+    def max_size(self):
+        """Предельное кол-во записей"""
+        return max(self.max_memory // _ENTRY_SIZE, 1)
+
+    @property
+    def memory(self):
+        """Оценка объема занимаемой памяти, байт"""
+        return len(self._items) * _ENTRY_SIZE
+
+    @property
+    def hit_rate(self):
+        """Доля обращений, для которых значение найдено в кеше"""
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.
+
+    def get_stats(self):
+        """
+        Получение статистики обращений
+        :return: словарь статистики
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'size': len(self._items),
+            'memory': self.memory,
+        }
+
+    def clear(self):
+        """Очистка кеша и статистики"""
+        self._items.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, keys):
+        """
+        Поиск значений метрики
+        :param keys: матрица ключей (ключ x 2)
+        :return: массив значений (nan для отсутствующих в кеше ключей)
+        """
+        values = _np.full(len(keys), _np.nan)
+        for i, key in enumerate(_join(keys)):
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+                values[i] = value
+        n_found = int(_np.count_nonzero(~_np.isnan(values)))
+        self.hits += n_found
+        self.misses += len(values) - n_found
+        return values
+
+    def store(self, keys, values):
+        """
+        Сохранение значений метрики
+        :param keys: матрица ключей (ключ x 2)
+        :param values: массив значений
+        """
+        for key, value in zip(_join(keys),
+                              _np.asarray(values, dtype=float).tolist()):
+            self._items[key] = value
+            self._items.move_to_end(key)
+        max_size = self.max_size
+        while len(self._items) > max_size:
+            self._items.popitem(last=False)
+
+    @staticmethod
+    def make_keys(tasks, start_times):
+        """
+        Расчет вклада задач в ключ расписания
+        :param tasks: массив номеров задач
+        :param start_times: массив t0 этих задач (или матрица
+            вариант x задача)
+        :return: пара хешей (или матрица вариант x 2; суммируются
+                 по модулю 2^64 покомпонентно)
+        """
+        start_times = _np.asarray(
+            start_times, dtype=_np.int64).astype(_np.uint64)
+        tasks = _np.asarray(tasks, dtype=_np.int64).astype(_np.uint64)
+        first = _mix(tasks * _GOLDEN ^ start_times)
+        second = _mix((start_times * _GOLDEN_2 + _SALT_2) ^ _mix(tasks))
+        return _np.stack([
+            first.sum(axis=-1, dtype=_np.uint64),
+            second.sum(axis=-1, dtype=_np.uint64),
+        ], axis=-1)
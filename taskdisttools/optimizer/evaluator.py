@@ -0,0 +1,598 @@
+"""
+Инкрементальный расчет параметров расписания
+"""
+
+
+# =============================================================================
+
+
+import copy
+import math
+from collections import namedtuple
+import numpy as _np
+from taskdisttools.metric import Metric
+from taskdisttools.utils import compute_loading, launch_epochs
+from taskdisttools.utils import batch_launch_epochs, weighted_bincount
+from .cache import ScoreCache
+
+
+# =============================================================================
+
+
+__all__ = [
+    'IncrementalEvaluator',
+]
+
+
+# =============================================================================
+
+
+def _var_from_moments(s1, s2, n):
+    """Дисперсия по сумме значений и сумме их квадратов (или массивам)"""
+    return (n * s2 - s1 * s1) / (n * n)
+
+
+def _std_from_moments(s1, s2, n):
+    """СКО по сумме значений и сумме их квадратов (или массивам)"""
+    var = _var_from_moments(s1, s2, n)
+    if isinstance(var, _np.ndarray):
+        return _np.sqrt(_np.maximum(var, 0.))
+    return math.sqrt(var)
+
+
+# Ограничение размера блока загрузок при пакетной оценке (кол-во элементов)
+BATCH_SIZE = 1 << 22
+
+# Метрики, значение которых пересчитывается за O(1)
+# по накопленным суммам (для целочисленной загрузки; функции принимают
+# и массивы сумм)
+MOMENT_METRICS = {
+    _np.std: _std_from_moments,
+    _np.var: _var_from_moments,
+}
+
+
+_MoveContext = namedtuple(
+    '_MoveContext',
+    'affected chain offsets plan plan_tasks plan_local steps steps_local'
+)
+
+
+# =============================================================================
+
+
+class IncrementalEvaluator(object):
+    """
+    Инкрементальный расчет параметров расписания
+     - хранение текущей загрузки системы
+     - оценка изменения t0 корневой задачи с учетом только затронутых задач
+     - корневые задачи задаются позициями в model.root_ids,
+       остальные задачи - номерами в модели
+     - при заданном кеше оценки расписаний, совпадающих после применения
+       ограничений, не пересчитываются
+     - для матрицы "весов" задач (задача x ресурс) загрузка - матрица
+       эпоха x ресурс, изменения загрузки - по всем ресурсам сразу
+     - вместе с t0 корневой задачи могут изменяться "веса" задач ее
+       цепочки (например, при переносе цепочки на другой узел)
+     - с полным расчетом (Optimizer._evaluate) значения совпадают точно
+       только для целочисленных "весов" и метрик, рассчитываемых
+       по загрузке; np.std и np.var рассчитываются по точным целым
+       суммам, а для дробных "весов" загрузка изменяется прибавлением
+       и вычитанием - значения могут отличаться в последних разрядах
+       (и при равных значениях выбор варианта может отличаться)
+    """
+
+    def __init__(self, model, metric, t_max, root_start_times, *,
+                 cache=None):
+        """
+        Инициализация
+        :param model: компактная модель набора задач
+        :param metric: оптимизируемая метрика
+        :param t_max: максимальная эпоха моделирования
+        :param root_start_times: массив t0 корневых задач (по root_ids)
+        :param cache: кеш значений метрики (ScoreCache) или None
+            (кеш должен использоваться только с той же моделью, метрикой
+            и t_max)
+        """
+        self._model = model
+        self._metric = metric
+        self._t_max = t_max
+        self._contexts = dict()
+        self._epochs = dict()
+        # Текущие "веса" задач (копируются при первом изменении)
+        self.weight = model.weight
+
+        self.root_start_times = _np.array(root_start_times, dtype=_np.int64)
+        self.raw_start_times = model.make_start_times(
+            self.root_start_times, apply_constraints=False)
+        self.start_times = self.raw_start_times.copy()
+        model.plan.apply(self.start_times)
+        self.loading = compute_loading(
+            self.start_times, model.frequency, model.span, model.weight,
+            t_max
+        )
+
+        # Метрика библиотеки пересчитывается инкрементально по собственным
+        # накопленным величинам (копия, т.к. метрика может быть общей)
+        self._tracker = None
+        if isinstance(metric, Metric):
+            self._tracker = copy.deepcopy(metric)
+            self._tracker.reset(self.loading)
+
+        self._moments = None
+        if self.loading.dtype.kind in 'iu' and self.loading.ndim == 1 \
+                and len(self.loading) > 0:
+            self._moments = MOMENT_METRICS.get(metric)
+        self._s1 = int(self.loading.sum())
+        self._s2 = int((self.loading * self.loading).sum())
+        self.score = self.measure(self.loading)
+
+        self._cache = cache
+        if cache is not None:
+            self._key = ScoreCache.make_keys(
+                _np.arange(len(model)), self.start_times)
+
+    def measure(self, loading):
+        """
+        Расчет значения метрики (тем же способом, что и при оценке
+        изменений, чтобы значения были сравнимы между собой)
+        :param loading: массив уровней загрузки системы
+        :return: значение метрики
+        """
+        if self._moments is None:
+            return self._metric(loading)
+        return self._moments(
+            int(loading.sum()), int((loading * loading).sum()), len(loading))
+
+    def evaluate_move(self, root, t0):
+        """
+        Оценка изменения t0 корневой задачи (состояние не изменяется)
+        :param root: позиция корневой задачи
+        :param t0: новое значение t0
+        :return: значение метрики
+        """
+        tasks, task_t0s = self._make_moved(root, t0)
+        if len(tasks) == 0:
+            return self.score
+        if self._cache is None:
+            return self._evaluate_moved(tasks, task_t0s)
+
+        key = self._make_keys(tasks, task_t0s[None, :])
+        score = self._cache.lookup(key)[0]
+        if _np.isnan(score):
+            score = self._evaluate_moved(tasks, task_t0s)
+            self._cache.store(key, [score])
+        return score
+
+    def _evaluate_moved(self, tasks, task_t0s):
+        """
+        Оценка изменения t0 задач (состояние не изменяется)
+        :param tasks: массив номеров задач, t0 которых изменилось
+        :param task_t0s: массив новых t0 задач
+        :return: значение метрики
+        """
+        epochs, deltas = self._make_delta(tasks, task_t0s)
+        if self._tracker is not None:
+            changed, delta = self._aggregate_delta(epochs, deltas)
+            return self._tracker.peek(self.loading, changed, delta)
+
+        changed = _np.unique(epochs)
+        old_values = self.loading[changed]
+        _np.add.at(self.loading, epochs, deltas)
+        try:
+            if self._moments is None:
+                return self._metric(self.loading)
+            new_values = self.loading[changed]
+            return self._moments(
+                self._s1 + int(new_values.sum() - old_values.sum()),
+                self._s2 + int((new_values * new_values).sum() -
+                               (old_values * old_values).sum()),
+                len(self.loading)
+            )
+        finally:
+            self.loading[changed] = old_values
+
+    def evaluate_moves(self, root, t0s, *, weight=None, moved_t0s=None):
+        """
+        Оценка всех вариантов t0 корневой задачи за один векторизованный
+        проход (состояние не изменяется)
+        :param root: позиция корневой задачи
+        :param t0s: последовательность значений t0
+        :param weight: новые "веса" задач цепочки корневой задачи
+            (по возрастанию номеров задач; None - не изменяются)
+        :param moved_t0s: матрица t0 затронутых задач после применения
+            ограничений (вариант x задача, см. select_moves; None -
+            рассчитывается)
+        :return: массив значений метрики (inf для значений t0,
+                 при которых ограничения не могут быть выполнены)
+        """
+        t0s = list(t0s)
+        context = self._get_context(root)
+        affected = context.affected
+        if moved_t0s is None:
+            moved_t0s, feasible = self._make_affected_t0s(
+                root, t0s, strict=False)
+        else:
+            feasible = _np.ones(len(t0s), dtype=bool)
+
+        # Задачи, t0 (или "вес") которых меняется, исключаются из базовой
+        # загрузки
+        varying = _np.any(
+            moved_t0s[feasible] != self.start_times[affected][None, :],
+            axis=0
+        )
+        if weight is not None:
+            varying |= context.chain
+        tasks = affected[varying]
+        moved_t0s = moved_t0s[:, varying]
+
+        base = self.loading.copy()
+        for task in tasks.tolist():
+            _np.subtract.at(base, self._get_epochs(task), self.weight[task])
+
+        weights = self.weight[tasks]
+        if weight is not None:
+            weights = weights.astype(_np.result_type(weights, weight))
+            weights[context.chain[varying]] = self._get_chain_weight(
+                context, weight)
+
+        scores = _np.full(len(t0s), _np.inf)
+        candidates = _np.flatnonzero(feasible)
+        if self._cache is not None and weight is None:
+            # Оцениваются только отсутствующие в кеше расписания
+            # (совпадающие варианты - один раз)
+            keys = self._make_keys(tasks, moved_t0s[candidates])
+            keys, first, inverse = _np.unique(
+                keys, axis=0, return_index=True, return_inverse=True)
+            self._cache.hits += len(candidates) - len(keys)
+            unique_scores = self._cache.lookup(keys)
+            missing = _np.flatnonzero(_np.isnan(unique_scores))
+            unique_scores[missing] = self._measure_candidates(
+                base, tasks, weights, moved_t0s[candidates[first[missing]]])
+            self._cache.store(keys[missing], unique_scores[missing])
+            scores[candidates] = unique_scores[inverse.ravel()]
+        else:
+            scores[candidates] = self._measure_candidates(
+                base, tasks, weights, moved_t0s[candidates])
+
+        return scores
+
+    def _measure_candidates(self, base, tasks, weights, moved_t0s):
+        """
+        Расчет значений метрики для набора вариантов t0 задач
+        (блоками ограниченного размера)
+        :param base: загрузка системы без учета задач tasks
+        :param tasks: номера задач
+        :param weights: "веса" задач tasks
+        :param moved_t0s: матрица t0 (вариант x задача)
+        :return: массив значений метрики
+        """
+        scores = _np.empty(len(moved_t0s))
+        chunk_size = max(1, BATCH_SIZE // max(base.size, 1))
+        for i in range(0, len(moved_t0s), chunk_size):
+            loadings = self._make_loadings(
+                base, tasks, weights, moved_t0s[i:i + chunk_size])
+            scores[i:i + chunk_size] = self._measure_rows(loadings)
+        return scores
+
+    def select_moves(self, root, t0s, *, return_t0s=False):
+        """
+        Отбор вариантов t0 корневой задачи, дающих различные расписания
+        (с учетом ограничений и текущих t0 целевых задач; состояние
+        не изменяется)
+        :param root: позиция корневой задачи
+        :param t0s: последовательность значений t0
+        :param return_t0s: флаг возврата t0 затронутых задач для
+            отобранных значений (для evaluate_moves)
+        :return: массив позиций отобранных значений в t0s (по возрастанию;
+                 для совпадающих расписаний - первое значение, значения,
+                 при которых ограничения не могут быть выполнены,
+                 исключаются); при return_t0s - также матрица t0
+                 затронутых задач (отобранное значение x задача)
+        """
+        t0s = list(t0s)
+        moved_t0s, feasible = self._make_affected_t0s(
+            root, t0s, strict=False)
+        candidates = _np.flatnonzero(feasible)
+        if len(candidates) > 0:
+            _, first = _np.unique(
+                moved_t0s[candidates], axis=0, return_index=True)
+            candidates = candidates[_np.sort(first)]
+        if return_t0s:
+            return candidates, moved_t0s[candidates]
+        return candidates
+
+    def apply_move(self, root, t0, *, weight=None):
+        """
+        Применение изменения t0 корневой задачи
+        :param root: позиция корневой задачи
+        :param t0: новое значение t0
+        :param weight: новые "веса" задач цепочки корневой задачи
+            (по возрастанию номеров задач; None - не изменяются;
+            кеш значений метрики при изменении "весов" очищается)
+        :return: ссылка на объект вызова
+        """
+        tasks, task_t0s = self._make_moved(root, t0)
+        context = self._get_context(root)
+        self.root_start_times[root] = t0
+        self.raw_start_times[context.affected[context.chain]] = \
+            t0 + context.offsets
+
+        new_weights = None
+        if weight is not None:
+            # Задачи цепочки изменяются вместе с "весами", даже если
+            # их t0 не изменилось
+            chain = context.affected[context.chain]
+            new_t0s = self.start_times.copy()
+            new_t0s[tasks] = task_t0s
+            tasks = _np.union1d(tasks, chain)
+            task_t0s = new_t0s[tasks]
+            new_weights = self.weight[tasks].astype(
+                _np.result_type(self.weight, weight))
+            new_weights[_np.searchsorted(tasks, chain)] = \
+                self._get_chain_weight(context, weight)
+        if len(tasks) == 0:
+            return self
+
+        epochs, deltas = self._make_delta(tasks, task_t0s, new_weights)
+        if self._tracker is not None:
+            changed, delta = self._aggregate_delta(epochs, deltas)
+            self.score = self._tracker.update(self.loading, changed, delta)
+            self.loading[changed] += delta
+        else:
+            changed = _np.unique(epochs)
+            old_values = self.loading[changed]
+            _np.add.at(self.loading, epochs, deltas)
+            if self._moments is not None:
+                new_values = self.loading[changed]
+                self._s1 += int(new_values.sum() - old_values.sum())
+                self._s2 += int((new_values * new_values).sum() -
+                                (old_values * old_values).sum())
+            self.score = self.measure(self.loading)
+
+        if new_weights is not None:
+            if self.weight is self._model.weight:
+                self.weight = self.weight.astype(new_weights.dtype)
+            self.weight[tasks] = new_weights
+            if self._cache is not None:
+                self._cache.clear()
+        if self._cache is not None:
+            self._key = self._make_keys(tasks, task_t0s[None, :])[0]
+        self.start_times[tasks] = task_t0s
+        for task in tasks.tolist():
+            self._epochs.pop(task, None)
+        return self
+
+    def normalize(self):
+        """
+        Перевод t0 корневых задач в значения с учетом ограничений
+        (следующие изменения строятся от скорректированных значений)
+        :return: массив позиций корневых задач, t0 которых изменилось
+        """
+        root_start_times = self._model.get_root_start_times(self.start_times)
+        changed = _np.flatnonzero(root_start_times != self.root_start_times)
+        for root in changed.tolist():
+            self.apply_move(root, int(root_start_times[root]))
+        return changed
+
+    def _get_context(self, root):
+        """
+        Получение данных для расчета изменения t0 корневой задачи
+        (с кешированием)
+        :param root: позиция корневой задачи
+        :return: данные для расчета изменения t0
+        """
+        context = self._contexts.get(root)
+        if context is None:
+            model = self._model
+            affected = model.get_affected_tasks(root)
+            chain = model.root[affected] == root
+            plan = model.plan.subset([model.names[i] for i in affected])
+            plan_tasks = _np.array(
+                [model.index[name] for name in plan.columns],
+                dtype=_np.int64)
+            local = dict((task, j) for j, task in enumerate(affected.tolist()))
+            plan_local = _np.array(
+                [local.get(task, -1) for task in plan_tasks.tolist()],
+                dtype=_np.int64)
+            steps = _np.array(
+                [column for column, _ in plan.steps], dtype=_np.int64)
+
+            context = _MoveContext(
+                affected=affected,
+                chain=chain,
+                offsets=model.offset[affected[chain]],
+                plan=plan,
+                plan_tasks=plan_tasks,
+                plan_local=plan_local,
+                steps=steps,
+                steps_local=plan_local[steps]
+            )
+            self._contexts[root] = context
+        return context
+
+    def _make_affected_t0s(self, root, t0s, *, strict=True):
+        """
+        Расчет значений t0 затронутых задач для набора вариантов t0
+        корневой задачи (ограничения применяются ко всем вариантам сразу)
+        :param root: позиция корневой задачи
+        :param t0s: последовательность значений t0
+        :param strict: флаг генерации исключения при конфликте ограничений
+        :return: матрица t0 (вариант x затронутая задача),
+                 массив флагов выполнения ограничений
+        """
+        context = self._get_context(root)
+        t0s = _np.asarray(t0s, dtype=_np.int64)
+        affected_t0s = _np.empty(
+            (len(t0s), len(context.affected)), dtype=_np.int64)
+        affected_t0s[:, context.chain] = \
+            t0s[:, None] + context.offsets[None, :]
+        affected_t0s[:, ~context.chain] = \
+            self.raw_start_times[context.affected[~context.chain]]
+
+        if len(context.steps) == 0:
+            return affected_t0s, _np.ones(len(t0s), dtype=bool)
+
+        internal = context.plan_local >= 0
+        plan_t0s = _np.empty(
+            (len(t0s), len(context.plan_tasks)), dtype=_np.int64)
+        plan_t0s[:, internal] = affected_t0s[:, context.plan_local[internal]]
+        plan_t0s[:, ~internal] = \
+            self.start_times[context.plan_tasks[~internal]]
+        feasible = context.plan.apply(plan_t0s, strict=strict)
+        affected_t0s[:, context.steps_local] = plan_t0s[:, context.steps]
+
+        return affected_t0s, feasible
+
+    def _make_moved(self, root, t0):
+        """
+        Расчет новых значений t0 затронутых задач
+        :param root: позиция корневой задачи
+        :param t0: новое значение t0
+        :return: массив номеров задач, t0 которых изменилось,
+                 и массив их новых t0
+        """
+        affected = self._get_context(root).affected
+        affected_t0s = self._make_affected_t0s(root, [t0])[0][0]
+        moved = affected_t0s != self.start_times[affected]
+        return affected[moved], affected_t0s[moved]
+
+    @staticmethod
+    def _get_chain_weight(context, weight):
+        """
+        Упорядочение "весов" задач цепочки по затронутым задачам
+        :param context: данные для расчета изменения t0
+        :param weight: "веса" задач цепочки (по возрастанию номеров задач)
+        :return: "веса" задач цепочки (в порядке context.affected)
+        """
+        weight = _np.asarray(weight)
+        chain = context.affected[context.chain]
+        return weight[_np.argsort(_np.argsort(chain))]
+
+    def _make_keys(self, tasks, moved_t0s):
+        """
+        Расчет ключей кеша для вариантов t0 задач
+        :param tasks: массив номеров задач
+        :param moved_t0s: матрица t0 (вариант x задача)
+        :return: матрица ключей (вариант x 2)
+        """
+        base = self._key - ScoreCache.make_keys(
+            tasks, self.start_times[tasks])
+        return ScoreCache.make_keys(tasks, moved_t0s) + base
+
+    def _make_loadings(self, base, tasks, weights, moved_t0s):
+        """
+        Формирование загрузок системы для набора вариантов t0
+        :param base: загрузка системы без учета задач tasks
+        :param tasks: номера задач
+        :param weights: "веса" задач tasks
+        :param moved_t0s: матрица t0 (вариант x задача)
+        :return: матрица загрузок (вариант x эпоха [x ресурс])
+        """
+        model = self._model
+        n_rows, t_max = len(moved_t0s), len(base)
+        indices = list()
+        epoch_weights = list()
+        for j, task in enumerate(tasks.tolist()):
+            epochs, counts = batch_launch_epochs(
+                moved_t0s[:, j], model.frequency[task], model.span[task],
+                t_max
+            )
+            rows = _np.repeat(_np.arange(n_rows, dtype=_np.int64), counts)
+            indices.append(rows * t_max + epochs)
+            weight = weights[j]
+            epoch_weights.append(_np.full(
+                (len(epochs),) + weight.shape, weight, dtype=float))
+
+        loadings = _np.repeat(base[None], n_rows, axis=0)
+        if len(indices) > 0:
+            delta = weighted_bincount(
+                _np.concatenate(indices), _np.concatenate(epoch_weights),
+                n_rows * t_max
+            ).reshape(loadings.shape)
+            if loadings.dtype.kind in 'iu':
+                delta = _np.rint(delta)
+            loadings += delta.astype(loadings.dtype)
+        return loadings
+
+    def _measure_rows(self, loadings):
+        """
+        Расчет значений метрики для каждой строки матрицы загрузок
+        :param loadings: матрица загрузок (вариант x эпоха [x ресурс])
+        :return: массив значений метрики
+        """
+        if self._moments is not None:
+            s1 = loadings.sum(axis=1)
+            s2 = (loadings * loadings).sum(axis=1)
+            return _np.array([
+                self._moments(int(a), int(b), loadings.shape[1])
+                for a, b in zip(s1, s2)
+            ], dtype=float)
+
+        try:
+            scores = _np.asarray(self._metric(loadings, axis=1), dtype=float)
+            if scores.shape == (len(loadings),):
+                return scores
+        except TypeError:
+            pass
+        return _np.array([self._metric(row) for row in loadings], dtype=float)
+
+    def _make_delta(self, tasks, task_t0s, new_weights=None):
+        """
+        Формирование изменения загрузки системы
+        :param tasks: массив номеров задач, t0 которых изменилось
+        :param task_t0s: массив новых t0 задач
+        :param new_weights: новые "веса" задач (None - не изменяются)
+        :return: массивы эпох и соответствующих изменений загрузки
+        """
+        model = self._model
+        if new_weights is None:
+            new_weights = self.weight[tasks]
+        epochs = list()
+        deltas = list()
+        for j, (task, task_t0) in enumerate(
+                zip(tasks.tolist(), task_t0s.tolist())):
+            weight, new_weight = self.weight[task], new_weights[j]
+            old_epochs = self._get_epochs(task)
+            new_epochs = launch_epochs(
+                task_t0, int(model.frequency[task]), int(model.span[task]),
+                self._t_max
+            )
+            epochs.extend((old_epochs, new_epochs))
+            deltas.extend((
+                _np.full((len(old_epochs),) + weight.shape, -weight,
+                         dtype=self.loading.dtype),
+                _np.full((len(new_epochs),) + weight.shape, new_weight,
+                         dtype=self.loading.dtype),
+            ))
+
+        return _np.concatenate(epochs), _np.concatenate(deltas)
+
+    def _aggregate_delta(self, epochs, deltas):
+        """
+        Суммирование изменений загрузки по эпохам
+        :param epochs: массив эпох (возможны повторы)
+        :param deltas: массив изменений загрузки
+        :return: массив эпох (без повторов), массив изменений загрузки
+        """
+        changed, inverse = _np.unique(epochs, return_inverse=True)
+        delta = _np.zeros(
+            (len(changed),) + self.loading.shape[1:], dtype=self.loading.dtype)
+        _np.add.at(delta, inverse, deltas)
+        return changed, delta
+
+    def _get_epochs(self, task):
+        """
+        Получение эпох активности задачи при текущем t0 (с кешированием)
+        :param task: номер задачи
+        :return: массив эпох
+        """
+        epochs = self._epochs.get(task)
+        if epochs is None:
+            model = self._model
+            epochs = launch_epochs(
+                int(self.start_times[task]), int(model.frequency[task]),
+                int(model.span[task]), self._t_max
+            )
+            self._epochs[task] = epochs
+        return epochs
@@ -0,0 +1,511 @@
+"""
+Точный алгоритм оптимизации (целочисленное линейное программирование)
+"""
+
+
+# =============================================================================
+
+
+import math
+from collections import namedtuple
+import numpy as _np
+from taskdisttools.constraint import DelayConstraint, PriorityConstraint
+from taskdisttools.utils import batch_launch_epochs
+from .optimizer import Optimizer
+
+try:
+    import pulp as _pulp
+except ImportError:
+    _pulp = None
+
+try:
+    from ortools.linear_solver import pywraplp as _pywraplp
+except ImportError:
+    _pywraplp = None
+
+
+# =============================================================================
+
+
+__all__ = [
+    'ExactOptimizer',
+]
+
+
+# =============================================================================
+
+
+# Задача ЦЛП: переменные [0, n_binary) - двоичные, остальные - вещественные;
+# строки - тройки (номера переменных, коэффициенты, (нижняя, верхняя)
+# границы)
+_Problem = namedtuple(
+    '_Problem', 'n_binary lower upper objective rows')
+
+# Результат решения задачи ЦЛП
+_Solution = namedtuple(
+    '_Solution', 'status values objective bound')
+
+
+def _solve_pulp(problem, time_limit):
+    """
+    Решение задачи ЦЛП с помощью PuLP (CBC)
+    :param problem: задача ЦЛП
+    :param time_limit: ограничение времени решения, с (None - нет)
+    :return: результат решения
+    """
+    lp = _pulp.LpProblem('taskdisttools', _pulp.LpMinimize)
+    variables = [
+        _pulp.LpVariable(
+            f'x{i}',
+            lowBound=None if math.isinf(lo) else lo,
+            upBound=None if math.isinf(hi) else hi,
+            cat='Binary' if i < problem.n_binary else 'Continuous'
+        )
+        for i, (lo, hi) in enumerate(zip(problem.lower, problem.upper))
+    ]
+    lp += _pulp.LpAffineExpression(
+        (variables[i], c) for i, c in enumerate(problem.objective) if c != 0)
+    for indices, coefs, (lo, hi) in problem.rows:
+        expr = _pulp.LpAffineExpression(
+            (variables[i], c)
+            for i, c in zip(indices.tolist(), coefs.tolist())
+        )
+        if lo == hi:
+            lp += expr == lo
+            continue
+        if not math.isinf(lo):
+            lp += expr >= lo
+        if not math.isinf(hi):
+            lp += expr <= hi
+
+    lp.solve(_pulp.PULP_CBC_CMD(msg=False, timeLimit=time_limit))
+    status = {
+        _pulp.LpSolutionOptimal: 'optimal',
+        _pulp.LpSolutionIntegerFeasible: 'feasible',
+        _pulp.LpSolutionInfeasible: 'infeasible',
+    }.get(lp.sol_status, 'not solved')
+    if status not in ('optimal', 'feasible'):
+        return _Solution(status, None, None, None)
+
+    values = _np.array([v.varValue or 0. for v in variables])
+    objective = _pulp.value(lp.objective)
+    if status == 'optimal':
+        return _Solution(status, values, objective, objective)
+
+    # CBC через PuLP не сообщает нижнюю оценку - используется оценка
+    # по линейной релаксации
+    lp.solve(_pulp.PULP_CBC_CMD(msg=False, mip=False))
+    bound = None
+    if lp.status == _pulp.LpStatusOptimal:
+        bound = _pulp.value(lp.objective)
+    return _Solution(status, values, objective, bound)
+
+
+def _solve_ortools(problem, time_limit):
+    """
+    Решение задачи ЦЛП с помощью OR-Tools (SCIP или CBC)
+    :param problem: задача ЦЛП
+    :param time_limit: ограничение времени решения, с (None - нет)
+    :return: результат решения
+    """
+    solver = _pywraplp.Solver.CreateSolver('SCIP') or \
+        _pywraplp.Solver.CreateSolver('CBC')
+    if solver is None:
+        raise RuntimeError('OR-Tools has no MILP solver available')
+
+    infinity = solver.infinity()
+    variables = list()
+    for i, (lo, hi) in enumerate(zip(problem.lower, problem.upper)):
+        lo = -infinity if math.isinf(lo) else lo
+        hi = infinity if math.isinf(hi) else hi
+        if i < problem.n_binary:
+            variables.append(solver.IntVar(lo, hi, f'x{i}'))
+        else:
+            variables.append(solver.NumVar(lo, hi, f'x{i}'))
+
+    objective = solver.Objective()
+    for i, c in enumerate(problem.objective):
+        if c != 0:
+            objective.SetCoefficient(variables[i], float(c))
+    objective.SetMinimization()
+
+    for indices, coefs, (lo, hi) in problem.rows:
+        row = solver.RowConstraint(
+            -infinity if math.isinf(lo) else lo,
+            infinity if math.isinf(hi) else hi, ''
+        )
+        for i, c in zip(indices.tolist(), coefs.tolist()):
+            row.SetCoefficient(variables[i], c)
+
+    if time_limit is not None:
+        solver.SetTimeLimit(int(time_limit * 1000))
+    status = {
+        _pywraplp.Solver.OPTIMAL: 'optimal',
+        _pywraplp.Solver.FEASIBLE: 'feasible',
+        _pywraplp.Solver.INFEASIBLE: 'infeasible',
+    }.get(solver.Solve(), 'not solved')
+    if status not in ('optimal', 'feasible'):
+        return _Solution(status, None, None, None)
+
+    values = _np.array([v.solution_value() for v in variables])
+    return _Solution(
+        status, values, objective.Value(),
+        objective.Value() if status == 'optimal' else objective.BestBound()
+    )
+
+
+# Доступные решатели в порядке предпочтения
+# (OR-Tools сообщает нижнюю оценку решателя, поэтому он предпочтительнее)
+_BACKENDS = {
+    'ortools': (_solve_ortools, _pywraplp is not None),
+    'pulp': (_solve_pulp, _pulp is not None),
+}
+
+
+# =============================================================================
+
+
+class ExactOptimizer(Optimizer):
+    """
+    Точный алгоритм оптимизации (целочисленное линейное программирование)
+     - двоичная переменная для каждого варианта t0 корневой задачи
+       в пределах окна [t0_min, t0_max]; ограничения внутри цепочки
+       задач применяются заранее, варианты с одинаковыми t0 задач
+       цепочки объединяются
+     - относительные ограничения между цепочками (DelayConstraint,
+       PriorityConstraint) задаются линейными неравенствами и должны
+       выполняться без коррекции t0
+     - целевая функция: пиковая загрузка ('peak') или среднее абсолютное
+       отклонение загрузки от среднего значения ('spread')
+     - требуется PuLP или OR-Tools; если ни один из них не установлен,
+       используется запасной оптимизатор (если задан)
+    """
+
+    def __init__(self, metric, *, objective='peak', backend=None,
+                 time_limit=None, fallback=None, instrumentation=None,
+                 periodic=False):
+        """
+        Инициализация
+        :param metric: оптимизируемая метрика (для оценки результата)
+        :param objective: целевая функция задачи ЦЛП ('peak' или 'spread')
+        :param backend: решатель ('ortools', 'pulp' или None - первый
+            доступный)
+        :param time_limit: ограничение времени решения, с (None - нет)
+        :param fallback: оптимизатор, используемый при отсутствии
+            решателя (None - генерировать исключение)
+        :param instrumentation: сбор статистики работы
+            (None - статистика не собирается)
+        :param periodic: флаг расчета метрики результатов по гиперпериоду
+            расписания
+        """
+        assert objective in ('peak', 'spread')
+        assert backend is None or backend in _BACKENDS
+        assert fallback is None or isinstance(fallback, Optimizer)
+        super().__init__(metric, instrumentation=instrumentation,
+                         periodic=periodic)
+        self._objective = objective
+        self._backend = backend
+        self._time_limit = time_limit
+        self._fallback = fallback
+        self.status_ = None  # статус решения
+        self.objective_ = None  # значение целевой функции
+        self.bound_ = None  # нижняя оценка целевой функции
+        self.gap_ = None  # относительный разрыв до нижней оценки
+
+    def get_objective(self, loading):
+        """
+        Расчет значения целевой функции задачи ЦЛП
+        :param loading: массив уровней загрузки системы
+        :return: значение целевой функции
+        """
+        loading = _np.asarray(loading, dtype=float)
+        if self._objective == 'peak':
+            return float(loading.max())
+        return float(_np.abs(loading - loading.mean()).mean())
+
+    def get_gap(self, results):
+        """
+        Расчет относительного разрыва между значением целевой функции
+        для результатов оптимизации (в т.ч. другого оптимизатора)
+        и нижней оценкой, полученной при последней оптимизации
+        :param results: результаты оптимизации
+        :return: относительный разрыв (None если оценка не получена)
+        """
+        if self.bound_ is None:
+            return None
+        objective = self.get_objective(results.loading)
+        if objective == self.bound_:
+            return 0.
+        return (objective - self.bound_) / max(abs(objective), 1e-12)
+
+    def _do_optimize(self, model, t_max):
+        """
+        Непосредственно оптимизация
+        :param model: компактная модель набора задач
+        :param t_max: максимальная эпоха моделирования
+        """
+        self.status_ = self.objective_ = self.bound_ = self.gap_ = None
+        if model.weight.ndim > 1:
+            raise RuntimeError(
+                'Exact optimization of multi-resource loading '
+                'is not supported')
+        solve = self._get_solver()
+        if solve is None:
+            if self._fallback is None:
+                raise RuntimeError(
+                    'No MILP solver available (install pulp or ortools)')
+            self._fallback.results_ = self.results_
+            self._fallback._do_optimize(model, t_max)
+            self.results_ = self._fallback.results_
+            self.status_ = 'fallback'
+            return
+
+        with self._timer('candidates'):
+            candidates = [
+                self._make_candidates(model, root, t_max)
+                for root in range(len(model.root_ids))
+            ]
+        for root, (root_t0s, _, _, _) in enumerate(candidates):
+            if len(root_t0s) == 0:
+                raise RuntimeError(
+                    'Constraints conflict on task '
+                    f'"{model.names[model.root_ids[root]]}"')
+
+        with self._timer('problem'):
+            problem = self._make_problem(model, candidates, t_max)
+        with self._timer('solve'):
+            solution = solve(problem, self._time_limit)
+        self.status_ = solution.status
+        if solution.values is None:
+            return
+
+        root_start_times = list()
+        offset = 0
+        for root_t0s, _, _, _ in candidates:
+            values = solution.values[offset:offset + len(root_t0s)]
+            root_start_times.append(root_t0s[int(_np.argmax(values))])
+            offset += len(root_t0s)
+
+        self.results_ = self._evaluate(
+            _np.array(root_start_times, dtype=_np.int64), model, t_max)
+        self.objective_ = self.get_objective(self.results_.loading)
+        self.bound_ = solution.bound
+        self.gap_ = self.get_gap(self.results_)
+
+    def _get_solver(self):
+        """
+        Выбор решателя задачи ЦЛП
+        :return: функция решения (None если решатель недоступен)
+        """
+        if self._backend is not None:
+            solve, available = _BACKENDS[self._backend]
+            return solve if available else None
+        for solve, available in _BACKENDS.values():
+            if available:
+                return solve
+        return None
+
+    @staticmethod
+    def _make_candidates(model, root, t_max):
+        """
+        Формирование вариантов t0 корневой задачи (ограничения внутри
+        цепочки применяются так же, как при расчете расписания)
+        :param model: компактная модель набора задач
+        :param root: позиция корневой задачи
+        :param t_max: максимальная эпоха моделирования
+        :return: массив t0 корневой задачи, номера задач цепочки,
+                 матрица t0 задач цепочки (вариант x задача),
+                 список относительных ограничений между цепочками
+                 (задача, ограничение, цель, t0 задачи на момент
+                 применения ограничения)
+        """
+        root_t0s = _np.array(
+            model.get_start_times(root, t_max), dtype=_np.int64)
+        chain = _np.flatnonzero(model.root == root)
+        local = dict((task, j) for j, task in enumerate(chain.tolist()))
+        start_times = root_t0s[:, None] + model.offset[chain][None, :]
+
+        feasible = _np.ones(len(root_t0s), dtype=bool)
+        external = list()
+        for task, cnts in model.plan.steps:
+            if task not in local:
+                continue
+            t0 = start_times[:, local[task]]
+            for cnt, target in cnts:
+                if target is None:
+                    t0 = cnt.apply_array(t0)
+                elif target in local:
+                    t0 = cnt.apply_array(t0, start_times[:, local[target]])
+                else:
+                    # Ограничение между цепочками не должно требовать
+                    # коррекции t0 (задается линейными неравенствами)
+                    external.append((task, cnt, target, t0))
+            start_times[:, local[task]] = t0
+            for cnt, target in cnts:
+                if target is None:
+                    feasible &= cnt.test_array(t0)
+                elif target in local:
+                    feasible &= cnt.test_array(
+                        t0, start_times[:, local[target]])
+
+        _, unique = _np.unique(
+            start_times[feasible], axis=0, return_index=True)
+        unique = _np.flatnonzero(feasible)[_np.sort(unique)]
+        external = [
+            (task, cnt, target, t0[unique])
+            for task, cnt, target, t0 in external
+        ]
+        return root_t0s[unique], chain, start_times[unique], external
+
+    def _make_problem(self, model, candidates, t_max):
+        """
+        Формирование задачи ЦЛП
+        :param model: компактная модель набора задач
+        :param candidates: варианты t0 корневых задач
+        :param t_max: максимальная эпоха моделирования
+        :return: задача ЦЛП
+        """
+        n_binary = sum(len(candidate[0]) for candidate in candidates)
+        rows = list()
+        task_t0s = dict()
+        external = list()
+        loadings = list()
+        offset = 0
+        for root_t0s, chain, start_times, root_external in candidates:
+            n_rows = len(root_t0s)
+            variables = _np.arange(offset, offset + n_rows)
+            rows.append((variables, _np.ones(n_rows), (1., 1.)))
+            for j, task in enumerate(chain.tolist()):
+                task_t0s[task] = (variables, start_times[:, j])
+            external.extend(
+                (task, variables, cnt, target, t0)
+                for task, cnt, target, t0 in root_external
+            )
+            chain_vars, epochs, coefs = self._make_loadings(
+                model, chain, start_times, t_max)
+            loadings.append((chain_vars + offset, epochs, coefs))
+            offset += n_rows
+
+        rows.extend(self._make_relative_rows(external, task_t0s))
+
+        # Загрузка на каждую эпоху: sum(L[v, t] * x[v]) (по ненулевым L)
+        variables, epochs, coefs = (
+            _np.concatenate(items) for items in zip(*loadings))
+        order = _np.argsort(epochs, kind='stable')
+        variables, epochs, coefs = \
+            variables[order], epochs[order], coefs[order]
+        bounds = _np.searchsorted(epochs, _np.arange(t_max + 1))
+
+        lower, upper = [0.] * n_binary, [1.] * n_binary
+        if self._objective == 'peak':
+            # z >= загрузка на каждую эпоху, минимизация z
+            z = n_binary
+            lower.append(-math.inf)
+            upper.append(math.inf)
+            objective = _np.zeros(n_binary + 1)
+            objective[z] = 1.
+            for t in range(t_max):
+                lo, hi = bounds[t], bounds[t + 1]
+                rows.append((
+                    _np.append(variables[lo:hi], z),
+                    _np.append(coefs[lo:hi], -1.),
+                    (-math.inf, 0.)
+                ))
+        else:
+            # загрузка - m = u - v, m - средняя загрузка,
+            # минимизация sum(u + v) / t_max
+            m = n_binary
+            n_vars = n_binary + 1 + 2 * t_max
+            lower.extend([-math.inf] + [0.] * (2 * t_max))
+            upper.extend([math.inf] * (1 + 2 * t_max))
+            objective = _np.zeros(n_vars)
+            objective[m + 1:] = 1. / t_max
+            rows.append((
+                _np.append(_np.arange(n_binary), m),
+                _np.append(
+                    _np.bincount(variables, coefs, n_binary) / t_max, -1.),
+                (0., 0.)
+            ))
+            for t in range(t_max):
+                lo, hi = bounds[t], bounds[t + 1]
+                rows.append((
+                    _np.concatenate(
+                        (variables[lo:hi], [m, m + 1 + t, m + 1 + t_max + t])),
+                    _np.concatenate((coefs[lo:hi], [-1., -1., 1.])),
+                    (0., 0.)
+                ))
+
+        return _Problem(
+            n_binary=n_binary, lower=lower, upper=upper,
+            objective=objective, rows=rows
+        )
+
+    @staticmethod
+    def _make_loadings(model, chain, start_times, t_max):
+        """
+        Формирование загрузок системы задачами цепочки для вариантов t0
+        :param model: компактная модель набора задач
+        :param chain: номера задач цепочки
+        :param start_times: матрица t0 задач цепочки (вариант x задача)
+        :param t_max: максимальная эпоха моделирования
+        :return: ненулевые элементы матрицы загрузок (вариант x эпоха):
+                 массивы номеров вариантов, эпох и значений (по строкам;
+                 плотная матрица не формируется)
+        """
+        n_rows = len(start_times)
+        indices = list()
+        weights = list()
+        for j, task in enumerate(chain.tolist()):
+            epochs, counts = batch_launch_epochs(
+                start_times[:, j], model.frequency[task], model.span[task],
+                t_max
+            )
+            rows = _np.repeat(_np.arange(n_rows, dtype=_np.int64), counts)
+            indices.append(rows * t_max + epochs)
+            weights.append(
+                _np.full(len(epochs), model.weight[task], dtype=float))
+
+        indices, inverse = _np.unique(
+            _np.concatenate(indices), return_inverse=True)
+        values = _np.bincount(
+            inverse.ravel(), _np.concatenate(weights), len(indices))
+        nonzero = values != 0
+        indices = indices[nonzero]
+        return indices // t_max, indices % t_max, values[nonzero]
+
+    @staticmethod
+    def _make_relative_rows(external, task_t0s):
+        """
+        Формирование строк задачи ЦЛП для относительных ограничений
+        между задачами разных цепочек (ограничение должно выполняться
+        как для t0 на момент его применения, так и для итогового t0)
+        :param external: список относительных ограничений между цепочками
+            (задача, номера переменных, ограничение, цель, t0 задачи
+            на момент применения ограничения)
+        :param task_t0s: словарь (номер задачи -> номера переменных
+            и соответствующие им итоговые t0 задачи)
+        :return: список строк задачи ЦЛП
+        """
+        rows = list()
+        for task, variables, cnt, target, t0 in external:
+            if isinstance(cnt, PriorityConstraint):
+                lo, hi = 0, cnt.max_delay
+            elif isinstance(cnt, DelayConstraint):
+                lo, hi = -cnt.max_delay, cnt.max_delay
+            else:
+                raise RuntimeError(
+                    f'Constraint {type(cnt).__name__} is not supported '
+                    'by ExactOptimizer')
+
+            target_variables, target_t0 = task_t0s[target]
+            final_t0 = task_t0s[task][1]
+            for values in (t0, final_t0):
+                # t0(задача) - t0(цель) в пределах [lo, hi]
+                rows.append((
+                    _np.concatenate((variables, target_variables)),
+                    _np.concatenate((values, -target_t0)).astype(float),
+                    (float(lo), float(hi))
+                ))
+                if _np.array_equal(values, final_t0):
+                    break
+        return rows
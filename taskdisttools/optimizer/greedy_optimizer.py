@@ -6,9 +6,15 @@
 # =============================================================================
 
 
+import os
 import copy
 import random
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import numpy as _np
 from .optimizer import Optimizer
+from .evaluator import IncrementalEvaluator
+from .instrumentation import Instrumentation
 
 
 # =============================================================================
@@ -22,62 +28,225 @@ __all__ = [
 # =============================================================================
 
 
+_logger = logging.getLogger(__name__)
+
+# Состояние процесса-исполнителя (передается один раз при его запуске)
+_worker_state = None
+
+
+def _init_worker(optimizer, model, t_max, instrumented):
+    """
+    Инициализация процесса-исполнителя
+    :param optimizer: оптимизатор (с базовым расписанием)
+    :param model: компактная модель набора задач
+    :param t_max: максимальная эпоха моделирования
+    :param instrumented: флаг сбора статистики
+    """
+    global _worker_state
+    _worker_state = (optimizer, model, t_max, instrumented)
+
+
+def _run_iteration(seed):
+    """
+    Итерация оптимизации в процессе-исполнителе
+    :param seed: начальное значение ДСЧ итерации
+    :return: результаты итерации, статистика итерации
+             (None, если статистика не собирается)
+    """
+    optimizer, model, t_max, instrumented = _worker_state
+    if not instrumented:
+        return optimizer._next_iter(model, t_max, random.Random(seed)), None
+
+    # Статистика собирается отдельно для каждой итерации (события
+    # исполнителя подписчикам не передаются)
+    optimizer.instrumentation = Instrumentation()
+    cache = optimizer.cache_
+    hits, misses = (cache.hits, cache.misses) if cache is not None \
+        else (0, 0)
+    results = optimizer._next_iter(model, t_max, random.Random(seed))
+    if cache is not None:
+        optimizer.instrumentation.count('cache_hits', cache.hits - hits)
+        optimizer.instrumentation.count(
+            'cache_misses', cache.misses - misses)
+    return results, optimizer.instrumentation.to_dict()
+
+
+# =============================================================================
+
+
 class GreedyOptimizer(Optimizer):
     """'Жадный' алгоритм оптимизации"""
 
-    def __init__(self, metric, *, n_iterations=10, random_state=None):
+    def __init__(self, metric, *, n_iterations=10, random_state=None,
+                 n_jobs=1, cache_memory=64 * 2 ** 20, instrumentation=None,
+                 periodic=False):
         """
         Инициализация
         :param metric: оптимизируемая метрика
         :param n_iterations: кол-во итераций
         :param random_state: состояние ДСЧ
+        :param n_jobs: кол-во параллельных процессов
+            (None или -1 - по кол-ву ядер; при n_jobs != 1
+            метрика должна поддерживать pickle)
+        :param cache_memory: предельный объем памяти кеша значений
+            метрики, байт (None или 0 - без кеширования; при n_jobs != 1
+            у каждого процесса собственный кеш)
+        :param instrumentation: сбор статистики работы (None - статистика
+            не собирается; при n_jobs != 1 события оценок в процессах
+            не передаются, счетчики и время этапов суммируются)
+        :param periodic: флаг расчета метрики результатов по гиперпериоду
+            расписания
         """
-        super().__init__(metric)
+        super().__init__(metric, cache_memory=cache_memory,
+                         instrumentation=instrumentation, periodic=periodic)
         self._n_iterations = n_iterations
         self._random_state = random_state
+        self._n_jobs = n_jobs
 
-    def _do_optimize(self, task_manager, t_max):
+    def _do_optimize(self, model, t_max):
         """
         Непосредственно оптимизация
-        :param task_manager: менеджер задач
+        :param model: компактная модель набора задач
         :param t_max: максимальная эпоха моделирования
         """
-        print('Greedy optimization begin')
-        print('=========================')
-
-        if self._random_state is not None:
-            random.seed(self._random_state)
+        instrumentation = self.instrumentation
         opt_results = None
-
-        for i in range(self._n_iterations):
-            results = self._next_iter(task_manager, t_max)
-            print(f'Iteration: {i + 1}, score: {results.score}')
-            if opt_results is None or results.score < opt_results.score:
-                print(' >>> new best score!')
+        iterations = self._run_iterations(model, t_max)
+        for i, (results, stats) in enumerate(iterations):
+            is_best = opt_results is None or \
+                results.score < opt_results.score
+            if is_best:
                 opt_results = results
+            _logger.info('Iteration: %d, score: %s%s', i + 1, results.score,
+                         ' (new best score)' if is_best else '')
+            if instrumentation is not None:
+                if stats is not None:
+                    instrumentation.merge(stats)
+                instrumentation.count('iterations')
+                instrumentation.emit(
+                    'iteration', iteration=i + 1, score=results.score,
+                    best_score=opt_results.score, is_best=is_best
+                )
 
         self.results_ = opt_results
 
-    def _next_iter(self, task_manager, t_max):
+    def _run_iterations(self, model, t_max):
+        """
+        Выполнение итераций (последовательно или в пуле процессов)
+        :param model: компактная модель набора задач
+        :param t_max: максимальная эпоха моделирования
+        :return: генератор результатов итераций (в порядке их номеров)
+                 и статистики итераций процессов-исполнителей
+        """
+        # Каждая итерация использует собственный ДСЧ, поэтому результат
+        # не зависит от кол-ва процессов
+        rng = random.Random(self._random_state)
+        seeds = [rng.getrandbits(64) for _ in range(self._n_iterations)]
+
+        n_jobs = self._n_jobs
+        if n_jobs is None or n_jobs < 0:
+            n_jobs = os.cpu_count() or 1
+        n_jobs = min(n_jobs, len(seeds))
+
+        if n_jobs <= 1:
+            for seed in seeds:
+                yield self._next_iter(
+                    model, t_max, random.Random(seed)), None
+            return
+
+        with ProcessPoolExecutor(
+                max_workers=n_jobs, initializer=_init_worker,
+                initargs=(self, model, t_max,
+                          self.instrumentation is not None)) as executor:
+            yield from executor.map(_run_iteration, seeds)
+
+    def _next_iter(self, model, t_max, rng):
         """
         Итерация оптимизации
-        :param task_manager: менеджер задач
+        :param model: компактная модель набора задач
         :param t_max: максимальная эпоха моделирования
+        :param rng: ДСЧ итерации
         """
-        available_tasks = list(task_manager.root_tasks.keys())[1:]
-        opt_results = copy.deepcopy(self.results_)
+        instrumentation = self.instrumentation
+        available_tasks = list(range(1, len(model.root_ids)))
+        evaluator = IncrementalEvaluator(
+            model, self._metric, t_max,
+            model.get_root_start_times(
+                self.results_.start_times_array, raw=True),
+            cache=self.cache_
+        )
+        opt_score = evaluator.measure(self.results_.loading)
+        opt_root_start_times = None
 
         while len(available_tasks) > 0:
-            i = random.randint(0, len(available_tasks) - 1)
+            i = rng.randint(0, len(available_tasks) - 1)
             cur_task = available_tasks[i]
 
-            for t0 in task_manager.get_start_times(cur_task, t_max):
-                sts = copy.deepcopy(opt_results.start_times)
-                sts[cur_task] = t0
-                results = self._evaluate(sts, task_manager, t_max)
-                if results.score < opt_results.score:
-                    opt_results = results
+            # Оцениваются только t0, дающие различные допустимые расписания
+            # (остальные не могут улучшить метрику строго)
+            t0s = list(model.get_start_times(cur_task, t_max))
+            while len(t0s) > 0:
+                with self._timer('select'):
+                    positions, moved_t0s = evaluator.select_moves(
+                        cur_task, t0s, return_t0s=True)
+                    positions = positions.tolist()
+                with self._timer('evaluate'):
+                    # Ограничения уже применены при отборе
+                    scores = evaluator.evaluate_moves(
+                        cur_task, [t0s[j] for j in positions],
+                        moved_t0s=moved_t0s)
+                if instrumentation is not None:
+                    self._count_moves(cur_task, t0s, positions, scores)
+                rest = list()
+                for j, score in zip(positions, scores):
+                    if score < opt_score:
+                        opt_score = score
+                        with self._timer('apply'):
+                            evaluator.apply_move(cur_task, t0s[j])
+                            opt_root_start_times = \
+                                evaluator.root_start_times.copy()
+                            renormalized = self._normalize(
+                                model, evaluator, cur_task)
+                        if instrumentation is not None:
+                            instrumentation.count('accepted')
+                        if renormalized:
+                            # Отбор и оценки оставшихся t0 требуют
+                            # пересчета
+                            rest = t0s[j + 1:]
+                            break
+                t0s = rest
 
             del available_tasks[i]
 
-        return opt_results
+        if opt_root_start_times is None:
+            with self._timer('copy'):
+                return copy.deepcopy(self.results_)
+        return self._evaluate(opt_root_start_times, model, t_max)
+
+    def _count_moves(self, cur_task, t0s, positions, scores):
+        """
+        Учет оценок t0 корневой задачи в статистике
+        :param cur_task: позиция корневой задачи
+        :param t0s: список рассмотренных t0
+        :param positions: позиции оцененных t0
+        :param scores: значения метрики для оцененных t0
+        """
+        self.instrumentation.count('evaluations', len(positions))
+        self.instrumentation.count('rejected', len(t0s) - len(positions))
+        self.instrumentation.emit(
+            'evaluation', root=cur_task, n_candidates=len(t0s),
+            n_evaluated=len(positions),
+            best_score=min(scores) if len(positions) > 0 else None
+        )
+
+    @staticmethod
+    def _normalize(model, evaluator, cur_task):
+        """
+        Перевод состояния в t0 корневых задач с учетом ограничений
+        (следующие кандидаты строятся от скорректированных значений)
+        :param model: компактная модель набора задач
+        :param evaluator: инкрементальный расчет параметров расписания
+        :param cur_task: позиция текущей корневой задачи
+        :return: True если изменилось t0 других корневых задач, иначе False
+        """
+        return bool(_np.any(evaluator.normalize() != cur_task))
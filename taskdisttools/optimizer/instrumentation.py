@@ -0,0 +1,144 @@
+"""
+Сбор статистики работы алгоритма оптимизации
+"""
+
+
+# =============================================================================
+
+
+import json
+import time
+import logging
+import contextlib
+
+
+# =============================================================================
+
+
+__all__ = [
+    'Instrumentation',
+    'LoggingCallback',
+]
+
+
+# =============================================================================
+
+
+class Instrumentation(object):
+    """
+    Сбор статистики работы алгоритма оптимизации
+     - счетчики (count), суммарное время этапов (timer, add_time)
+       и события (emit), передаваемые подписчикам - функциям
+       (событие, словарь данных)
+     - to_dict() - статистика в виде словаря (для структурированного
+       журнала); merge() добавляет статистику другого объекта (например,
+       процесса-исполнителя)
+     - если объект не задан (Optimizer.instrumentation is None),
+       статистика не собирается
+    """
+
+    def __init__(self, *callbacks):
+        """
+        Инициализация
+        :param callbacks: подписчики событий
+        """
+        self.counters = dict()
+        self.timers = dict()
+        self.callbacks = list(callbacks)
+
+    def reset(self):
+        """
+        Сброс счетчиков и времени этапов
+        :return: ссылка на объект вызова
+        """
+        self.counters = dict()
+        self.timers = dict()
+        return self
+
+    def count(self, name, value=1):
+        """
+        Увеличение счетчика
+        :param name: название счетчика
+        :param value: приращение
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_time(self, name, seconds):
+        """
+        Учет времени выполнения этапа
+        :param name: название этапа
+        :param seconds: время выполнения, с
+        """
+        self.timers[name] = self.timers.get(name, 0.) + seconds
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        """
+        Учет времени выполнения блока кода (with instrumentation.timer(...))
+        :param name: название этапа
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def emit(self, event, **data):
+        """
+        Передача события подписчикам
+        :param event: название события
+        :param data: данные события
+        """
+        for callback in self.callbacks:
+            callback(event, data)
+
+    def merge(self, stats):
+        """
+        Добавление статистики
+        :param stats: словарь статистики (см. to_dict)
+        :return: ссылка на объект вызова
+        """
+        for name, value in stats['counters'].items():
+            self.count(name, value)
+        for name, seconds in stats['timers'].items():
+            self.add_time(name, seconds)
+        return self
+
+    def to_dict(self):
+        """
+        Получение статистики
+        :return: словарь статистики (счетчики, время этапов, с)
+        """
+        return {
+            'counters': dict(self.counters),
+            'timers': dict(self.timers),
+        }
+
+
+# =============================================================================
+
+
+class LoggingCallback(object):
+    """
+    Подписчик событий, записывающий их в журнал (logging)
+    в виде 'событие {данные в формате JSON}'
+    """
+
+    def __init__(self, logger=None, level=logging.INFO):
+        """
+        Инициализация
+        :param logger: журнал (None - журнал пакета taskdisttools)
+        :param level: уровень сообщений
+        """
+        self.logger = logger or logging.getLogger('taskdisttools')
+        self.level = level
+
+    def __call__(self, event, data):
+        """
+        Запись события
+        :param event: название события
+        :param data: данные события
+        """
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, '%s %s', event,
+                            json.dumps(data, default=float))
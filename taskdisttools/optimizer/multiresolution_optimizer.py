@@ -0,0 +1,130 @@
+"""
+Многоуровневая оптимизация (от укрупненной шкалы эпох к исходной)
+"""
+
+
+# =============================================================================
+
+
+import time
+import numpy as _np
+from .optimizer import Optimizer
+
+
+# =============================================================================
+
+
+__all__ = [
+    'MultiResolutionOptimizer',
+]
+
+
+# =============================================================================
+
+
+class MultiResolutionOptimizer(Optimizer):
+    """
+    Многоуровневая оптимизация
+     - сначала оптимизируется модель с укрупненными эпохами (частоты,
+       продолжительности, окна t0 и ограничения пересчитываются,
+       см. TaskModel.rescale), затем на каждом следующем уровне t0 корневых
+       задач уточняются только в окне вокруг решения предыдущего уровня
+     - на каждом уровне используется заданный алгоритм оптимизации,
+       решение предыдущего уровня - его базовое расписание
+     - время работы и значение метрики каждого уровня - в levels_
+    """
+
+    def __init__(self, optimizer, *, factors=(15,), window=1,
+                 instrumentation=None):
+        """
+        Инициализация
+        :param optimizer: алгоритм оптимизации уровня (Optimizer; флаг
+            periodic результатов - как у него)
+        :param factors: коэффициенты укрупнения эпох укрупненных уровней
+            (последний уровень - исходная шкала)
+        :param window: полуширина окна уточнения t0 в эпохах
+            предыдущего уровня
+        :param instrumentation: сбор статистики работы (None - статистика
+            не собирается; статистика уровней - у алгоритма уровня)
+        """
+        assert isinstance(optimizer, Optimizer)
+        assert all(factor >= 1 for factor in factors)
+        super().__init__(optimizer._metric, cache_memory=None,
+                         instrumentation=instrumentation,
+                         periodic=optimizer._periodic)
+        self._optimizer = optimizer
+        self._factors = sorted(set(factors) - {1}, reverse=True) + [1]
+        self._window = window
+        # Параметры и результаты уровней: коэффициент укрупнения (factor),
+        # t_max уровня, время оптимизации уровня, с (time), значение
+        # метрики на шкале уровня (score, None - уровень пропущен
+        # из-за конфликта ограничений)
+        self.levels_ = list()
+
+    def _do_optimize(self, model, t_max):
+        """
+        Непосредственно оптимизация
+        :param model: компактная модель набора задач
+        :param t_max: максимальная эпоха моделирования
+        """
+        self.levels_ = list()
+        root_start_times = None
+        prev_factor = None
+        for factor in self._factors:
+            level_model = model.rescale(factor) if factor > 1 else model
+            level_t_max = -(-t_max // factor)
+            if root_start_times is not None:
+                level_model, root_start_times = self._refine(
+                    level_model, level_t_max, root_start_times,
+                    prev_factor, factor
+                )
+
+            started = time.perf_counter()
+            try:
+                results = self._optimizer._optimize_model(
+                    level_model, level_t_max, root_start_times)
+            except RuntimeError:
+                # Округленные ограничения укрупненного уровня могут
+                # конфликтовать - уровень пропускается
+                if factor == 1:
+                    raise
+                results = None
+            self.levels_.append({
+                'factor': factor,
+                't_max': level_t_max,
+                'time': time.perf_counter() - started,
+                'score': None if results is None else results.score,
+            })
+            if self.instrumentation is not None:
+                self.instrumentation.add_time(
+                    f'level_{factor}', self.levels_[-1]['time'])
+                self.instrumentation.emit('level', **self.levels_[-1])
+            if results is not None:
+                # t0 до применения ограничений (make_start_times
+                # воспроизводит цепочки уровня)
+                root_start_times = level_model.get_root_start_times(
+                    results.start_times_array, raw=True)
+                prev_factor = factor
+
+        self.results_ = self._evaluate(root_start_times, model, t_max)
+
+    def _refine(self, model, t_max, root_start_times, prev_factor, factor):
+        """
+        Перевод решения предыдущего уровня на шкалу текущего уровня
+        и ограничение окон t0 корневых задач
+        :param model: компактная модель уровня
+        :param t_max: максимальная эпоха моделирования уровня
+        :param root_start_times: массив t0 корневых задач предыдущего уровня
+        :param prev_factor: коэффициент укрупнения предыдущего уровня
+        :param factor: коэффициент укрупнения уровня
+        :return: модель с ограниченными окнами t0,
+                 массив t0 корневых задач на шкале уровня
+        """
+        t0_upper = _np.where(model.t0_max < 0, t_max - 1, model.t0_max)
+        t0_upper = _np.maximum(t0_upper, model.t0_min)
+        centers = _np.clip(
+            root_start_times * prev_factor // factor, model.t0_min, t0_upper)
+        half_width = -(-self._window * prev_factor // factor)
+        t0_min = _np.maximum(centers - half_width, model.t0_min)
+        t0_max = _np.minimum(centers + half_width, t0_upper)
+        return model.restrict(t0_min, t0_max), centers
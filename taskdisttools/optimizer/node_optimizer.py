@@ -0,0 +1,430 @@
+"""
+Оптимизация t0 и узлов выполнения корневых задач
+"""
+
+
+# =============================================================================
+
+
+import copy
+import random
+import logging
+from collections import defaultdict
+import numpy as _np
+from taskdisttools.metric import PeakMetric, NormMetric, OverloadMetric
+from taskdisttools.metric import ResourceMetric
+from taskdisttools.task import NodeTaskManager
+from .optimizer import OptimizationResults, Optimizer
+from .evaluator import IncrementalEvaluator
+
+
+# =============================================================================
+
+
+__all__ = [
+    'NodeOptimizationResults',
+    'NodeOptimizer',
+]
+
+
+# =============================================================================
+
+
+_logger = logging.getLogger(__name__)
+
+# Вес штрафа за превышение емкости узлов (на единицу нормированного
+# превышения)
+_OVERLOAD_PENALTY = 1e6
+
+# Вес среднего квадрата загрузки узлов (устраняет "плато" максимума
+# по узлам: перенос задачи, не изменяющий максимум, оценивается
+# по равномерности загрузки)
+_BALANCE_WEIGHT = 1e-2
+
+
+def _sum_squares(values, axis=0):
+    """Сумма квадратов значений (норм L_2 загрузки узлов)"""
+    return _np.sum(_np.square(values), axis=axis)
+
+
+# =============================================================================
+
+
+class NodeOptimizationResults(OptimizationResults):
+    """
+    Результаты оптимизации по нескольким узлам
+     - загрузка системы - матрица эпоха x узел (столбцы - node_names)
+     - узлы задач - nodes (словарь по идентификаторам задач)
+    """
+
+    @classmethod
+    def from_nodes(cls, model, start_times, root_nodes, node_names, metric,
+                   t_max, *, score=None):
+        """
+        Формирование результатов по компактной модели набора задач
+        :param model: компактная модель набора задач ("веса" - матрица
+            задача x узел)
+        :param start_times: массив t0 всех задач (по номерам задач)
+        :param root_nodes: массив номеров узлов корневых задач
+            (по root_ids)
+        :param node_names: идентификаторы узлов
+        :param metric: оптимизируемая метрика
+        :param t_max: максимальная эпоха моделирования
+        :param score: известное значение метрики (None - рассчитывается)
+        :return: результаты оптимизации
+        """
+        results = cls.from_model(
+            model, start_times, metric, t_max, score=score)
+        results.node_names = list(node_names)
+        results.nodes = dict(zip(model.names, [
+            results.node_names[node]
+            for node in _np.asarray(root_nodes)[model.root].tolist()
+        ]))
+        return results
+
+    def get_node_loading(self, node):
+        """
+        Получение загрузки узла
+        :param node: идентификатор узла
+        :return: массив уровней загрузки узла на каждую эпоху
+        """
+        return self.loading[:, self.node_names.index(node)]
+
+    def get_node_results(self, node, metric):
+        """
+        Формирование результатов для задач одного узла
+        (например, для Beautifier)
+        :param node: идентификатор узла
+        :param metric: метрика загрузки узла
+        :return: результаты оптимизации (скалярные "веса" задач)
+        """
+        column = self.node_names.index(node)
+        start_times, tasks_data = self.get_input()
+        tasks = [task for task in start_times.keys()
+                 if self.nodes[task] == node]
+        return OptimizationResults(
+            dict((task, start_times[task]) for task in tasks),
+            dict(
+                (task, tasks_data[task]._replace(
+                    weight=tasks_data[task].weight[column].item()))
+                for task in tasks
+            ),
+            metric, self.t_max
+        )
+
+
+# =============================================================================
+
+
+class NodeOptimizer(Optimizer):
+    """
+    Оптимизация t0 и узлов выполнения корневых задач (NodeTaskManager)
+     - загрузка - матрица эпоха x узел: "вес" задачи относится к столбцу
+       ее узла, поэтому пары (узел, t0) оцениваются IncrementalEvaluator
+       (перенос цепочки на другой узел - изменение "весов" ее задач)
+     - метрика узла (по умолчанию PeakMetric) рассчитывается по загрузке,
+       нормированной на емкость узла (если емкости всех узлов ограничены),
+       оптимизируется максимум по узлам (ResourceMetric) с небольшой
+       добавкой среднего квадрата загрузки узлов; превышение емкости
+       узлов штрафуется, если оно сохраняется после оптимизации -
+       RuntimeError
+     - начальное распределение: корневые задачи по убыванию средней
+       загрузки назначаются на наименее загруженный допустимый узел
+     - итерация: для каждой корневой задачи (в случайном порядке)
+       оцениваются все допустимые пары (узел, t0) и применяется лучшая;
+       итерации повторяются, пока метрика улучшается
+    """
+
+    def __init__(self, metric=None, *, n_iterations=10, random_state=None,
+                 instrumentation=None):
+        """
+        Инициализация
+        :param metric: метрика загрузки узла (None - PeakMetric)
+        :param n_iterations: максимальное кол-во итераций
+        :param random_state: состояние ДСЧ
+        :param instrumentation: сбор статистики работы
+            (None - статистика не собирается)
+        """
+        # Кеш не используется: значения метрики зависят от узлов задач
+        super().__init__(None, cache_memory=None,
+                         instrumentation=instrumentation)
+        self._node_metric = PeakMetric() if metric is None else metric
+        self._n_iterations = n_iterations
+        self._random_state = random_state
+        self._task_model = None
+        self._node_names = None
+        self._allowed = None
+        self._relations = None
+        self._chains = None
+        self._root_nodes = None
+
+    def optimize(self, task_manager, t_max, initial=None):
+        """
+        Оптимизация
+        :param task_manager: менеджер задач (NodeTaskManager)
+        :param t_max: максимальная эпоха моделирования
+        :param initial: базовое расписание - словарь t0 корневых задач
+            или результаты предыдущей оптимизации (для
+            NodeOptimizationResults - вместе с узлами; None - t0_min)
+        :return: результаты оптимизации (NodeOptimizationResults)
+        """
+        assert isinstance(task_manager, NodeTaskManager)
+        with self._timer('freeze'):
+            model = task_manager.freeze()
+        if model.weight.ndim > 1:
+            raise RuntimeError(
+                'Node assignment of multi-resource loading is not supported')
+
+        capacity = task_manager.capacity
+        self._metric = self._make_objective(
+            capacity, len(task_manager.nodes) * max(t_max, 1))
+        self._task_model = model
+        self._node_names = task_manager.nodes
+        self._allowed, relations = \
+            task_manager.compile_node_constraints(model)
+        self._relations = defaultdict(list)
+        for source, target, cnt in relations:
+            self._relations[source].append((source, target, cnt))
+            if target != source:
+                self._relations[target].append((source, target, cnt))
+        order = _np.argsort(model.root, kind='stable')
+        self._chains = _np.split(order, _np.cumsum(
+            _np.bincount(model.root, minlength=len(model.root_ids)))[:-1])
+
+        with self._timer('assign'):
+            self._root_nodes = self._assign_nodes(model, initial, capacity)
+        root_start_times = None if initial is None \
+            else self._make_initial(model, t_max, initial)
+        results = self._optimize_model(
+            self._make_node_model(self._root_nodes), t_max, root_start_times)
+
+        if t_max > 0:
+            exceeded = results.loading.max(axis=0) > capacity
+            if exceeded.any():
+                raise RuntimeError('Capacity of nodes {} is exceeded'.format(
+                    ', '.join(f'"{node}"' for node, flag in
+                              zip(self._node_names, exceeded) if flag)))
+        return results
+
+    def _do_optimize(self, model, t_max):
+        """
+        Непосредственно оптимизация
+        :param model: компактная модель набора задач
+        :param t_max: максимальная эпоха моделирования
+        """
+        instrumentation = self.instrumentation
+        rng = random.Random(self._random_state)
+        root_nodes = self._root_nodes.copy()
+        evaluator = IncrementalEvaluator(
+            model, self._metric, t_max,
+            model.get_root_start_times(
+                self.results_.start_times_array, raw=True)
+        )
+
+        roots = list(range(len(model.root_ids)))
+        for i in range(self._n_iterations):
+            rng.shuffle(roots)
+            n_moved = sum(
+                self._move_root(model, evaluator, root, root_nodes, t_max)
+                for root in roots
+            )
+            _logger.info('Iteration: %d, score: %s, moved: %d',
+                         i + 1, evaluator.score, n_moved)
+            if instrumentation is not None:
+                instrumentation.count('iterations')
+                instrumentation.emit(
+                    'iteration', iteration=i + 1, score=evaluator.score,
+                    n_moved=n_moved
+                )
+            if n_moved == 0:
+                break
+
+        self._root_nodes = root_nodes
+        self.results_ = self._evaluate(
+            evaluator.root_start_times, self._make_node_model(root_nodes),
+            t_max
+        )
+
+    def _evaluate(self, root_start_times, model, t_max):
+        """
+        Расчет параметров расписания для заданных значений t0
+        (узлы корневых задач - текущие)
+        :param root_start_times: массив t0 корневых задач (по root_ids)
+        :param model: компактная модель набора задач
+        :param t_max: максимальная эпоха моделирования
+        :return: результаты оптимизации
+        """
+        with self._timer('results'):
+            return NodeOptimizationResults.from_nodes(
+                model, model.make_start_times(root_start_times),
+                self._root_nodes, self._node_names, self._metric, t_max
+            )
+
+    def _move_root(self, model, evaluator, root, root_nodes, t0_max):
+        """
+        Выбор лучшей пары (узел, t0) корневой задачи
+        :param model: компактная модель набора задач
+        :param evaluator: инкрементальный расчет параметров расписания
+        :param root: позиция корневой задачи
+        :param root_nodes: массив номеров узлов корневых задач
+            (изменяется на месте)
+        :param t0_max: максимальная эпоха моделирования
+        :return: 1 если пара изменена, иначе 0
+        """
+        t0s = list(model.get_start_times(root, t0_max))
+        with self._timer('select'):
+            positions, moved_t0s = evaluator.select_moves(
+                root, t0s, return_t0s=True)
+        moves = [t0s[j] for j in positions.tolist()]
+        if len(moves) == 0:
+            return 0
+
+        best_score, best_node, best_t0 = evaluator.score, None, None
+        for node in self._get_nodes(root, root_nodes):
+            with self._timer('evaluate'):
+                scores = evaluator.evaluate_moves(
+                    root, moves, weight=self._make_chain_weight(
+                        root, node, root_nodes), moved_t0s=moved_t0s)
+            if self.instrumentation is not None:
+                self.instrumentation.count('evaluations', len(moves))
+            k = int(_np.argmin(scores))
+            if scores[k] < best_score:
+                best_score, best_node, best_t0 = scores[k], node, moves[k]
+        if best_node is None:
+            return 0
+
+        with self._timer('apply'):
+            evaluator.apply_move(
+                root, best_t0, weight=self._make_chain_weight(
+                    root, best_node, root_nodes))
+            root_nodes[root] = best_node
+            evaluator.normalize()
+        if self.instrumentation is not None:
+            self.instrumentation.count('accepted')
+        return 1
+
+    def _get_nodes(self, root, root_nodes):
+        """
+        Получение допустимых узлов корневой задачи
+        :param root: позиция корневой задачи
+        :param root_nodes: массив номеров узлов корневых задач
+            (-1 - узел не назначен)
+        :return: список номеров узлов
+        """
+        return [
+            node for node in _np.flatnonzero(self._allowed[root]).tolist()
+            if self._test_relations(root, node, root_nodes)
+        ]
+
+    def _test_relations(self, root, node, root_nodes):
+        """
+        Проверка относительных ограничений на узел корневой задачи
+        (ограничения с задачами без назначенного узла не проверяются)
+        :param root: позиция корневой задачи
+        :param node: номер проверяемого узла
+        :param root_nodes: массив номеров узлов корневых задач
+        :return: True если ограничения выполнены, иначе False
+        """
+        names = self._node_names
+        for source, target, cnt in self._relations[root]:
+            source_node = node if source == root else root_nodes[source]
+            target_node = node if target == root else root_nodes[target]
+            if source_node < 0 or target_node < 0:
+                continue
+            if not cnt.test(names[source_node],
+                            {cnt.target: names[target_node]}):
+                return False
+        return True
+
+    def _assign_nodes(self, model, initial, capacity):
+        """
+        Начальное распределение корневых задач по узлам
+        :param model: компактная модель набора задач
+        :param initial: базовое расписание (узлы NodeOptimizationResults
+            сохраняются, если они допустимы)
+        :param capacity: массив емкостей узлов
+        :return: массив номеров узлов корневых задач
+        """
+        n_roots, n_nodes = len(model.root_ids), len(self._node_names)
+        root_nodes = _np.full(n_roots, -1, dtype=_np.int64)
+        if isinstance(initial, NodeOptimizationResults):
+            index = dict((node, k) for k, node in enumerate(self._node_names))
+            for root, name in enumerate(model.root_names):
+                node = index.get(initial.nodes.get(name), -1)
+                if node >= 0 and self._allowed[root, node] and \
+                        self._test_relations(root, node, root_nodes):
+                    root_nodes[root] = node
+
+        # Средняя загрузка цепочек
+        load = _np.bincount(
+            model.root, model.weight * model.span / model.frequency, n_roots)
+        scale = _np.where(_np.isfinite(capacity), capacity, 1.)
+        assigned = root_nodes >= 0
+        node_load = _np.bincount(
+            root_nodes[assigned], load[assigned], n_nodes)
+        for root in _np.argsort(-load, kind='stable').tolist():
+            if root_nodes[root] >= 0:
+                continue
+            nodes = self._get_nodes(root, root_nodes)
+            if len(nodes) == 0:
+                raise RuntimeError(
+                    f'No feasible node for task "{model.root_names[root]}"')
+            node = min(nodes, key=lambda k: (node_load[k] + load[root]) /
+                       scale[k])
+            root_nodes[root] = node
+            node_load[node] += load[root]
+        return root_nodes
+
+    def _make_node_model(self, root_nodes):
+        """
+        Формирование модели с "весами" задач по узлам
+        :param root_nodes: массив номеров узлов корневых задач
+        :return: компактная модель ("веса" - матрица задача x узел)
+        """
+        task_model = self._task_model
+        weight = _np.zeros(
+            (len(task_model), len(self._node_names)),
+            dtype=task_model.weight.dtype)
+        weight[_np.arange(len(task_model)), root_nodes[task_model.root]] = \
+            task_model.weight
+        model = copy.copy(task_model)
+        model.weight = weight
+        model.resources = list(self._node_names)
+        model._tasks_data = None
+        return model
+
+    def _make_chain_weight(self, root, node, root_nodes):
+        """
+        Формирование "весов" задач цепочки корневой задачи на узле
+        :param root: позиция корневой задачи
+        :param node: номер узла
+        :param root_nodes: массив номеров узлов корневых задач
+        :return: матрица "весов" (задача цепочки x узел) или None
+                 (узел не изменяется)
+        """
+        if node == root_nodes[root]:
+            return None
+        chain = self._chains[root]
+        weight = _np.zeros(
+            (len(chain), len(self._node_names)),
+            dtype=self._task_model.weight.dtype)
+        weight[:, node] = self._task_model.weight[chain]
+        return weight
+
+    def _make_objective(self, capacity, size):
+        """
+        Формирование оптимизируемой метрики загрузки узлов
+        :param capacity: массив емкостей узлов (inf - не ограничена)
+        :param size: кол-во элементов матрицы загрузки
+        :return: метрика матрицы загрузки эпоха x узел
+        """
+        limited = _np.isfinite(capacity)
+        scale = capacity if limited.all() else None
+        objective = ResourceMetric(self._node_metric, capacity=scale) + \
+            _BALANCE_WEIGHT / size * ResourceMetric(
+                NormMetric(2), capacity=scale, reduce=_sum_squares)
+        if limited.any():
+            objective = objective + _OVERLOAD_PENALTY * ResourceMetric(
+                OverloadMetric(1.), capacity=capacity, reduce=_np.sum)
+        return objective
+
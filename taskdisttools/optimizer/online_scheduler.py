@@ -0,0 +1,346 @@
+"""
+Размещение задач, поступающих во время работы системы
+"""
+
+
+# =============================================================================
+
+
+import numpy as _np
+from taskdisttools.metric import StdMetric, VarMetric
+from taskdisttools.task import RootTask, TaskManager
+from taskdisttools.utils import make_loading, launch_epochs
+from taskdisttools.utils import batch_launch_epochs, weighted_bincount
+from .optimizer import OptimizationResults
+from .evaluator import BATCH_SIZE, MOMENT_METRICS
+
+
+# =============================================================================
+
+
+__all__ = [
+    'OnlineScheduler',
+]
+
+
+# =============================================================================
+
+
+class OnlineScheduler(object):
+    """
+    Размещение задач, поступающих во время работы системы
+     - хранится текущая загрузка системы; новая корневая задача
+       (с зависимыми задачами и ограничениями) размещается в t0
+       с наилучшим значением метрики, t0 остальных задач не изменяются
+     - все допустимые варианты t0 оцениваются за один векторизованный
+       проход относительно текущей загрузки; для np.std, np.var, VarMetric
+       и StdMetric при целочисленной загрузке - только по эпохам
+       активности размещаемых задач
+     - для векторных "весов" задач загрузка - матрица эпоха x ресурс
+     - размещенную задачу можно удалить или разместить заново
+    """
+
+    def __init__(self, task_manager, metric, t_max, root_start_times=None):
+        """
+        Инициализация
+        :param task_manager: менеджер задач (дополняется при размещении)
+        :param metric: метрика загрузки системы
+        :param t_max: максимальная эпоха моделирования
+        :param root_start_times: словарь t0 размещенных корневых задач
+            (None - t0_min)
+        """
+        assert isinstance(task_manager, TaskManager)
+        self._task_manager = task_manager
+        self._metric = metric
+        self._t_max = t_max
+
+        if root_start_times is None:
+            root_start_times = dict(
+                (name, task.t0_min)
+                for name, task in task_manager.root_tasks.items()
+            )
+        self.start_times, self.tasks_data = \
+            task_manager.make_model_input(root_start_times)
+        self.root_start_times = dict(
+            (name, self.start_times[name])
+            for name in task_manager.root_tasks.keys()
+        )
+        self.loading = make_loading(self.start_times, self.tasks_data, t_max)
+        # Форма загрузки фиксирована, поэтому набор ресурсов не изменяется
+        self._resources = task_manager.resources
+
+    @property
+    def score(self):
+        """Значение метрики для текущей загрузки"""
+        return self._metric(self.loading)
+
+    def get_results(self):
+        """
+        Формирование результатов для текущего расписания
+        :return: результаты оптимизации
+        """
+        return OptimizationResults(
+            dict(self.start_times), dict(self.tasks_data), self._metric,
+            self._t_max
+        )
+
+    def place(self, root_task, constraints=None):
+        """
+        Размещение новой корневой задачи
+        :param root_task: корневая задача (с зависимыми задачами)
+        :param constraints: словарь списков ограничений новых задач
+        :return: t0 корневой задачи
+        """
+        assert isinstance(root_task, RootTask)
+        name = root_task.name
+        if name in self._task_manager.root_tasks:
+            raise RuntimeError(f'Task "{name}" is already placed')
+
+        self._task_manager.add_root_task(root_task)
+        for task, cnts in (constraints or dict()).items():
+            for cnt in cnts:
+                self._task_manager.add_constraint(task, cnt)
+        try:
+            return self._place(name)
+        except Exception:
+            self._task_manager.remove_root_task(name)
+            raise
+
+    def replace(self, name):
+        """
+        Повторное размещение корневой задачи (t0 остальных задач
+        не изменяются)
+        :param name: идентификатор корневой задачи
+        :return: t0 корневой задачи
+        """
+        start_times = self._remove(name)
+        try:
+            return self._place(name)
+        except Exception:
+            self._add(start_times)
+            self.root_start_times[name] = start_times[name]
+            raise
+
+    def remove(self, name):
+        """
+        Удаление корневой задачи (вместе с зависимыми задачами)
+        :param name: идентификатор корневой задачи
+        :return: ссылка на объект вызова
+        """
+        start_times = self._remove(name)
+        try:
+            self._task_manager.remove_root_task(name)
+        except Exception:
+            self._add(start_times)
+            self.root_start_times[name] = start_times[name]
+            raise
+        return self
+
+    def _place(self, name):
+        """
+        Выбор t0 и размещение корневой задачи
+        :param name: идентификатор корневой задачи
+        :return: t0 корневой задачи
+        """
+        task_manager = self._task_manager
+        unknown = set(task_manager.get_root_resources(name)).difference(
+            self._resources)
+        if len(unknown) > 0:
+            raise RuntimeError(
+                f'Task "{name}" uses unknown resources: '
+                f'{", ".join(sorted(unknown))}')
+        chain_t0s, chain_data = task_manager.make_task_input(
+            name, 0, resources=self._resources)
+        chain = list(chain_t0s.keys())
+        t0s = _np.asarray(
+            task_manager.get_start_times(name, self._t_max), dtype=_np.int64)
+        moved_t0s = t0s[:, None] + _np.array(
+            list(chain_t0s.values()), dtype=_np.int64)[None, :]
+
+        feasible = self._apply_constraints(chain, moved_t0s)
+        candidates = _np.flatnonzero(feasible)
+        if len(candidates) == 0:
+            raise RuntimeError(f'No feasible start time for task "{name}"')
+
+        # Совпадающие после применения ограничений варианты - один раз
+        _, first = _np.unique(
+            moved_t0s[candidates], axis=0, return_index=True)
+        candidates = candidates[_np.sort(first)]
+
+        data = [chain_data[task] for task in chain]
+        scores = self._measure(data, moved_t0s[candidates])
+        best = moved_t0s[candidates[int(_np.argmin(scores))]]
+
+        self._add(dict(zip(chain, best.tolist())), chain_data)
+        self.root_start_times[name] = int(best[0])
+        return int(best[0])
+
+    def _apply_constraints(self, chain, moved_t0s):
+        """
+        Применение ограничений к вариантам t0 размещаемых задач
+        (t0 остальных задач не изменяются)
+        :param chain: идентификаторы размещаемых задач
+        :param moved_t0s: матрица t0 (вариант x задача, изменяется на месте)
+        :return: массив флагов выполнения ограничений для каждого варианта
+        """
+        index = dict((task, j) for j, task in enumerate(chain))
+        plan = self._task_manager.constraint_plan
+        feasible = _np.ones(len(moved_t0s), dtype=bool)
+
+        subset = plan.subset(chain)
+        if len(subset.steps) > 0:
+            values = _np.empty(
+                (len(moved_t0s), len(subset.columns)), _np.int64)
+            for j, task in enumerate(subset.columns):
+                if task in index:
+                    values[:, j] = moved_t0s[:, index[task]]
+                elif task in self.start_times:
+                    values[:, j] = self.start_times[task]
+                else:
+                    raise RuntimeError(f'Task "{task}" is not placed')
+            feasible &= subset.apply(values, strict=False)
+            for j, task in enumerate(subset.columns):
+                if task in index:
+                    moved_t0s[:, index[task]] = values[:, j]
+
+        # Ограничения остальных задач, целевые задачи которых размещаются,
+        # только проверяются
+        for step in plan.get_targeted_by(chain):
+            column, cnts = plan.steps[step]
+            task = plan.columns[column]
+            if task in index:
+                continue
+            for cnt, target in cnts:
+                if target is not None and plan.columns[target] in index:
+                    feasible &= cnt.test_array(
+                        _np.full(len(moved_t0s), self.start_times[task]),
+                        moved_t0s[:, index[plan.columns[target]]]
+                    )
+        return feasible
+
+    def _measure(self, data, moved_t0s):
+        """
+        Расчет значений метрики для вариантов t0 размещаемых задач
+        :param data: данные размещаемых задач
+        :param moved_t0s: матрица t0 (вариант x задача)
+        :return: массив значений метрики
+        """
+        metric = self._metric
+        integer = self.loading.dtype.kind in 'iu' and all(
+            _np.asarray(item.weight).dtype.kind in 'iub' for item in data)
+        if integer and self.loading.ndim == 1 and len(self.loading) > 0:
+            if type(metric) in (VarMetric, StdMetric):
+                return self._measure_moments(
+                    data, moved_t0s, metric.from_moments)
+            if metric in MOMENT_METRICS:
+                return self._measure_moments(
+                    data, moved_t0s, MOMENT_METRICS[metric])
+
+        scores = _np.empty(len(moved_t0s))
+        chunk_size = max(1, BATCH_SIZE // max(self.loading.size, 1))
+        for i in range(0, len(moved_t0s), chunk_size):
+            chunk = moved_t0s[i:i + chunk_size]
+            indices, weights = self._make_delta(data, chunk)
+            delta = weighted_bincount(
+                indices, weights, len(chunk) * self._t_max
+            ).reshape((len(chunk),) + self.loading.shape)
+            if integer:
+                delta = _np.rint(delta).astype(self.loading.dtype)
+            loadings = self.loading[None] + delta
+            try:
+                rows = _np.asarray(metric(loadings, axis=1), dtype=float)
+                if rows.shape != (len(chunk),):
+                    raise TypeError
+            except TypeError:
+                rows = _np.array([metric(row) for row in loadings])
+            scores[i:i + chunk_size] = rows
+        return scores
+
+    def _measure_moments(self, data, moved_t0s, from_moments):
+        """
+        Расчет значений метрики по сумме значений и сумме их квадратов
+        (учитываются только эпохи активности размещаемых задач)
+        :param data: данные размещаемых задач
+        :param moved_t0s: матрица t0 (вариант x задача)
+        :param from_moments: функция значения метрики по массивам сумм
+            значений и сумм их квадратов
+        :return: массив значений метрики
+        """
+        n_rows, t_max = len(moved_t0s), self._t_max
+        indices, weights = self._make_delta(data, moved_t0s)
+        indices, inverse = _np.unique(indices, return_inverse=True)
+        delta = _np.zeros(len(indices), dtype=_np.int64)
+        _np.add.at(delta, inverse.ravel(), weights.astype(_np.int64))
+        rows = indices // t_max
+        base = self.loading[indices % t_max].astype(_np.int64)
+
+        s1 = _np.full(n_rows, int(self.loading.sum()), dtype=_np.int64)
+        s2 = _np.full(
+            n_rows, int((self.loading * self.loading).sum()),
+            dtype=_np.int64)
+        _np.add.at(s1, rows, delta)
+        _np.add.at(s2, rows, (2 * base + delta) * delta)
+        return from_moments(s1, s2, t_max)
+
+    def _make_delta(self, data, moved_t0s):
+        """
+        Формирование эпох активности размещаемых задач для вариантов t0
+        :param data: данные размещаемых задач
+        :param moved_t0s: матрица t0 (вариант x задача)
+        :return: массив индексов (вариант * t_max + эпоха)
+                 и массив соответствующих "весов" (для векторных
+                 "весов" - матрица индекс x ресурс)
+        """
+        n_rows, t_max = len(moved_t0s), self._t_max
+        indices = [_np.empty(0, dtype=_np.int64)]
+        weights = [_np.empty((0,) + self.loading.shape[1:])]
+        for j, item in enumerate(data):
+            epochs, counts = batch_launch_epochs(
+                moved_t0s[:, j], item.frequency, item.span, t_max)
+            rows = _np.repeat(_np.arange(n_rows, dtype=_np.int64), counts)
+            indices.append(rows * t_max + epochs)
+            weights.append(_np.full(
+                (len(epochs),) + _np.shape(item.weight), item.weight,
+                dtype=float))
+        return _np.concatenate(indices), _np.concatenate(weights)
+
+    def _add(self, start_times, tasks_data=None):
+        """
+        Добавление задач в текущее расписание и загрузку
+        :param start_times: словарь t0 задач
+        :param tasks_data: словарь данных задач (None - текущие данные)
+        """
+        for task, t0 in start_times.items():
+            item = self.tasks_data[task] if tasks_data is None \
+                else tasks_data[task]
+            if _np.asarray(item.weight).dtype.kind == 'f':
+                self.loading = self.loading.astype(float, copy=False)
+            _np.add.at(
+                self.loading,
+                launch_epochs(t0, item.frequency, item.span, self._t_max),
+                item.weight
+            )
+            self.start_times[task] = t0
+            self.tasks_data[task] = item
+
+    def _remove(self, name):
+        """
+        Исключение корневой задачи и ее зависимых задач из текущего
+        расписания и загрузки
+        :param name: идентификатор корневой задачи
+        :return: словарь t0 исключенных задач
+        """
+        chain = self._task_manager.make_task_input(
+            name, 0, resources=self._resources)[0].keys()
+        start_times = dict(
+            (task, self.start_times[task]) for task in chain)
+        for task, t0 in start_times.items():
+            item = self.tasks_data[task]
+            _np.subtract.at(
+                self.loading,
+                launch_epochs(t0, item.frequency, item.span, self._t_max),
+                item.weight
+            )
+            del self.start_times[task]
+        del self.root_start_times[name]
+        return start_times
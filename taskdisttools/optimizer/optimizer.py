@@ -7,8 +7,14 @@
 
 
 import abc
+import copy
+import contextlib
+import numpy as _np
 from taskdisttools.task import TaskManager
-from taskdisttools.utils import make_timetable, get_loading
+from taskdisttools.utils import make_timetable, make_loading, compute_loading
+from taskdisttools.utils import make_periodic_loading
+from taskdisttools.utils import compute_periodic_loading
+from .cache import ScoreCache
 
 
 # =============================================================================
@@ -23,97 +29,480 @@ __all__ = [
 # =============================================================================
 
 
+# Пустой контекстный менеджер (время этапов не учитывается)
+_NO_TIMER = contextlib.nullcontext()
+
+
+# =============================================================================
+
+
 class OptimizationResults(object):
-    """Результаты оптимизации"""
+    """
+    Результаты оптимизации
+     - хранятся значение метрики и t0 задач, загрузка системы и расписание
+       рассчитываются при первом обращении
+     - копирование (copy.copy, copy.deepcopy) не копирует данные: копии
+       разделяют их до первого обращения к изменяемому атрибуту
+       (start_times, tasks_data, loading, timetable)
+     - при periodic = True значение метрики рассчитывается по гиперпериоду
+       расписания (PeriodicLoading, см. compute_periodic_loading; для
+       np.std, np.var и метрик библиотеки - с точностью до ошибок
+       округления); если гиперпериод не умещается в интервал
+       моделирования или "веса" векторные - по полной загрузке
+    """
 
-    def __init__(self, start_times, tasks_data, metric, t_max):
+    # Изменяемые атрибуты, разделяемые копиями
+    _SHARED_ATTRIBUTES = ('_start_times', '_tasks_data', '_loading',
+                          '_timetable')
+
+    def __init__(self, start_times, tasks_data, metric, t_max, *,
+                 score=None, periodic=False):
         """
         Инициализация
         :param start_times: оптимальные t0 для каждой задачи
         :param tasks_data: словарь, содержащий данные задач
         :param metric: оптимизируемая метрика
         :param t_max: максимальная эпоха моделирования
+        :param score: известное значение метрики (None - рассчитывается)
+        :param periodic: флаг расчета метрики по гиперпериоду расписания
         """
-        self.start_times = start_times
-        self.tasks_data = tasks_data
+        self.model = None
+        self.periodic = periodic
+        self._start_times_array = None
+        self._start_times = start_times
+        self._tasks_data = tasks_data
         self.metric = metric
         self.t_max = t_max
-        self.timetable = None
-        self.loading = None
         self.score = None
-        self.evaluate()
+        self._loading = None
+        self._timetable = None
+        self._shared = set()
+        if score is None:
+            self.evaluate()
+        else:
+            self.score = score
+
+    @classmethod
+    def from_model(cls, model, start_times, metric, t_max, *, score=None,
+                   periodic=False):
+        """
+        Формирование результатов по компактной модели набора задач
+        :param model: компактная модель набора задач
+        :param start_times: массив t0 всех задач (по номерам задач)
+        :param metric: оптимизируемая метрика
+        :param t_max: максимальная эпоха моделирования
+        :param score: известное значение метрики (None - рассчитывается)
+        :param periodic: флаг расчета метрики по гиперпериоду расписания
+        :return: результаты оптимизации
+        """
+        results = cls.__new__(cls)
+        results.model = model
+        results.periodic = periodic
+        results._start_times_array = start_times
+        results._start_times = None
+        results._tasks_data = None
+        results.metric = metric
+        results.t_max = t_max
+        results.score = None
+        results._loading = None
+        results._timetable = None
+        results._shared = set()
+        if score is None:
+            return results.evaluate()
+        results.score = score
+        return results
+
+    def __copy__(self):
+        """Копирование (данные разделяются до первого обращения)"""
+        results = self.__class__.__new__(self.__class__)
+        results.__dict__.update(self.__dict__)
+        self._shared = set(self._SHARED_ATTRIBUTES)
+        results._shared = set(self._SHARED_ATTRIBUTES)
+        return results
+
+    def __deepcopy__(self, memo):
+        """
+        Копирование (данные разделяются до первого обращения; модель
+        и массив t0 не изменяются, метрика копируется)
+        """
+        results = self.__copy__()
+        results.metric = copy.deepcopy(self.metric, memo)
+        return results
+
+    @property
+    def start_times(self):
+        """
+        Словарь t0 для каждой задачи (после обращения именно он
+        используется при расчете, т.к. может быть изменен на месте)
+        """
+        if self._start_times is None:
+            self._start_times = self.model.to_dict(self._start_times_array)
+        self._start_times_array = None
+        return self._get_own('_start_times')
+
+    @start_times.setter
+    def start_times(self, start_times):
+        """Задание словаря t0 для каждой задачи"""
+        self._start_times = start_times
+        self._start_times_array = None
+        self._shared.discard('_start_times')
+
+    @property
+    def start_times_array(self):
+        """Массив t0 для каждой задачи (по номерам задач модели)"""
+        if self._start_times_array is not None:
+            return self._start_times_array
+        return self.model.from_dict(self._start_times)
 
-    def evaluate(self):
+    @property
+    def is_model_backed(self):
         """
-        Расчет значений оцениваемых параметров
+        Флаг результатов, данные задач которых - данные компактной модели
+        (model; t0 задач - start_times_array)
+        """
+        return self.model is not None and self._tasks_data is None
+
+    @property
+    def tasks_data(self):
+        """Словарь, содержащий данные задач"""
+        if self._tasks_data is None:
+            self._tasks_data = dict(self.model.tasks_data)
+        return self._get_own('_tasks_data')
+
+    @tasks_data.setter
+    def tasks_data(self, tasks_data):
+        """Задание словаря данных задач"""
+        self._tasks_data = tasks_data
+        self._shared.discard('_tasks_data')
+
+    @property
+    def loading(self):
+        """Уровни загрузки системы (рассчитываются при обращении)"""
+        if self._loading is None:
+            self._loading = self._make_loading()
+        return self._get_own('_loading')
+
+    @loading.setter
+    def loading(self, loading):
+        """Задание уровней загрузки системы"""
+        self._loading = loading
+        self._shared.discard('_loading')
+
+    @property
+    def timetable(self):
+        """Расписание выполнения задач (формируется при обращении)"""
+        if self._timetable is None:
+            self._timetable = make_timetable(*self.get_input(), self.t_max)
+        return self._get_own('_timetable')
+
+    def evaluate(self, loading=None):
+        """
+        Расчет значения метрики (загрузка системы и расписание
+        рассчитываются заново при обращении)
+        :param loading: известные уровни загрузки системы для текущих t0
+            (None - рассчитываются)
         :return: сслыка на объект вызова
         """
-        self.timetable = make_timetable(
-            self.start_times, self.tasks_data, self.t_max)
-        self.loading = get_loading(self.timetable, self.tasks_data)
-        self.score = self.metric(self.loading)
+        self._timetable = None
+        self._loading = loading
+        self._shared.discard('_loading')
+        if loading is None and self.periodic:
+            periodic = self._make_periodic_loading()
+            if periodic is not None and periodic.period > 0:
+                self.score = periodic.score(self.metric)
+                return self
+            if periodic is not None:
+                # Загрузка не сжата - это полная загрузка системы
+                loading = self._loading = periodic.head
+        if loading is None:
+            loading = self._make_loading()
+        self.score = self.metric(loading)
         return self
 
+    def get_input(self):
+        """
+        Получение исходных данных расчета (без копирования разделяемых
+        атрибутов, только для чтения)
+        :return: словарь t0 для каждой задачи, словарь данных задач
+        """
+        start_times = self._start_times
+        if start_times is None:
+            start_times = self.model.to_dict(self._start_times_array)
+        tasks_data = self._tasks_data
+        if tasks_data is None:
+            tasks_data = self.model.tasks_data
+        return start_times, tasks_data
+
+    def _make_loading(self):
+        """
+        Расчет уровней загрузки системы
+        :return: массив уровней загрузки системы на каждую эпоху
+        """
+        if self._start_times_array is not None and self._tasks_data is None:
+            return compute_loading(
+                self._start_times_array, self.model.frequency,
+                self.model.span, self.model.weight, self.t_max
+            )
+        return make_loading(*self.get_input(), self.t_max)
+
+    def _make_periodic_loading(self):
+        """
+        Расчет загрузки системы по гиперпериоду расписания
+        :return: загрузка системы (PeriodicLoading; None - для векторных
+                 "весов" задач)
+        """
+        if self._start_times_array is not None and self._tasks_data is None:
+            if self.model.weight.ndim > 1:
+                return None
+            return compute_periodic_loading(
+                self._start_times_array, self.model.frequency,
+                self.model.span, self.model.weight, self.t_max
+            )
+        start_times, tasks_data = self.get_input()
+        if any(_np.ndim(item.weight) > 0 for item in tasks_data.values()):
+            return None
+        return make_periodic_loading(start_times, tasks_data, self.t_max)
+
+    def _get_own(self, name):
+        """
+        Получение изменяемого атрибута (разделяемый с копией атрибут
+        предварительно копируется)
+        :param name: название атрибута
+        :return: значение атрибута
+        """
+        value = getattr(self, name)
+        if name in self._shared:
+            self._shared.discard(name)
+            if value is not None:
+                value = copy.deepcopy(value)
+                setattr(self, name, value)
+        return value
+
 
 # =============================================================================
 
 
 class Optimizer(abc.ABC):
-    """Интерфейс алгоритма оптимизации"""
+    """
+    Интерфейс алгоритма оптимизации
+     - значения метрики оцененных расписаний кешируются (cache_) на время
+       оптимизации: разные t0 корневых задач после применения ограничений
+       часто дают одно и то же расписание
+     - статистика работы (счетчики, время этапов, события) собирается,
+       если задан объект instrumentation (Instrumentation)
+     - при periodic = True значение метрики результатов рассчитывается
+       по гиперпериоду расписания (OptimizationResults.periodic; оценки
+       вариантов при поиске - по полной загрузке)
+    """
 
-    def __init__(self, metric):
+    def __init__(self, metric, *, cache_memory=64 * 2 ** 20,
+                 instrumentation=None, periodic=False):
         """
         Инициализация
         :param metric: оптимизируемая метрика
+        :param cache_memory: предельный объем памяти кеша значений
+            метрики, байт (None или 0 - без кеширования)
+        :param instrumentation: сбор статистики работы
+            (None - статистика не собирается)
+        :param periodic: флаг расчета метрики результатов по гиперпериоду
+            расписания
         """
         self._metric = metric
+        self._cache_memory = cache_memory
+        self.instrumentation = instrumentation
+        self._periodic = periodic
         self.results_ = None  # результаты оптимизации
+        self.cache_ = None  # кеш значений метрики (статистика обращений)
+
+    def __getstate__(self):
+        """Состояние для pickle (без сбора статистики и подписчиков)"""
+        state = self.__dict__.copy()
+        state['instrumentation'] = None
+        return state
 
-    def optimize(self, task_manager, t_max):
+    def optimize(self, task_manager, t_max, initial=None, *, revisit=None):
         """
         Оптимизация
         :param task_manager: менеджер задач
         :param t_max: максимальная эпоха моделирования
+        :param initial: базовое расписание - словарь t0 (по идентификаторам
+            корневых задач) или результаты предыдущей оптимизации
+            (None - t0_min; новые задачи и задачи с t0 вне окна - t0_min,
+            удаленные задачи не учитываются; для результатов цепочки
+            задач сохраняются целиком, t0 неизмененных корневых задач
+            не проверяются)
+        :param revisit: корневые задачи, t0 которых оптимизируются
+            (None - все; 'changed' - новые и измененные по сравнению
+            с моделью initial; иначе - список идентификаторов),
+            t0 остальных задач сохраняются из базового расписания
         :return: оптимальное t0 для каждой задачи
         """
         assert isinstance(task_manager, TaskManager)
-        self._make_baseline(task_manager, t_max)
-        self._do_optimize(task_manager, t_max)
+        with self._timer('freeze'):
+            model = task_manager.freeze()
+        if initial is None and revisit is None:
+            return self._optimize_model(model, t_max)
+
+        root_start_times = self._make_initial(model, t_max, initial)
+        if revisit is None:
+            return self._optimize_model(model, t_max, root_start_times)
+
+        fixed = _np.ones(len(model.root_ids), dtype=bool)
+        fixed[self._get_revisited(model, initial, revisit)] = False
+        results = self._optimize_model(
+            model.restrict(
+                _np.where(fixed, root_start_times, model.t0_min),
+                _np.where(fixed, root_start_times, model.t0_max)
+            ),
+            t_max, root_start_times
+        )
+        # Результаты - по исходной модели (с исходными окнами t0)
+        self.results_ = OptimizationResults.from_model(
+            model, results.start_times_array, self._metric, t_max,
+            score=results.score, periodic=self._periodic
+        )
         return self.results_
 
-    def _make_baseline(self, task_manager, t_max):
+    @staticmethod
+    def _make_initial(model, t_max, initial):
+        """
+        Формирование t0 корневых задач базового расписания
+        :param model: компактная модель набора задач
+        :param t_max: максимальная эпоха моделирования
+        :param initial: словарь t0 корневых задач или результаты
+            предыдущей оптимизации (None - t0_min)
+        :return: массив t0 корневых задач (по root_ids)
+        """
+        if initial is None:
+            return model.t0_min.copy()
+        unchanged = set()
+        if isinstance(initial, OptimizationResults):
+            # t0 корневых задач до применения ограничений: цепочки
+            # сохраняются целиком, в т.ч. если ограничение сдвинуло
+            # только корневую задачу
+            if initial.model is not None:
+                source = initial.model
+                start_times = initial.start_times_array
+                # Ограничения могут сдвинуть t0 за пределы окна -
+                # t0 неизмененных корневых задач сохраняются без проверки
+                unchanged = set(range(len(model.root_ids))).difference(
+                    model.get_changed_roots(initial.model).tolist())
+            else:
+                source = model
+                start_times = initial.get_input()[0]
+            initial = dict(zip(
+                source.root_names,
+                source.get_root_start_times(start_times, raw=True).tolist()
+            ))
+
+        root_start_times = model.t0_min.copy()
+        for root, name in enumerate(model.root_names):
+            t0 = initial.get(name)
+            if t0 is not None and (root in unchanged or
+                                   t0 in model.get_start_times(root, t_max)):
+                root_start_times[root] = t0
+        return root_start_times
+
+    @staticmethod
+    def _get_revisited(model, initial, revisit):
+        """
+        Получение корневых задач, t0 которых оптимизируются
+        :param model: компактная модель набора задач
+        :param initial: словарь t0 корневых задач или результаты
+            предыдущей оптимизации
+        :param revisit: 'changed' или список идентификаторов корневых задач
+        :return: массив позиций корневых задач в root_ids
+        """
+        positions = dict((name, r) for r, name in enumerate(model.root_names))
+        if revisit != 'changed':
+            for name in revisit:
+                if name not in positions:
+                    raise RuntimeError(f'Unknown root task "{name}"')
+            return _np.array(
+                [positions[name] for name in revisit], dtype=_np.int64)
+
+        if isinstance(initial, OptimizationResults):
+            if initial.model is not None:
+                return model.get_changed_roots(initial.model)
+            initial = initial.start_times
+        if initial is None:
+            return _np.arange(len(model.root_ids))
+        return _np.array(
+            [r for name, r in positions.items() if name not in initial],
+            dtype=_np.int64)
+
+    def _optimize_model(self, model, t_max, root_start_times=None):
+        """
+        Оптимизация по компактной модели набора задач
+        :param model: компактная модель набора задач
+        :param t_max: максимальная эпоха моделирования
+        :param root_start_times: массив t0 корневых задач базового
+            расписания (None - model.t0_min)
+        :return: результаты оптимизации
+        """
+        self.cache_ = None
+        if self._cache_memory:
+            self.cache_ = ScoreCache(self._cache_memory)
+        instrumentation = self.instrumentation
+        with self._timer('baseline'):
+            self._make_baseline(model, t_max, root_start_times)
+        if instrumentation is not None:
+            instrumentation.emit(
+                'start', optimizer=type(self).__name__, n_tasks=len(model),
+                t_max=t_max, score=self.results_.score
+            )
+        with self._timer('optimize'):
+            self._do_optimize(model, t_max)
+        if instrumentation is not None:
+            if self.cache_ is not None:
+                instrumentation.count('cache_hits', self.cache_.hits)
+                instrumentation.count('cache_misses', self.cache_.misses)
+            instrumentation.emit('finish', score=self.results_.score)
+        return self.results_
+
+    def _make_baseline(self, model, t_max, root_start_times=None):
         """
         Получение базового расписания
-        :param task_manager: менеджер задач
+        :param model: компактная модель набора задач
         :param t_max: максимальная эпоха моделирования
+        :param root_start_times: массив t0 корневых задач
+            (None - model.t0_min)
         """
-        root_start_times = dict()
-        for root_task in task_manager.root_tasks.values():
-            root_start_times[root_task.name] = root_task.t0_min
-        self.results_ = self._evaluate(
-            root_start_times, task_manager, t_max
-        )
+        if root_start_times is None:
+            root_start_times = model.t0_min
+        self.results_ = self._evaluate(root_start_times, model, t_max)
 
-    def _evaluate(self, root_start_times, task_manager, t_max):
+    def _evaluate(self, root_start_times, model, t_max):
         """
         Расчет параметров расписания для заданных значений t0
-        :param root_start_times: t0 для корневых задач
-        :param task_manager: менеджер задач
+        :param root_start_times: массив t0 корневых задач (по root_ids)
+        :param model: компактная модель набора задач
         :param t_max: максимальная эпоха моделирования
         :return: t0 для каждой задачи, расписание,
                  уровни загрузки системы, значение метрики
         """
-        start_times, tasks_data = \
-            task_manager.make_model_input(root_start_times)
-        return OptimizationResults(
-            start_times, tasks_data, self._metric, t_max
-        )
+        with self._timer('results'):
+            return OptimizationResults.from_model(
+                model, model.make_start_times(root_start_times),
+                self._metric, t_max, periodic=self._periodic
+            )
+
+    def _timer(self, name):
+        """
+        Учет времени выполнения этапа (with self._timer(...))
+        :param name: название этапа
+        :return: контекстный менеджер (пустой, если статистика
+                 не собирается)
+        """
+        if self.instrumentation is None:
+            return _NO_TIMER
+        return self.instrumentation.timer(name)
 
     @abc.abstractmethod
-    def _do_optimize(self, task_manager, t_max):
+    def _do_optimize(self, model, t_max):
         """
         Непосредственно оптимизация
-        :param task_manager: менеджер задач
+        :param model: компактная модель набора задач
         :param t_max: максимальная эпоха моделирования
         """
         pass
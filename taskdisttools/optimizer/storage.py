@@ -0,0 +1,112 @@
+"""
+Сохранение и загрузка результатов оптимизации
+"""
+
+
+# =============================================================================
+
+
+import os
+import json
+import numpy as _np
+from taskdisttools.task import save_model, load_model, make_name_array
+from taskdisttools.task import TaskData
+from taskdisttools.utils import make_task_arrays
+from .optimizer import OptimizationResults
+
+
+# =============================================================================
+
+
+__all__ = [
+    'save_results',
+    'load_results',
+]
+
+
+# =============================================================================
+
+
+def save_results(path, results, *, save_loading=True):
+    """
+    Сохранение результатов оптимизации в каталог (по файлу .npy
+    на массив, параметры - в meta.json)
+     - результаты, сформированные по компактной модели, сохраняются
+       вместе с моделью (подкаталог model) и массивом t0 по номерам задач
+     - иначе сохраняются таблица идентификаторов задач и массивы t0,
+       частот, продолжительностей и "весов"
+    :param path: путь к каталогу (создается при необходимости)
+    :param results: результаты оптимизации
+    :param save_loading: флаг сохранения уровней загрузки системы
+    """
+    assert isinstance(results, OptimizationResults)
+    os.makedirs(path, exist_ok=True)
+    if results.is_model_backed:
+        save_model(os.path.join(path, 'model'), results.model)
+        arrays = {'start_times': results.start_times_array}
+    else:
+        start_times, tasks_data = results.get_input()
+        t0, frequency, span, weight = make_task_arrays(start_times, tasks_data)
+        arrays = {
+            'names': make_name_array(list(start_times.keys())),
+            'start_times': t0,
+            'frequency': frequency,
+            'span': span,
+            'weight': weight,
+        }
+    if save_loading:
+        arrays['loading'] = results.loading
+
+    for name, values in arrays.items():
+        _np.save(os.path.join(path, name + '.npy'), _np.asarray(values))
+    score = results.score
+    with open(os.path.join(path, 'meta.json'), 'w') as file:
+        json.dump({
+            't_max': int(results.t_max),
+            'score': None if score is None else float(score),
+        }, file)
+
+
+def load_results(path, metric=None, *, mmap_mode='r'):
+    """
+    Загрузка результатов оптимизации из каталога
+     - значение метрики не пересчитывается, сохраненная загрузка системы
+       отображается в память (при mmap_mode='r' массив только для чтения)
+    :param path: путь к каталогу
+    :param metric: оптимизируемая метрика (для повторного расчета)
+    :param mmap_mode: режим отображения массивов в память
+        (см. np.load, None - массивы считываются)
+    :return: результаты оптимизации
+    """
+    def load(name):
+        return _np.load(os.path.join(path, name + '.npy'),
+                        mmap_mode=mmap_mode)
+
+    with open(os.path.join(path, 'meta.json')) as file:
+        meta = json.load(file)
+    t_max, score = meta['t_max'], meta['score']
+
+    if os.path.isdir(os.path.join(path, 'model')):
+        model = load_model(os.path.join(path, 'model'), mmap_mode=mmap_mode)
+        results = OptimizationResults.from_model(
+            model, load('start_times'), metric, t_max, score=score)
+    else:
+        names = load('names').tolist()
+        weight = load('weight')
+        weight = list(_np.array(weight)) if weight.ndim > 1 \
+            else weight.tolist()
+        tasks_data = dict(
+            (name, TaskData(frequency=f, span=s, weight=w))
+            for name, f, s, w in zip(
+                names, load('frequency').tolist(), load('span').tolist(),
+                weight
+            )
+        )
+        results = OptimizationResults(
+            dict(zip(names, load('start_times').tolist())), tasks_data,
+            metric, t_max, score=score
+        )
+
+    if os.path.exists(os.path.join(path, 'loading.npy')):
+        results.loading = load('loading')
+    return results
@@ -1,2 +1,6 @@
 from .task import *
+from .model import *
 from .manager import *
+from .node_manager import *
+from .storage import *
+from .catalog import *
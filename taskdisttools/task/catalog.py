@@ -0,0 +1,433 @@
+"""
+Массовая загрузка набора задач из таблиц (CSV, JSON, массивы NumPy)
+"""
+
+
+# =============================================================================
+
+
+import gc
+import os
+import csv
+import json
+import contextlib
+import numpy as _np
+from taskdisttools.constraint import DelayConstraint, PriorityConstraint
+from taskdisttools.constraint import StepConstraint
+from taskdisttools.task import Task, RootTask, TaskModel, TaskManager
+
+
+# =============================================================================
+
+
+__all__ = [
+    'load_catalog',
+]
+
+
+# =============================================================================
+
+
+# Виды ограничений (значение столбца type таблицы ограничений)
+_CONSTRAINT_TYPES = {
+    'step': StepConstraint,
+    'delay': DelayConstraint,
+    'priority': PriorityConstraint,
+}
+
+# Префикс столбцов "весов" по ресурсам (weight.<ресурс>)
+_WEIGHT_PREFIX = 'weight.'
+
+
+# =============================================================================
+
+
+def load_catalog(tasks, constraints=None, *, freeze=False, manager=None):
+    """
+    Массовая загрузка набора задач
+     - таблица задач: name, span (обязательные), parent (родительская
+       задача, пусто - корневая задача), delay (задержка запуска
+       зависимой задачи, по умолчанию 0), frequency (обязателен для
+       корневых задач), t0_min (по умолчанию 0), t0_max (пусто - не
+       ограничено), weight (по умолчанию 1) или weight.<ресурс>
+       ("веса" по ресурсам, пусто - 0)
+     - таблица ограничений: task, type (step, delay, priority), target
+       (пусто для step), value (шаг или максимальная задержка)
+     - порядок задач - порядок строк (родительская задача может
+       следовать за зависимыми); граф зависимостей и ограничения
+       проверяются один раз для всего набора
+    :param tasks: таблица задач - путь к файлу CSV или JSON (список
+        записей или словарь столбцов), словарь столбцов, список записей
+        или массив записей NumPy
+    :param constraints: таблица ограничений (аналогично,
+        None - без ограничений)
+    :param freeze: флаг формирования компактной модели (без объектов
+        задач, эквивалентна TaskManager.freeze())
+    :param manager: менеджер задач, в который добавляются задачи
+        (None - новый TaskManager; не используется при freeze=True)
+    :return: менеджер задач или компактная модель набора задач
+    """
+    # Массовое создание объектов - без промежуточных сборок мусора
+    with _paused_gc():
+        return _load_catalog(tasks, constraints, freeze, manager)
+
+
+# =============================================================================
+
+
+@contextlib.contextmanager
+def _paused_gc():
+    """Приостановка автоматической сборки мусора на время блока кода"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _load_catalog(tasks, constraints, freeze, manager):
+    """
+    Массовая загрузка набора задач (см. load_catalog)
+    :param tasks: таблица задач
+    :param constraints: таблица ограничений (None - без ограничений)
+    :param freeze: флаг формирования компактной модели
+    :param manager: менеджер задач (None - новый TaskManager)
+    :return: менеджер задач или компактная модель набора задач
+    """
+    table, n = _read_table(tasks)
+    names = _get_column(table, 'name', n, required=True)
+    index = dict(zip(names, range(n)))
+    if len(index) < n:
+        seen = set()
+        for name in names:
+            if name in seen:
+                raise RuntimeError(f'Duplicate task "{name}"')
+            seen.add(name)
+
+    parent = [
+        -1 if name is None else index.get(name, -2)
+        for name in _get_column(table, 'parent', n)
+    ]
+    if -2 in parent:
+        name = table['parent'][parent.index(-2)]
+        raise RuntimeError(f'Task "{name}" not found')
+    parent = _np.array(parent, dtype=_np.int64)
+    depth = _get_depth(names, parent)
+
+    span = _get_numbers(table, 'span', n, required=True)
+    delay = _get_numbers(table, 'delay', n, 0)
+    frequency = _get_numbers(table, 'frequency', n, 0)
+    t0_min = _get_numbers(table, 't0_min', n, 0)
+    t0_max = _get_numbers(table, 't0_max', n, -1)
+    roots = _np.flatnonzero(parent < 0)
+    if _np.any(frequency[roots] <= 0):
+        name = names[roots[_np.argmax(frequency[roots] <= 0)]]
+        raise RuntimeError(f'Root task "{name}" has no frequency')
+
+    resources = sorted(
+        column[len(_WEIGHT_PREFIX):] for column in table.keys()
+        if column.startswith(_WEIGHT_PREFIX)
+    )
+    if len(resources) > 0:
+        weight = _np.column_stack([
+            _get_numbers(
+                table, _WEIGHT_PREFIX + name, n, 0, integer=False)
+            for name in resources
+        ])
+    else:
+        weight = _get_numbers(table, 'weight', n, 1, integer=False)
+
+    task_constraints = dict()
+    if constraints is not None:
+        task_constraints = _make_constraints(constraints, index)
+
+    if freeze:
+        return _make_model(
+            names, parent, depth, roots, span, delay, frequency, t0_min,
+            t0_max, weight, resources, task_constraints)
+
+    parent = parent.tolist()
+    span = span.tolist()
+    delay = delay.tolist()
+    frequency = frequency.tolist()
+    t0_min = t0_min.tolist()
+    t0_max = [None if value < 0 else value for value in t0_max.tolist()]
+    weight = weight.tolist()
+    if len(resources) > 0:
+        weight = [dict(zip(resources, row)) for row in weight]
+    objects = [
+        Task(names[i], span[i], weight=weight[i]) if parent[i] >= 0
+        else RootTask(names[i], span[i], frequency[i], t0_min=t0_min[i],
+                      t0_max=t0_max[i], weight=weight[i])
+        for i in range(n)
+    ]
+    for i in range(n):
+        if parent[i] >= 0:
+            objects[parent[i]].add_dependent_task(objects[i], delay[i])
+
+    if manager is None:
+        manager = TaskManager()
+    for i in roots.tolist():
+        manager.add_root_task(objects[i])
+    for name, cnts in task_constraints.items():
+        for cnt in cnts:
+            manager.add_constraint(name, cnt)
+    # Проверка ограничений (циклы) при компиляции плана
+    manager.constraint_plan
+    return manager
+
+
+def _read_table(source):
+    """
+    Чтение таблицы
+    :param source: путь к файлу CSV или JSON, словарь столбцов, список
+        записей или массив записей NumPy
+    :return: словарь столбцов, кол-во строк
+    """
+    if isinstance(source, (str, os.PathLike)):
+        if os.fspath(source).lower().endswith('.json'):
+            with open(source, encoding='utf-8') as f:
+                source = json.load(f)
+        else:
+            with open(source, newline='', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                header = next(reader, None)
+                if header is None:
+                    return dict(), 0
+                columns = list(zip(*reader)) or [()] * len(header)
+            if len(columns) != len(header):
+                raise RuntimeError('Columns have different lengths')
+            return dict(zip(header, columns)), len(columns[0])
+
+    if isinstance(source, _np.ndarray):
+        return dict(
+            (name, source[name]) for name in source.dtype.names
+        ), len(source)
+    if isinstance(source, dict):
+        lengths = set(len(values) for values in source.values())
+        if len(lengths) > 1:
+            raise RuntimeError('Columns have different lengths')
+        return dict(source), lengths.pop() if len(lengths) > 0 else 0
+
+    names = dict()
+    for record in source:
+        names.update(dict.fromkeys(record.keys()))
+    return dict(
+        (name, [record.get(name) for record in source]) for name in names
+    ), len(source)
+
+
+def _get_column(table, name, n, *, required=False):
+    """
+    Получение значений текстового столбца
+    :param table: словарь столбцов
+    :param name: название столбца
+    :param n: кол-во строк
+    :param required: флаг обязательного столбца (пустые значения
+        не допускаются)
+    :return: список значений (None - пустое значение)
+    """
+    values = table.get(name)
+    if values is None:
+        if required:
+            raise RuntimeError(f'Column "{name}" not found')
+        return [None] * n
+
+    if isinstance(values, _np.ndarray):
+        values = values.tolist()
+    values = [
+        None if value is None or value == '' or value != value else value
+        for value in values
+    ]
+    if required and None in values:
+        raise RuntimeError(f'Missing value in column "{name}"')
+    return values
+
+
+def _get_numbers(table, name, n, default=None, *, integer=True,
+                 required=False):
+    """
+    Получение значений числового столбца
+    :param table: словарь столбцов
+    :param name: название столбца
+    :param n: кол-во строк
+    :param default: значение по умолчанию (пустые значения и отсутствующий
+        столбец; None - пустые значения не допускаются)
+    :param integer: флаг целых значений (иначе - целые или вещественные
+        в зависимости от значений)
+    :param required: флаг обязательного столбца
+    :return: массив чисел
+    """
+    values = table.get(name)
+    if values is None:
+        if required:
+            raise RuntimeError(f'Column "{name}" not found')
+        return _np.full(n, default, dtype=_np.int64)
+
+    if isinstance(values, _np.ndarray) and values.dtype.kind in 'biuf':
+        if values.dtype.kind == 'f':
+            missing = _np.isnan(values)
+            if _np.any(missing):
+                if default is None:
+                    raise RuntimeError(f'Missing value in column "{name}"')
+                values = _np.where(missing, default, values)
+            if not integer:
+                return values.astype(_np.float64)
+        return values.astype(_np.int64)
+
+    if isinstance(values, _np.ndarray):
+        values = values.tolist()
+    cast = int if integer else _to_number
+    values = [
+        default if value is None or value == '' or value != value
+        else cast(value)
+        for value in values
+    ]
+    if default is None and None in values:
+        raise RuntimeError(f'Missing value in column "{name}"')
+    return _np.array(values, dtype=_np.int64 if integer else None)
+
+
+def _to_number(value):
+    """
+    Преобразование значения "веса" в число
+    :param value: число или строка
+    :return: целое или вещественное число
+    """
+    if not isinstance(value, str):
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def _get_depth(names, parent):
+    """
+    Расчет уровней задач в графе зависимостей (удвоением ссылок
+    на предков) с проверкой циклов
+    :param names: идентификаторы задач
+    :param parent: номера строк родительских задач (-1 для корневых)
+    :return: массив уровней (0 для корневых задач)
+    """
+    depth = (parent >= 0).astype(_np.int64)
+    ancestor = parent.copy()
+    ids = _np.flatnonzero(parent >= 0)
+    for _ in range(len(parent).bit_length() + 1):
+        ids = ids[ancestor[ids] >= 0]
+        if len(ids) == 0:
+            return depth
+        depth[ids] += depth[ancestor[ids]]
+        ancestor[ids] = ancestor[ancestor[ids]]
+
+    name = names[int(ids[0])]
+    raise RuntimeError(f'Circular dependency on task "{name}"')
+
+
+def _make_constraints(source, index):
+    """
+    Формирование ограничений
+    :param source: таблица ограничений
+    :param index: словарь номеров строк задач
+    :return: словарь списков ограничений задач
+    """
+    table, n = _read_table(source)
+    tasks = _get_column(table, 'task', n, required=True)
+    types = _get_column(table, 'type', n, required=True)
+    targets = _get_column(table, 'target', n)
+    values = _get_numbers(table, 'value', n, required=True).tolist()
+
+    constraints = dict()
+    for task, kind, target, value in zip(tasks, types, targets, values):
+        cls = _CONSTRAINT_TYPES.get(kind)
+        if cls is None:
+            raise RuntimeError(f'Unknown constraint type "{kind}"')
+        for name in (task, target):
+            if name is not None and name not in index:
+                raise RuntimeError(f'Task "{name}" not found')
+        if cls is StepConstraint:
+            cnt = cls(value)
+        elif target is None:
+            raise RuntimeError(f'Constraint of task "{task}" has no target')
+        else:
+            cnt = cls(target, value)
+        constraints.setdefault(task, list()).append(cnt)
+    return constraints
+
+
+def _make_model(names, parent, depth, roots, span, delay, frequency, t0_min,
+                t0_max, weight, resources, constraints):
+    """
+    Формирование компактной модели набора задач
+     - порядок задач как в TaskManager.freeze(): корневые задачи в порядке
+       строк, за каждой - ее зависимые задачи в глубину
+     - позиции задач, корневые задачи цепочек и смещения рассчитываются
+       по уровням графа зависимостей
+    :param names: идентификаторы задач (по строкам)
+    :param parent: номера строк родительских задач (-1 для корневых)
+    :param depth: уровни задач в графе зависимостей
+    :param roots: номера строк корневых задач
+    :param span: продолжительности выполнения
+    :param delay: задержки запуска зависимых задач
+    :param frequency: частоты выполнения корневых задач
+    :param t0_min: минимальные времена начала корневых задач
+    :param t0_max: максимальные времена начала корневых задач
+        (-1 - не ограничено)
+    :param weight: "веса" задач (массив или матрица задача x ресурс)
+    :param resources: названия ресурсов
+    :param constraints: словарь списков ограничений задач
+    :return: компактная модель набора задач
+    """
+    n = len(parent)
+    by_depth = _np.argsort(depth, kind='stable')
+    bounds = _np.searchsorted(
+        depth[by_depth], _np.arange(depth.max(initial=0) + 2))
+    levels = [
+        by_depth[start:end] for start, end in zip(bounds[:-1], bounds[1:])
+    ]
+
+    # Размеры поддеревьев (снизу вверх)
+    size = _np.ones(n, dtype=_np.int64)
+    for ids in levels[:0:-1]:
+        _np.add.at(size, parent[ids], size[ids])
+
+    # Позиции задач, корневые задачи цепочек и смещения t0 (сверху вниз;
+    # зависимые задачи одной родительской - в порядке строк)
+    position = _np.empty(n, dtype=_np.int64)
+    position[roots] = _np.cumsum(size[roots]) - size[roots]
+    root = _np.arange(n)
+    offset = _np.zeros(n, dtype=_np.int64)
+    for ids in levels[1:]:
+        ids = ids[_np.argsort(parent[ids], kind='stable')]
+        p = parent[ids]
+        before = _np.cumsum(size[ids]) - size[ids]
+        first = _np.ones(len(ids), dtype=bool)
+        first[1:] = p[1:] != p[:-1]
+        before -= before[first][_np.cumsum(first) - 1]
+        position[ids] = position[p] + 1 + before
+        root[ids] = root[p]
+        offset[ids] = offset[p] + span[p] + delay[ids]
+
+    order = _np.empty(n, dtype=_np.int64)
+    order[position] = _np.arange(n)
+    root_number = _np.empty(n, dtype=_np.int64)
+    root_number[roots] = _np.arange(len(roots))
+    parent = parent[order]
+    root = root[order]
+
+    return TaskModel(
+        names=[names[i] for i in order.tolist()],
+        parent=_np.where(parent >= 0, position[parent], -1),
+        root=root_number[root],
+        offset=offset[order],
+        frequency=frequency[root],
+        span=span[order],
+        weight=weight[order],
+        root_ids=position[roots],
+        t0_min=t0_min[roots],
+        t0_max=t0_max[roots],
+        constraints=constraints,
+        resources=resources
+    )
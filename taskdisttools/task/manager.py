@@ -6,10 +6,10 @@
 # =============================================================================
 
 
-from collections import namedtuple
 from collections import defaultdict
-from taskdisttools.task import RootTask
-from taskdisttools.constraint import Constraint
+import numpy as _np
+from taskdisttools.task import RootTask, TaskModel, TaskData
+from taskdisttools.constraint import Constraint, ConstraintPlan
 from taskdisttools.constraint import RelativeConstraint as RelConst
 
 
@@ -24,30 +24,55 @@ __all__ = [
 # =============================================================================
 
 
-_TaskData = namedtuple('_TaskData', 'frequency span weight')
-
-
-# =============================================================================
-
-
 class TaskManager(object):
     """
     Менеджер задач
      - хранение списка задач
      - хранение ограничений
      - формирование ИД для расчета с учетом ограничений
+     - "веса" задач задаются либо скалярами, либо словарями "весов"
+       по ресурсам: если хотя бы у одной задачи "вес" - словарь,
+       скалярные "веса" остальных задач не допускаются (RuntimeError
+       при формировании ИД)
     """
 
     def __init__(self):
         """Инициализация"""
         self._root_tasks = dict()
         self._constraints = defaultdict(list)
+        self._constraint_plan = None
+        self._resources = None
 
     @property
     def root_tasks(self):
         """Получение корневых задач"""
         return self._root_tasks
 
+    @property
+    def resources(self):
+        """
+        Получение названий ресурсов (ключей "весов" задач, заданных
+        словарями; по алфавиту, пустой список - "веса" скалярные)
+         - список кешируется до изменения набора корневых задач
+           или формирования модели (freeze)
+        """
+        if self._resources is None:
+            names = set()
+            for root_task in self._root_tasks.values():
+                self._collect_resources(names, root_task)
+            self._resources = sorted(names)
+        return list(self._resources)
+
+    def get_root_resources(self, name):
+        """
+        Получение названий ресурсов корневой задачи и ее зависимых задач
+        :param name: идентификатор корневой задачи
+        :return: список названий ресурсов (по алфавиту)
+        """
+        names = set()
+        self._collect_resources(names, self._root_tasks[name])
+        return sorted(names)
+
     def add_root_task(self, root_task):
         """
         Добавление корневой задачи
@@ -56,6 +81,31 @@ class TaskManager(object):
         """
         assert isinstance(root_task, RootTask)
         self._root_tasks[root_task.name] = root_task
+        self._resources = None
+        return self
+
+    def remove_root_task(self, name):
+        """
+        Удаление корневой задачи (вместе с зависимыми задачами
+        и их ограничениями)
+        :param name: идентификатор корневой задачи
+        :return: ссылка на объект вызова
+        """
+        tasks = set(self.make_task_input(name, 0)[0].keys())
+        for task, constraints in self._constraints.items():
+            if task in tasks:
+                continue
+            for cnt in constraints:
+                if isinstance(cnt, RelConst) and cnt.target in tasks:
+                    raise RuntimeError(
+                        f'Task "{cnt.target}" is referenced by constraints '
+                        f'of task "{task}"')
+
+        del self._root_tasks[name]
+        for task in tasks:
+            self._constraints.pop(task, None)
+        self._constraint_plan = None
+        self._resources = None
         return self
 
     def add_constraint(self, name, constraint):
@@ -67,8 +117,22 @@ class TaskManager(object):
         """
         assert isinstance(constraint, Constraint)
         self._constraints[name].append(constraint)
+        if self._constraint_plan is not None:
+            # План дополняется без компиляции, если это возможно
+            self._constraint_plan = self._constraint_plan.extend(
+                name, self._constraints[name])
         return self
 
+    @property
+    def constraint_plan(self):
+        """
+        Получение скомпилированного плана применения ограничений
+        (компилируется при первом обращении после изменения ограничений)
+        """
+        if self._constraint_plan is None:
+            self._constraint_plan = ConstraintPlan.compile(self._constraints)
+        return self._constraint_plan
+
     def get_start_times(self, name, t_max):
         """
         Генерация возможных значений t0 для корневой задачи
@@ -82,6 +146,120 @@ class TaskManager(object):
         else:
             return range(task.t0_min, task.t0_max + 1)
 
+    def freeze(self):
+        """
+        Формирование компактной модели текущего набора задач
+        (последующие изменения менеджера на модель не влияют)
+        :return: компактная модель набора задач
+        """
+        index = dict()
+        columns = defaultdict(list)
+        roots = list()
+        # Задачи могли измениться после добавления - ресурсы собираются
+        # заново
+        self._resources = None
+        resources = self.resources
+        for root_pos, root_task in enumerate(self._root_tasks.values()):
+            roots.append(root_task)
+            self._freeze_task(
+                index, columns, root_task, -1, root_pos, 0,
+                root_task.frequency, resources
+            )
+
+        root_ids = [index[task.name] for task in roots]
+        return TaskModel(
+            names=list(index.keys()),
+            parent=columns['parent'],
+            root=columns['root'],
+            offset=columns['offset'],
+            frequency=columns['frequency'],
+            span=columns['span'],
+            weight=columns['weight'],
+            root_ids=root_ids,
+            t0_min=[task.t0_min for task in roots],
+            t0_max=[-1 if task.t0_max is None else task.t0_max
+                    for task in roots],
+            constraints=self._constraints,
+            resources=resources
+        )
+
+    @staticmethod
+    def _freeze_task(index, columns, task, parent, root, offset, frequency,
+                     resources):
+        """
+        Добавление задачи и ее зависимых задач в столбцы модели
+        :param index: словарь номеров задач
+        :param columns: словарь столбцов модели
+        :param task: задача
+        :param parent: номер родительской задачи
+        :param root: позиция корневой задачи
+        :param offset: смещение t0 относительно t0 корневой задачи
+        :param frequency: частота выполнения
+        :param resources: названия ресурсов
+        """
+        values = dict(
+            parent=parent, root=root, offset=offset, frequency=frequency,
+            span=task.span, weight=TaskManager._make_weight(task, resources)
+        )
+        i = index.setdefault(task.name, len(index))
+        for key, value in values.items():
+            if i < len(columns[key]):
+                columns[key][i] = value
+            else:
+                columns[key].append(value)
+
+        for dependent_task, delay in task.dependent_tasks:
+            TaskManager._freeze_task(
+                index, columns, dependent_task, i, root,
+                offset + task.span + delay, frequency, resources
+            )
+
+    def get_affected_tasks(self, name):
+        """
+        Получение задач, t0 которых зависит от t0 корневой задачи
+        :param name: идентификатор корневой задачи
+        :return: список идентификаторов задач (сама задача, зависимые
+                 задачи и задачи, связанные с ними ограничениями)
+        """
+        affected = list(self.make_task_input(name, 0)[0].keys())
+        affected_set = set(affected)
+
+        targeted_by = defaultdict(list)
+        for task, constraints in self._constraints.items():
+            for cnt in constraints:
+                if isinstance(cnt, RelConst):
+                    targeted_by[cnt.target].append(task)
+
+        for task in affected:
+            for other in targeted_by[task]:
+                if other not in affected_set:
+                    affected_set.add(other)
+                    affected.append(other)
+
+        return affected
+
+    def make_task_input(self, name, t0, *, resources=None):
+        """
+        Формирование ИД для корневой задачи и ее зависимых задач
+        (без применения ограничений)
+        :param name: идентификатор корневой задачи
+        :param t0: t0 корневой задачи
+        :param resources: названия ресурсов (None - по всем задачам)
+        :return: t0 и данные по задачам
+        """
+        task = self._root_tasks[name]
+        if resources is None:
+            resources = self.resources
+        start_times = dict()
+        tasks_data = dict()
+        self._append_task_input(
+            start_times, tasks_data, task, t0, resources)
+        self._process_dependent_tasks(
+            start_times, tasks_data, task.dependent_tasks,
+            t0, task.span, task.frequency, resources
+        )
+        return start_times, tasks_data
+
     def make_model_input(self, root_start_times, *,
                          apply_constraints=True):
         """
@@ -90,67 +268,60 @@ class TaskManager(object):
         :param apply_constraints: флаг применения ограничений
         :return: t0 и данные по всем задачам
         """
+        start_times, tasks_data = self.make_roots_input(root_start_times)
+        if apply_constraints:
+            start_times = self._apply_constraints(start_times)
+        return start_times, tasks_data
+
+    def make_roots_input(self, root_start_times, names=None, *,
+                         resources=None):
+        """
+        Формирование ИД для части корневых задач и их зависимых задач
+        (без применения ограничений)
+        :param root_start_times: t0 для корневых задач
+        :param names: идентификаторы корневых задач (None - все)
+        :param resources: названия ресурсов (None - по всем задачам)
+        :return: t0 и данные по задачам
+        """
+        if names is None:
+            names = self._root_tasks.keys()
+        if resources is None:
+            resources = self.resources
         start_times = dict()
         tasks_data = dict()
-        for task in self._root_tasks.values():
-            t0 = root_start_times[task.name]
-            self._append_task_input(start_times, tasks_data, task, t0)
+        for name in names:
+            task = self._root_tasks[name]
+            t0 = root_start_times[name]
+            self._append_task_input(
+                start_times, tasks_data, task, t0, resources)
             self._process_dependent_tasks(
                 start_times, tasks_data, task.dependent_tasks,
-                t0, task.span, task.frequency
+                t0, task.span, task.frequency, resources
             )
-
-        if apply_constraints:
-            start_times = self._apply_constraints(start_times)
         return start_times, tasks_data
 
-    def _apply_constraints(self, start_times):
+    def resolve_constraints(self, start_times, tasks):
         """
-        Применение ограничений
-        :param start_times: словарь исходных значений t0
+        Повторное применение ограничений для части задач
+        (ограничения остальных задач считаются уже разрешенными)
+        :param start_times: словарь значений t0 (для задач tasks - исходных)
+        :param tasks: идентификаторы задач
         :return: словарь скорректированных значений t0
         """
-        resolved_tasks = set()
-        for task in self._constraints.keys():
-            self._resolve_constraints(
-                start_times, task, resolved_tasks, set()
-            )
-
-        return start_times
+        return self.constraint_plan.subset(tasks).resolve(start_times)
 
-    def _resolve_constraints(self, start_times, task, resolved, unresolved):
+    def _apply_constraints(self, start_times):
         """
-        Разрешение ограничений
+        Применение ограничений
         :param start_times: словарь исходных значений t0
-        :param task: идентификатор текущей задачи
-        :param resolved: множество задач с разрешенными ограничениями
-        :param unresolved: множество задач с неразрешенными ограничениями
+        :return: словарь скорректированных значений t0
         """
-        if task in resolved or task not in self._constraints:
-            return
-        if task in unresolved:
-            raise RuntimeError(f'Circular constraints on task "{task}"')
-
-        unresolved.add(task)
-        constraints = sorted(
-            self._constraints[task], key=lambda c: isinstance(c, RelConst))
-
-        for cnt in constraints:
-            if isinstance(cnt, RelConst):
-                self._resolve_constraints(
-                    start_times, cnt.target, resolved, unresolved)
-            start_times[task] = cnt.apply(start_times[task], start_times)
-
-        for cnt in constraints:
-            if not cnt.test(start_times[task], start_times):
-                raise RuntimeError(f'Constraints conflict on task "{task}"')
-
-        unresolved.remove(task)
-        resolved.add(task)
+        return self.constraint_plan.resolve(start_times)
 
     @staticmethod
     def _process_dependent_tasks(start_times, tasks_data, dependent_tasks,
-                                 parent_t0, parent_span, parent_frequency):
+                                 parent_t0, parent_span, parent_frequency,
+                                 resources):
         """
         Обработка зависимых задач
         :param start_times: словарь t0
@@ -159,34 +330,65 @@ class TaskManager(object):
         :param parent_t0: t0 родительской задачи
         :param parent_span: длительность выполнения родительской задачи
         :param parent_frequency: частота запуска родительской задачи
+        :param resources: названия ресурсов
         """
         for task, delay in dependent_tasks:
             task_t0 = parent_t0 + parent_span + delay
             TaskManager._append_task_input(
                 start_times, tasks_data,
-                task, task_t0, parent_frequency
+                task, task_t0, resources, parent_frequency
             )
             TaskManager._process_dependent_tasks(
                 start_times, tasks_data, task.dependent_tasks,
-                task_t0, task.span, parent_frequency
+                task_t0, task.span, parent_frequency, resources
             )
 
     @staticmethod
     def _append_task_input(start_times, tasks_data,
-                           task, t0, frequency=None):
+                           task, t0, resources, frequency=None):
         """
         Добавление ИД по задаче
         :param start_times: словарь t0
         :param tasks_data: данные задач
         :param task: задача
         :param t0: время запуска
+        :param resources: названия ресурсов
         :param frequency: частота выполнения
         """
         if isinstance(task, RootTask):
             frequency = task.frequency
         start_times[task.name] = t0
-        tasks_data[task.name] = _TaskData(
+        tasks_data[task.name] = TaskData(
             frequency=frequency,
             span=task.span,
-            weight=task.weight
+            weight=TaskManager._make_weight(task, resources)
         )
+
+    @staticmethod
+    def _collect_resources(names, task):
+        """
+        Сбор названий ресурсов задачи и ее зависимых задач
+        :param names: множество названий (дополняется)
+        :param task: задача
+        """
+        if isinstance(task.weight, dict):
+            names.update(task.weight.keys())
+        for dependent_task, _ in task.dependent_tasks:
+            TaskManager._collect_resources(names, dependent_task)
+
+    @staticmethod
+    def _make_weight(task, resources):
+        """
+        Формирование "веса" задачи
+        :param task: задача
+        :param resources: названия ресурсов
+        :return: "вес" задачи (скалярный, если ресурсы не заданы,
+                 иначе - массив "весов" по ресурсам)
+        """
+        if len(resources) == 0:
+            return task.weight
+        if not isinstance(task.weight, dict):
+            raise RuntimeError(
+                f'Task "{task.name}" has scalar weight, but other tasks '
+                f'have resource weights ({", ".join(resources)})')
+        return _np.array([task.weight.get(name, 0) for name in resources])
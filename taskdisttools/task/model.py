@@ -0,0 +1,320 @@
+"""
+Компактная модель набора задач
+"""
+
+
+# =============================================================================
+
+
+import copy
+from collections import namedtuple
+from collections import defaultdict
+import numpy as _np
+from taskdisttools.constraint import ConstraintPlan
+from taskdisttools.constraint import RelativeConstraint as RelConst
+
+
+# =============================================================================
+
+
+__all__ = [
+    'TaskData',
+    'TaskModel',
+]
+
+
+# =============================================================================
+
+
+# Данные задачи для расчета (частота, продолжительность выполнения, вес)
+TaskData = namedtuple('TaskData', 'frequency span weight')
+
+
+# =============================================================================
+
+
+class TaskModel(object):
+    """
+    Компактная модель набора задач (структура массивов)
+     - задачи пронумерованы в порядке формирования ИД менеджером задач
+     - идентификаторы задач используются только на границе API
+     - объект неизменяем и при копировании не дублируется
+     - "веса" задач по нескольким ресурсам - матрица weight
+       (задача x ресурс), названия ресурсов - resources
+    """
+
+    def __init__(self, names, parent, root, offset, frequency, span, weight,
+                 root_ids, t0_min, t0_max, constraints, *, resources=None):
+        """
+        Инициализация
+        :param names: идентификаторы задач (по номерам)
+        :param parent: номера родительских задач (-1 для корневых)
+        :param root: позиции корневых задач в root_ids
+        :param offset: смещения t0 относительно t0 корневой задачи
+        :param frequency: частоты выполнения
+        :param span: продолжительности выполнения
+        :param weight: "веса" при расчете загрузки системы
+            (массив или матрица задача x ресурс)
+        :param root_ids: номера корневых задач
+        :param t0_min: минимальные времена начала корневых задач
+        :param t0_max: максимальные времена начала корневых задач
+            (-1 если не ограничено)
+        :param constraints: словарь списков ограничений задач
+        :param resources: названия ресурсов (по столбцам матрицы "весов";
+            None - скалярные "веса")
+        """
+        self.names = list(names)
+        self.index = dict((name, i) for i, name in enumerate(self.names))
+        self.parent = _np.asarray(parent, dtype=_np.int64)
+        self.root = _np.asarray(root, dtype=_np.int64)
+        self.offset = _np.asarray(offset, dtype=_np.int64)
+        self.frequency = _np.asarray(frequency, dtype=_np.int64)
+        self.span = _np.asarray(span, dtype=_np.int64)
+        self.weight = _np.asarray(weight)
+        self.root_ids = _np.asarray(root_ids, dtype=_np.int64)
+        self.t0_min = _np.asarray(t0_min, dtype=_np.int64)
+        self.t0_max = _np.asarray(t0_max, dtype=_np.int64)
+        self.resources = list(resources or ())
+        self.plan = self._compile_plan(constraints)
+        self._tasks_data = None
+
+    def __deepcopy__(self, memo):
+        """Модель неизменяема - копирование не требуется"""
+        return self
+
+    def __len__(self):
+        """Кол-во задач"""
+        return len(self.names)
+
+    @property
+    def root_names(self):
+        """Получение идентификаторов корневых задач"""
+        return [self.names[i] for i in self.root_ids]
+
+    @property
+    def tasks_data(self):
+        """Получение словаря данных задач (как в TaskManager)"""
+        if self._tasks_data is None:
+            weight = self._get_weights()
+            self._tasks_data = dict(
+                (name, TaskData(
+                    frequency=int(self.frequency[i]),
+                    span=int(self.span[i]),
+                    weight=weight[i]
+                ))
+                for i, name in enumerate(self.names)
+            )
+        return self._tasks_data
+
+    def get_start_times(self, root, t_max):
+        """
+        Генерация возможных значений t0 для корневой задачи
+        :param root: позиция корневой задачи в root_ids
+        :param t_max: максимальная эпоха моделирования
+        :return: генератор t0 для корневой задачи
+        """
+        t0_min, t0_max = int(self.t0_min[root]), int(self.t0_max[root])
+        if t0_max < 0:
+            return range(t0_min, t_max)
+        else:
+            return range(t0_min, t0_max + 1)
+
+    def make_start_times(self, root_start_times, *, apply_constraints=True):
+        """
+        Формирование t0 всех задач
+        :param root_start_times: массив t0 корневых задач (по root_ids)
+        :param apply_constraints: флаг применения ограничений
+        :return: массив t0 всех задач
+        """
+        root_start_times = _np.asarray(root_start_times, dtype=_np.int64)
+        start_times = root_start_times[self.root] + self.offset
+        if apply_constraints:
+            self.plan.apply(start_times)
+        return start_times
+
+    def get_affected_tasks(self, root):
+        """
+        Получение задач, t0 которых зависит от t0 корневой задачи
+        :param root: позиция корневой задачи в root_ids
+        :return: массив номеров задач (сама задача, зависимые задачи
+                 и задачи, связанные с ними ограничениями)
+        """
+        affected = _np.flatnonzero(self.root == root).tolist()
+        affected_set = set(affected)
+        for task in affected:
+            for other in self._targeted_by.get(task, ()):
+                if other not in affected_set:
+                    affected_set.add(other)
+                    affected.append(other)
+        return _np.array(affected, dtype=_np.int64)
+
+    def get_root_start_times(self, start_times, *, raw=False):
+        """
+        Получение массива t0 корневых задач
+        :param start_times: словарь t0 (по идентификаторам задач)
+            или массив t0 всех задач
+        :param raw: флаг получения t0 корневых задач до применения
+            ограничений (make_start_times воспроизводит t0 их цепочек):
+            t0 восстанавливается по задаче цепочки, t0 которой ограничения
+            не изменяют (если такой нет - t0 корневой задачи); в словаре
+            могут отсутствовать задачи (t0 отсутствующих корневых
+            задач -1)
+        :return: массив t0 корневых задач (по root_ids)
+        """
+        if not raw:
+            if isinstance(start_times, _np.ndarray):
+                return start_times[self.root_ids]
+            return _np.array(
+                [start_times[name] for name in self.root_names],
+                dtype=_np.int64
+            )
+
+        free = _np.ones(len(self), dtype=bool)
+        free[[task for task, _ in self.plan.steps]] = False
+        if not isinstance(start_times, _np.ndarray):
+            free &= [name in start_times for name in self.names]
+            start_times = _np.array(
+                [start_times.get(name, -1) for name in self.names],
+                dtype=_np.int64
+            )
+        root_start_times = start_times[self.root_ids]
+        tasks = _np.flatnonzero(free)
+        roots, first = _np.unique(self.root[tasks], return_index=True)
+        tasks = tasks[first]
+        root_start_times[roots] = start_times[tasks] - self.offset[tasks]
+        return root_start_times
+
+    def get_changed_roots(self, other):
+        """
+        Поиск корневых задач, данные которых отличаются от данных в другой
+        модели (окно t0, состав, параметры и ограничения зависимых задач)
+        :param other: модель для сравнения
+        :return: массив позиций корневых задач в root_ids
+        """
+        signatures = other._get_root_signatures()
+        return _np.array([
+            root for root, (name, signature) in enumerate(
+                self._get_root_signatures().items())
+            if signatures.get(name) != signature
+        ], dtype=_np.int64)
+
+    def to_dict(self, values):
+        """
+        Преобразование массива значений по задачам в словарь
+        :param values: массив значений (по номерам задач)
+        :return: словарь значений (по идентификаторам задач)
+        """
+        return dict(zip(self.names, values.tolist()))
+
+    def from_dict(self, mapping):
+        """
+        Преобразование словаря значений по задачам в массив
+        :param mapping: словарь значений (по идентификаторам задач)
+        :return: массив значений (по номерам задач)
+        """
+        return _np.array(
+            [mapping[name] for name in self.names], dtype=_np.int64)
+
+    def rescale(self, factor):
+        """
+        Формирование модели для шкалы эпох, укрупненной в factor раз
+        (частоты, продолжительности, смещения, окна t0 и ограничения
+        пересчитываются с округлением)
+        :param factor: коэффициент укрупнения эпох
+        :return: компактная модель набора задач
+        """
+        assert factor >= 1
+        constraints = dict()
+        for task, cnts in self.plan.steps:
+            constraints[self.names[task]] = [
+                cnt for cnt in (cnt.rescale(factor) for cnt, _ in cnts)
+                if cnt is not None
+            ]
+
+        def scale(values, minimum):
+            return _np.maximum(_np.rint(values / factor), minimum)
+
+        return TaskModel(
+            self.names, self.parent, self.root, scale(self.offset, 0),
+            scale(self.frequency, 1), scale(self.span, 1), self.weight,
+            self.root_ids, self.t0_min // factor,
+            _np.where(self.t0_max < 0, -1, self.t0_max // factor),
+            constraints, resources=self.resources
+        )
+
+    def restrict(self, t0_min, t0_max):
+        """
+        Формирование модели с другими окнами t0 корневых задач
+        (остальные данные модели общие)
+        :param t0_min: массив минимальных времен начала корневых задач
+        :param t0_max: массив максимальных времен начала корневых задач
+            (-1 если не ограничено)
+        :return: компактная модель набора задач
+        """
+        model = copy.copy(self)
+        model.t0_min = _np.asarray(t0_min, dtype=_np.int64)
+        model.t0_max = _np.asarray(t0_max, dtype=_np.int64)
+        return model
+
+    def _get_root_signatures(self):
+        """
+        Формирование описаний корневых задач для сравнения моделей
+        :return: словарь описаний (по идентификаторам корневых задач)
+        """
+        constraints = dict(
+            (task, tuple(
+                (type(cnt).__name__, tuple(sorted(vars(cnt).items())))
+                for cnt, _ in cnts
+            ))
+            for task, cnts in self.plan.steps
+        )
+        weight = self.weight.tolist()
+        if len(self.resources) > 0:
+            weight = [dict(zip(self.resources, row)) for row in weight]
+        tasks = defaultdict(list)
+        for i, name in enumerate(self.names):
+            parent = int(self.parent[i])
+            tasks[int(self.root[i])].append((
+                name, self.names[parent] if parent >= 0 else None,
+                int(self.offset[i]), int(self.frequency[i]),
+                int(self.span[i]), weight[i], constraints.get(i, ())
+            ))
+        return dict(
+            (name, (int(self.t0_min[root]), int(self.t0_max[root]),
+                    tuple(tasks[root])))
+            for root, name in enumerate(self.root_names)
+        )
+
+    def _get_weights(self):
+        """
+        Получение "весов" задач (как в TaskManager: числа или массивы
+        "весов" по ресурсам)
+        :return: список "весов" (по номерам задач)
+        """
+        if self.weight.ndim > 1:
+            return list(_np.array(self.weight))
+        return self.weight.tolist()
+
+    def _compile_plan(self, constraints):
+        """
+        Компиляция плана применения ограничений (столбцы - номера задач)
+        :param constraints: словарь списков ограничений задач
+        :return: план применения ограничений
+        """
+        plan = ConstraintPlan.compile(constraints)
+        columns = [self.index[name] for name in plan.columns]
+
+        self._targeted_by = defaultdict(list)
+        steps = list()
+        for column, cnts in plan.steps:
+            task = columns[column]
+            steps.append((task, [
+                (cnt, None if target is None else columns[target])
+                for cnt, target in cnts
+            ]))
+            for cnt, target in cnts:
+                if isinstance(cnt, RelConst):
+                    self._targeted_by[columns[target]].append(task)
+
+        self._targeted_by = dict(self._targeted_by)
+        return ConstraintPlan(self.names, steps)
@@ -0,0 +1,154 @@
+"""
+Менеджер задач для нескольких вычислительных узлов
+"""
+
+
+# =============================================================================
+
+
+from collections import defaultdict
+import numpy as _np
+from taskdisttools.task import TaskManager
+from taskdisttools.constraint import NodeConstraint, RelativeNodeConstraint
+
+
+# =============================================================================
+
+
+__all__ = [
+    'NodeTaskManager',
+]
+
+
+# =============================================================================
+
+
+class NodeTaskManager(TaskManager):
+    """
+    Менеджер задач для нескольких вычислительных узлов
+     - корневая задача выполняется на одном узле вместе с зависимыми
+       задачами (узлы назначаются корневым задачам)
+     - хранение емкостей узлов и ограничений на выбор узла
+       (NodeConstraint)
+    """
+
+    def __init__(self, nodes):
+        """
+        Инициализация
+        :param nodes: узлы - словарь емкостей (допустимых уровней загрузки,
+            None - не ограничена) или список идентификаторов узлов
+        """
+        super().__init__()
+        if not isinstance(nodes, dict):
+            nodes = dict.fromkeys(nodes)
+        if len(nodes) == 0:
+            raise RuntimeError('No nodes specified')
+        self._nodes = dict(nodes)
+        self._node_constraints = defaultdict(list)
+
+    @property
+    def nodes(self):
+        """Получение идентификаторов узлов"""
+        return list(self._nodes.keys())
+
+    @property
+    def capacity(self):
+        """Получение емкостей узлов (inf - емкость не ограничена)"""
+        return _np.array([
+            _np.inf if capacity is None else capacity
+            for capacity in self._nodes.values()
+        ], dtype=float)
+
+    @property
+    def node_constraints(self):
+        """Получение ограничений на выбор узла"""
+        return self._node_constraints
+
+    def add_node_constraint(self, name, constraint):
+        """
+        Добавление ограничения на узел для заданной задачи
+        :param name: идентификатор задачи
+        :param constraint: ограничение
+        :return: ссылка на объект вызова
+        """
+        assert isinstance(constraint, NodeConstraint)
+        self._node_constraints[name].append(constraint)
+        return self
+
+    def remove_root_task(self, name):
+        """
+        Удаление корневой задачи (вместе с зависимыми задачами
+        и их ограничениями)
+        :param name: идентификатор корневой задачи
+        :return: ссылка на объект вызова
+        """
+        tasks = set(self.make_task_input(name, 0)[0].keys())
+        for task, constraints in self._node_constraints.items():
+            if task in tasks:
+                continue
+            for cnt in constraints:
+                if isinstance(cnt, RelativeNodeConstraint) and \
+                        cnt.target in tasks:
+                    raise RuntimeError(
+                        f'Task "{cnt.target}" is referenced by node '
+                        f'constraints of task "{task}"')
+
+        super().remove_root_task(name)
+        for task in tasks:
+            self._node_constraints.pop(task, None)
+        return self
+
+    def make_node_input(self, root_nodes):
+        """
+        Формирование узлов выполнения всех задач
+        :param root_nodes: узлы корневых задач
+        :return: словарь узлов задач
+        """
+        nodes = dict()
+        for name, root_task in self._root_tasks.items():
+            stack = [root_task]
+            while len(stack) > 0:
+                task = stack.pop()
+                nodes[task.name] = root_nodes[name]
+                stack.extend(
+                    dependent for dependent, _ in task.dependent_tasks)
+        return nodes
+
+    def test_nodes(self, nodes):
+        """
+        Проверка ограничений на выбор узла
+        :param nodes: словарь узлов задач
+        :return: True если все ограничения выполнены, иначе False
+        """
+        return all(
+            nodes[task] in self._nodes and all(
+                cnt.test(nodes[task], nodes) for cnt in constraints)
+            for task, constraints in self._node_constraints.items()
+            if task in nodes
+        )
+
+    def compile_node_constraints(self, model):
+        """
+        Перевод ограничений на выбор узла к корневым задачам модели
+        :param model: компактная модель набора задач (freeze())
+        :return: матрица допустимых узлов (корневая задача x узел;
+                 с учетом абсолютных ограничений задач цепочки),
+                 список относительных ограничений (позиция корневой
+                 задачи, позиция корневой задачи цели, ограничение)
+        """
+        nodes = self.nodes
+        allowed = _np.ones((len(model.root_ids), len(nodes)), dtype=bool)
+        relations = list()
+        for task, constraints in self._node_constraints.items():
+            if task not in model.index:
+                continue
+            root = int(model.root[model.index[task]])
+            for cnt in constraints:
+                if isinstance(cnt, RelativeNodeConstraint):
+                    if cnt.target not in model.index:
+                        raise RuntimeError(f'Task "{cnt.target}" not found')
+                    relations.append((
+                        root, int(model.root[model.index[cnt.target]]), cnt))
+                else:
+                    allowed[root] &= [cnt.test(node, dict()) for node in nodes]
+        return allowed, relations
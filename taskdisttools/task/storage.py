@@ -0,0 +1,112 @@
+"""
+Сохранение и загрузка компактной модели набора задач
+"""
+
+
+# =============================================================================
+
+
+import os
+import numpy as _np
+from taskdisttools.constraint import DelayConstraint, PriorityConstraint
+from taskdisttools.constraint import StepConstraint
+from taskdisttools.task import TaskModel
+
+
+# =============================================================================
+
+
+__all__ = [
+    'save_model',
+    'load_model',
+    'make_name_array',
+]
+
+
+# =============================================================================
+
+
+# Виды ограничений (код вида - позиция в кортеже)
+_CONSTRAINT_TYPES = (StepConstraint, DelayConstraint, PriorityConstraint)
+
+# Массивы модели (по номерам задач и по корневым задачам)
+_MODEL_ARRAYS = ('parent', 'root', 'offset', 'frequency', 'span', 'weight',
+                 'root_ids', 't0_min', 't0_max')
+
+
+# =============================================================================
+
+
+def save_model(path, model):
+    """
+    Сохранение модели в каталог (по файлу .npy на массив: массивы модели,
+    таблица идентификаторов задач и ограничения в виде столбцов)
+    :param path: путь к каталогу (создается при необходимости)
+    :param model: компактная модель набора задач
+    """
+    assert isinstance(model, TaskModel)
+    os.makedirs(path, exist_ok=True)
+    arrays = dict((name, getattr(model, name)) for name in _MODEL_ARRAYS)
+    arrays['names'] = make_name_array(model.names)
+    if len(model.resources) > 0:
+        arrays['resources'] = make_name_array(model.resources)
+
+    # Ограничения в порядке плана: номер задачи, вид, номер целевой
+    # задачи (-1 для абсолютных ограничений), параметр
+    rows = list()
+    for task, cnts in model.plan.steps:
+        for cnt, target in cnts:
+            if type(cnt) not in _CONSTRAINT_TYPES:
+                raise RuntimeError(
+                    f'Constraint {type(cnt).__name__} can not be saved')
+            value = cnt.step_size if isinstance(cnt, StepConstraint) \
+                else cnt.max_delay
+            rows.append((task, _CONSTRAINT_TYPES.index(type(cnt)),
+                         -1 if target is None else target, value))
+    arrays['constraints'] = _np.array(rows, dtype=_np.int64).reshape(-1, 4)
+
+    for name, values in arrays.items():
+        _np.save(os.path.join(path, name + '.npy'), _np.asarray(values))
+
+
+def load_model(path, *, mmap_mode='r'):
+    """
+    Загрузка модели из каталога
+    :param path: путь к каталогу
+    :param mmap_mode: режим отображения массивов в память
+        (см. np.load, None - массивы считываются)
+    :return: компактная модель набора задач
+    """
+    def load(name):
+        return _np.load(os.path.join(path, name + '.npy'),
+                        mmap_mode=mmap_mode)
+
+    names = load('names').tolist()
+    resources = load('resources').tolist() \
+        if os.path.exists(os.path.join(path, 'resources.npy')) else None
+    constraints = dict()
+    for task, kind, target, value in load('constraints').tolist():
+        cls = _CONSTRAINT_TYPES[kind]
+        cnt = cls(value) if cls is StepConstraint \
+            else cls(names[target], value)
+        constraints.setdefault(names[task], list()).append(cnt)
+
+    return TaskModel(
+        names, *(load(name) for name in _MODEL_ARRAYS), constraints,
+        resources=resources)
+
+
+# =============================================================================
+
+
+def make_name_array(names):
+    """
+    Формирование таблицы идентификаторов задач (ресурсов)
+    :param names: список идентификаторов
+    :return: массив идентификаторов (строки или целые числа фиксированного
+             размера)
+    """
+    names = _np.asarray(names) if len(names) > 0 else _np.array([], str)
+    if names.dtype.kind not in 'Uiu':
+        raise RuntimeError('Only string and integer task names can be saved')
+    return names
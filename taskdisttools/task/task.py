@@ -23,7 +23,8 @@ class Task(object):
         Инициализация
         :param name: идентификатор
         :param span: продолжительность выполнения
-        :param weight: "вес" при расчете загрузки системы
+        :param weight: "вес" при расчете загрузки системы (число
+            или словарь "весов" по названиям ресурсов)
         """
         self.name = name
         self.span = span
@@ -57,7 +58,8 @@ class RootTask(Task):
         :param frequency: частота выполнения
         :param t0_min: минимальное время начала
         :param t0_max: максимальное время начала
-        :param weight: "вес" при расчете загрузки системы
+        :param weight: "вес" при расчете загрузки системы (число
+            или словарь "весов" по названиям ресурсов)
         """
         super().__init__(name, span, weight=weight)
         self.frequency = frequency
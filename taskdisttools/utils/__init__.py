@@ -1,3 +1,5 @@
 from .beautifier import *
 from .loading import *
 from .timetable import *
+from .periodic import *
+from .streaming import *
@@ -8,6 +8,8 @@
 
 import copy
 import numpy as _np
+from taskdisttools.metric import Metric, FunctionMetric
+from taskdisttools.utils.loading import make_loading, compute_loading
 
 
 # =============================================================================
@@ -67,11 +69,34 @@ class _Alignment(object):
 
 
 class Beautifier(object):
-    """Класс постобработки расписания"""
-
-    def __init__(self):
-        """Инициализация"""
+    """
+    Класс постобработки расписания
+     - по умолчанию t0 выравниваются без учета загрузки системы
+       и ограничений
+     - если задано tolerance, каждое выравнивание оценивается
+       инкрементально по текущей загрузке: из шагов выравнивания,
+       отличающихся от результата Aligner не более чем на tolerance,
+       выбирается шаг с лучшим значением метрики при выполнении
+       ограничений (скомпилированный план модели) и окон t0 корневых
+       задач; шаги, t0 которых изменились бы при применении ограничений,
+       не рассматриваются; выравнивание, ухудшающее значение метрики,
+       не применяется
+       (выравниваются только корневые задачи, зависимые задачи
+       сдвигаются вместе с ними)
+    """
+
+    def __init__(self, *, tolerance=None, metric=None):
+        """
+        Инициализация
+        :param tolerance: допустимое отклонение шага выравнивания
+            от результата Aligner, эпох (None - загрузка не учитывается)
+        :param metric: метрика оценки выравниваний (Metric или функция
+            загрузки системы, None - метрика результатов оптимизации)
+        """
+        assert tolerance is None or tolerance >= 0
         self._alignments = list()
+        self._tolerance = tolerance
+        self._metric = metric
 
     def add_alignment(self, tasks, aligner_or_id):
         """
@@ -90,6 +115,11 @@ class Beautifier(object):
     def apply(self, opt_results, task_manager, *, inplace=False):
         """
         Постобработка
+         - копируются только t0 задач (остальные данные результатов
+           разделяются с opt_results до первого изменения)
+         - t0 зависимых задач пересчитываются от t0 корневых задач,
+           а загрузка системы обновляется только для задач, t0 которых
+           изменились (результаты должны соответствовать менеджеру задач)
         :param opt_results: результаты оптимизации
         :param task_manager: менеджер задач
         :param inplace: флаг изменения объекта opt_results
@@ -98,70 +128,254 @@ class Beautifier(object):
         if inplace:
             target = opt_results
         else:
-            target = copy.deepcopy(opt_results)
+            target = copy.copy(opt_results)
+        if self._tolerance is not None:
+            return self._apply_scored(target, task_manager)
 
+        initial, tasks_data = opt_results.get_input()
+        start_times = dict(initial)
         for alignment in self._alignments:
-            self._apply(target, alignment)
-
-        target.start_times, target.tasks_data = \
-            task_manager.make_model_input(
-                target.start_times, apply_constraints=False
+            self._apply(start_times, alignment)
+
+        # t0 всех цепочек пересчитываются от t0 корневых задач (как
+        # make_model_input без ограничений); загрузка обновляется только
+        # для задач, t0 которых изменились
+        start_times, new_tasks_data = task_manager.make_roots_input(
+            start_times,
+            resources=None if opt_results.model is None
+            else opt_results.model.resources
+        )
+        moved = [task for task, t0 in start_times.items()
+                 if t0 != initial.get(task)]
+
+        # Загрузка - для исходных t0 (рассчитывается до их замены)
+        loading = target.loading
+        target.start_times = start_times
+        target.tasks_data = new_tasks_data
+        if not _np.issubdtype(loading.dtype, _np.integer) or \
+                any(task not in initial for task in moved):
+            # Сумма дробных "весов" зависит от порядка сложения -
+            # загрузка рассчитывается заново
+            return target.evaluate()
+        if len(moved) > 0:
+            loading = loading - make_loading(
+                dict((task, initial[task]) for task in moved),
+                dict((task, tasks_data[task]) for task in moved),
+                target.t_max
+            ) + make_loading(
+                dict((task, start_times[task]) for task in moved),
+                dict((task, new_tasks_data[task]) for task in moved),
+                target.t_max
             )
+        return target.evaluate(loading)
 
-        return target.evaluate()
-
-    def _apply(self, target, alignment):
+    def _apply(self, start_times, alignment):
         """
         Применение правила
-        :param target: результаты оптимизации
+        :param start_times: словарь t0 задач (изменяется на месте)
+        :param alignment: правило выравнивания
+        """
+        self._do_alignment(
+            start_times, alignment.tasks, self._get_aligner(alignment))
+
+    def _get_aligner(self, alignment):
+        """
+        Получение функции/значения выравнивания правила
         :param alignment: правило выравнивания
+        :return: функция (Aligner) или значение выравнивания
         """
         assert isinstance(alignment, _Alignment)
 
         if alignment.aligner:
-            aligner = alignment.aligner
-        else:
-            aligner = self._alignments[alignment.aid].aligner.cache
-            if aligner is None:
-                raise RuntimeError(
-                    f'Alignment at {alignment.aid} '
-                    f'referenced before being evaluated'
-                )
-
-        self._do_alignment(target, alignment.tasks, aligner)
+            return alignment.aligner
+        aligner = self._alignments[alignment.aid].aligner.cache
+        if aligner is None:
+            raise RuntimeError(
+                f'Alignment at {alignment.aid} '
+                f'referenced before being evaluated'
+            )
+        return aligner
 
     @staticmethod
-    def _do_alignment(target, tasks, aligner):
+    def _do_alignment(start_times, tasks, aligner):
         """
         Непосредственно применение правила
-        :param target: результаты оптимизации
+        :param start_times: словарь t0 задач (изменяется на месте)
         :param tasks: список задач
         :param aligner: функция/значение выравнивания
         """
-        tasks_data = [(task, target.start_times[task]) for task in tasks]
-        tasks_data.sort(key=lambda item: item[1])
-
-        t0_deltas = list()
-        for i in range(1, len(tasks_data)):
-            t0_deltas.append(tasks_data[i][1] - tasks_data[i-1][1])
+        t0s = _np.array([start_times[task] for task in tasks])
+        order = _np.argsort(t0s, kind='stable')
+        names = [tasks[i] for i in order.tolist()]
+        t0s = t0s[order]
+        t0_deltas = t0s[1:] - t0s[:-1]
 
         if isinstance(aligner, Aligner):
             aligned_delta = aligner(t0_deltas)
         else:
             aligned_delta = aligner
 
-        base_task_id = None
-        min_t0_delta = None
-        for i, t0_delta in enumerate(t0_deltas):
-            cur_t0_delta = abs(t0_delta - aligned_delta)
-            if min_t0_delta is None or cur_t0_delta < min_t0_delta:
-                min_t0_delta = cur_t0_delta
-                base_task_id = i
-        if tasks_data[base_task_id][1] - aligned_delta * base_task_id < 0:
-            base_task_id = 0
-
-        t0_base = tasks_data[base_task_id][1]
-        for i, task in enumerate(tasks_data):
-            target.start_times[task[0]] = int(
-                t0_base + aligned_delta * (i - base_task_id)
+        aligned = Beautifier._align(
+            t0s, t0_deltas, _np.asarray([aligned_delta]))
+        start_times.update(zip(names, aligned[0].tolist()))
+
+    @staticmethod
+    def _align(t0s, t0_deltas, aligned_deltas):
+        """
+        Расчет выровненных t0 (базовая задача - задача, шаг до которой
+        ближе всего к шагу выравнивания)
+        :param t0s: упорядоченный массив t0 задач
+        :param t0_deltas: массив шагов между соседними t0
+        :param aligned_deltas: массив вариантов шага выравнивания
+        :return: матрица выровненных t0 (вариант x задача)
+        """
+        base = _np.abs(
+            t0_deltas[None, :] - aligned_deltas[:, None]).argmin(axis=1)
+        base[t0s[base] - aligned_deltas * base < 0] = 0
+        aligned = t0s[base][:, None] + aligned_deltas[:, None] * (
+            _np.arange(len(t0s))[None, :] - base[:, None])
+        return aligned.astype(_np.int64)
+
+    def _apply_scored(self, target, task_manager):
+        """
+        Постобработка с учетом загрузки системы и ограничений
+        :param target: результаты оптимизации (изменяются)
+        :param task_manager: менеджер задач
+        :return: результаты постобработки
+        """
+        model = target.model
+        if model is None:
+            model = task_manager.freeze()
+            start_times = model.from_dict(target.get_input()[0])
+        else:
+            start_times = target.start_times_array.copy()
+
+        metric = target.metric if self._metric is None else self._metric
+        if not isinstance(metric, Metric):
+            metric = FunctionMetric(metric)
+        metric = copy.deepcopy(metric)
+        loading = target.loading
+        if not loading.flags.writeable:
+            # Загрузка, прочитанная из файла (только для чтения)
+            loading = loading.copy()
+        score = metric.reset(loading)
+        for alignment in self._alignments:
+            score = self._do_scored_alignment(
+                model, start_times, loading, metric, score,
+                alignment.tasks, self._get_aligner(alignment), target.t_max
             )
+
+        target.start_times = model.to_dict(start_times)
+        if not _np.issubdtype(loading.dtype, _np.integer):
+            return target.evaluate()
+        return target.evaluate(loading)
+
+    def _do_scored_alignment(self, model, start_times, loading, metric,
+                             score, tasks, aligner, t_max):
+        """
+        Применение правила с учетом загрузки системы и ограничений
+        :param model: компактная модель набора задач
+        :param start_times: массив t0 всех задач (изменяется на месте)
+        :param loading: массив уровней загрузки системы
+            (изменяется на месте)
+        :param metric: метрика (инициализирована по loading)
+        :param score: текущее значение метрики
+        :param tasks: список задач
+        :param aligner: функция/значение выравнивания
+        :param t_max: максимальная эпоха моделирования
+        :return: значение метрики после применения правила
+        """
+        ids = _np.array([model.index[task] for task in tasks],
+                        dtype=_np.int64)
+        ids = ids[_np.argsort(start_times[ids], kind='stable')]
+        t0s = start_times[ids]
+        t0_deltas = t0s[1:] - t0s[:-1]
+
+        if isinstance(aligner, Aligner):
+            aligned_delta = aligner(t0_deltas)
+        else:
+            aligned_delta = aligner
+        steps = _np.arange(1, int(self._tolerance) + 1)
+        aligned_deltas = aligned_delta + _np.concatenate(
+            [[0], _np.stack([-steps, steps], axis=1).ravel()])
+        aligned_deltas = aligned_deltas[aligned_deltas >= 0]
+
+        is_root = model.parent[ids] < 0
+        roots = model.root[ids[is_root]]
+        if len(roots) == 0 or len(aligned_deltas) == 0:
+            return score
+        root_t0s = self._align(t0s, t0_deltas, aligned_deltas)[:, is_root]
+        t0_upper = _np.where(model.t0_max < 0, t_max - 1, model.t0_max)
+        feasible = ((root_t0s >= model.t0_min[roots]) &
+                    (root_t0s <= t0_upper[roots])).all(axis=1)
+
+        # Варианты t0 задач, зависящих от t0 выравниваемых корневых задач
+        affected = _np.unique(_np.concatenate(
+            [model.get_affected_tasks(root) for root in roots.tolist()]))
+        variants = _np.tile(start_times[affected], (len(aligned_deltas), 1))
+        order = _np.argsort(roots, kind='stable')
+        positions = _np.minimum(
+            _np.searchsorted(roots, model.root[affected], sorter=order),
+            len(roots) - 1)
+        member = roots[order[positions]] == model.root[affected]
+        variants[:, member] = root_t0s[:, order[positions[member]]] + \
+            model.offset[affected[member]]
+        feasible &= self._check_constraints(
+            model, start_times, affected, variants)
+
+        frequency = model.frequency[affected]
+        span = model.span[affected]
+        weight = model.weight[affected]
+        current = compute_loading(
+            start_times[affected], frequency, span, weight, t_max)
+        best, best_score, best_delta = None, None, None
+        for k in _np.flatnonzero(feasible).tolist():
+            delta = compute_loading(
+                variants[k], frequency, span, weight, t_max) - current
+            changed = delta != 0
+            if changed.ndim > 1:
+                changed = changed.any(axis=1)
+            epochs = _np.flatnonzero(changed)
+            value = metric.peek(loading, epochs, delta[epochs])
+            if value <= score and (best is None or value < best_score):
+                best, best_score, best_delta = k, value, (epochs, delta)
+        if best is None:
+            return score
+
+        epochs, delta = best_delta
+        score = metric.update(loading, epochs, delta[epochs])
+        loading[epochs] += delta[epochs]
+        start_times[affected] = variants[best]
+        return score
+
+    @staticmethod
+    def _check_constraints(model, start_times, affected, variants):
+        """
+        Проверка ограничений для вариантов t0 задач (вариант допустим,
+        если ограничения выполняются без изменения t0, в том числе
+        ограничения остальных задач, целевые задачи которых сдвигаются)
+        :param model: компактная модель набора задач
+        :param start_times: массив t0 всех задач (t0 остальных задач)
+        :param affected: упорядоченный массив номеров задач
+        :param variants: матрица t0 задач affected (вариант x задача)
+        :return: массив флагов выполнения ограничений для каждого варианта
+        """
+        names = [model.names[i] for i in affected.tolist()]
+        plan = model.plan
+        plan = plan.subset(names + [
+            plan.columns[plan.steps[step][0]]
+            for step in plan.get_targeted_by(names)
+        ])
+        if len(plan.steps) == 0:
+            return _np.ones(len(variants), dtype=bool)
+
+        columns = _np.array(
+            [model.index[name] for name in plan.columns], dtype=_np.int64)
+        positions = _np.minimum(
+            _np.searchsorted(affected, columns), len(affected) - 1)
+        member = affected[positions] == columns
+        values = _np.tile(start_times[columns], (len(variants), 1))
+        values[:, member] = variants[:, positions[member]]
+        expected = values.copy()
+        feasible = plan.apply(values, strict=False)
+        return feasible & (values == expected).all(axis=1)
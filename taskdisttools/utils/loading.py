@@ -1,5 +1,5 @@
 """
-Функция расчета загруженности системы
+Функции расчета загруженности системы
 """
 
 
@@ -14,6 +14,11 @@ import numpy as _np
 
 __all__ = [
     'get_loading',
+    'make_loading',
+    'compute_loading',
+    'weighted_bincount',
+    'make_task_arrays',
+    'count_launches',
 ]
 
 
@@ -26,6 +31,7 @@ def get_loading(timetable, tasks_data):
     :param timetable: расписание выполнения задач
     :param tasks_data: словарь, содержащий данные задач (вес)
     :return: массив уровней загрузки системы на каждую эпоху
+             (для векторных "весов" - матрица эпоха x ресурс)
     """
     loading = [0] * len(timetable)
     for t, tasks in enumerate(timetable):
@@ -33,6 +39,216 @@ def get_loading(timetable, tasks_data):
             loading[t] += len(tasks)
         else:
             for task in tasks:
-                loading[t] += tasks_data[task].weight
+                loading[t] = loading[t] + tasks_data[task].weight
 
+    if tasks_data:
+        shape = _np.shape(next(iter(tasks_data.values())).weight)
+        if len(shape) > 0:
+            return _np.array(
+                [_np.broadcast_to(value, shape) for value in loading])
     return _np.array(loading)
+
+
+# =============================================================================
+
+
+def make_loading(start_times, tasks_data, t_max):
+    """
+    Расчет загрузки системы без формирования расписания
+    (эквивалентно get_loading(make_timetable(...), tasks_data))
+    :param start_times: словарь, содержащий время первого запуска задач
+    :param tasks_data: словарь, содержащий данные задач
+        (частота, продолжительность выполнения, вес)
+    :param t_max: максимальная эпоха моделирования
+    :return: массив уровней загрузки системы на каждую эпоху
+             (для векторных "весов" - матрица эпоха x ресурс)
+    """
+    return compute_loading(*make_task_arrays(start_times, tasks_data), t_max)
+
+
+def compute_loading(t0, frequency, span, weight, t_max):
+    """
+    Расчет загрузки системы по массивам параметров задач
+     - для матрицы "весов" (задача x ресурс) загрузка всех ресурсов
+       рассчитывается за один проход (общие эпохи запусков)
+    :param t0: массив времен первого запуска
+    :param frequency: массив частот запуска
+    :param span: массив продолжительностей выполнения
+    :param weight: массив "весов" задач или матрица задача x ресурс
+    :param t_max: максимальная эпоха моделирования
+    :return: массив уровней загрузки системы на каждую эпоху
+             (для матрицы "весов" - матрица эпоха x ресурс)
+    """
+    t0 = _np.asarray(t0, dtype=_np.int64)
+    frequency = _np.asarray(frequency, dtype=_np.int64)
+    span = _np.maximum(_np.asarray(span, dtype=_np.int64), 1)
+    weight = _np.asarray(weight)
+    weight = _np.broadcast_to(weight, t0.shape + weight.shape[1:])
+
+    if t_max <= 0:
+        return _np.zeros((0,) + weight.shape[1:])
+
+    # Эпохи t < 0 адресуют расписание с конца (как индексы списка)
+    t_lo = min(int(t0.min()), 0) if t0.size > 0 else 0
+    if t_lo < -t_max:
+        raise IndexError('list index out of range')
+
+    active = t0 < t_max
+    t0, frequency = t0[active] - t_lo, frequency[active]
+    span, weight = span[active], weight[active]
+    if weight.dtype.kind not in 'iub' and weight.size > 0:
+        epochs, epoch_weight = _float_epochs(
+            t0, frequency, span, weight, t_max - t_lo)
+        epochs += t_lo
+        epochs[epochs < 0] += t_max
+        return weighted_bincount(epochs, epoch_weight, t_max).astype(
+            weight.dtype, copy=False)
+
+    ext_loading = _integer_loading(
+        t0, frequency, span, weight.astype(_np.int64), t_max - t_lo)
+    loading = ext_loading[-t_lo:]
+    if t_lo < 0:
+        loading[t_max + t_lo:] += ext_loading[:-t_lo]
+    return loading
+
+
+def weighted_bincount(points, weights, length):
+    """
+    Суммирование "весов" по позициям (np.bincount; для матрицы "весов"
+    задача x ресурс - по каждому ресурсу)
+    :param points: массив позиций (0 <= points < length)
+    :param weights: массив "весов" или матрица (позиция x ресурс)
+    :param length: кол-во позиций
+    :return: массив сумм (для матрицы "весов" - матрица позиция x ресурс)
+    """
+    if weights.ndim == 1:
+        return _np.bincount(points, weights, length)
+    sums = _np.empty((length, weights.shape[1]))
+    for k in range(weights.shape[1]):
+        sums[:, k] = _np.bincount(points, weights[:, k], length)
+    return sums
+
+
+def make_task_arrays(start_times, tasks_data):
+    """
+    Формирование массивов параметров задач
+    :param start_times: словарь, содержащий время первого запуска задач
+    :param tasks_data: словарь, содержащий данные задач
+        (частота, продолжительность выполнения, вес)
+    :return: массивы времен первого запуска, частот, продолжительностей
+             и "весов" задач (для векторных "весов" - матрица
+             задача x ресурс)
+    """
+    n_tasks = len(start_times)
+    t0 = _np.fromiter(start_times.values(), dtype=_np.int64, count=n_tasks)
+    data = [tasks_data[task] for task in start_times.keys()]
+    frequency = _np.fromiter(
+        (item.frequency for item in data), dtype=_np.int64, count=n_tasks)
+    span = _np.fromiter(
+        (item.span for item in data), dtype=_np.int64, count=n_tasks)
+    weight = _np.array([item.weight for item in data])
+    return t0, frequency, span, weight
+
+
+def count_launches(t0, frequency, span, length):
+    """
+    Расчет кол-ва запусков задач (как в model_launches: запуски,
+    начавшиеся после выхода предыдущего запуска за length, не учитываются)
+    :param t0: массив времен первого запуска (0 <= t0 < length)
+    :param frequency: частота запуска (скаляр или массив)
+    :param span: массив продолжительностей выполнения
+    :param length: длина интервала моделирования
+    :return: массив кол-ва запусков
+    """
+    n_started = (length - 1 - t0) // frequency + 1
+    n_truncated = _np.maximum(
+        -((t0 + span - 1 - length) // frequency), 0) + 1
+    return _np.minimum(n_started, n_truncated)
+
+
+# =============================================================================
+
+
+def _integer_loading(t0, frequency, span, weight, length):
+    """
+    Расчет загрузки для целочисленных весов (разностный массив)
+    :param t0: массив времен первого запуска (0 <= t0 < length)
+    :param frequency: массив частот запуска
+    :param span: массив продолжительностей выполнения
+    :param weight: массив "весов" задач (или матрица задача x ресурс)
+    :param length: длина интервала моделирования
+    :return: массив уровней загрузки системы на каждую эпоху
+    """
+    weight = weight.astype(_np.float64)
+    diff = _np.zeros((length,) + weight.shape[1:], dtype=_np.float64)
+
+    for f in _np.unique(frequency):
+        mask = frequency == f
+        f_t0, f_span, f_weight = t0[mask], span[mask], weight[mask]
+        n_launches = count_launches(f_t0, f, f_span, length)
+
+        if n_launches.sum() < length:
+            # Запусков мало - разворачиваем их явно
+            starts = _expand_launches(f_t0, f, n_launches)
+            ends = starts + _np.repeat(f_span, n_launches)
+            launch_weight = _np.repeat(f_weight, n_launches, axis=0)
+            diff += weighted_bincount(starts, launch_weight, length)
+            ends_mask = ends < length
+            diff -= weighted_bincount(
+                ends[ends_mask], launch_weight[ends_mask], length)
+        else:
+            # Периодическое распространение первого запуска с шагом f
+            # (после последнего запуска распространение гасится)
+            impulses = _np.zeros_like(diff)
+            last = f_t0 + n_launches * f
+            for points, sign in ((f_t0, 1), (f_t0 + f_span, -1),
+                                 (last, -1), (last + f_span, 1)):
+                points_mask = points < length
+                impulses += sign * weighted_bincount(
+                    points[points_mask], f_weight[points_mask], length)
+            n_rows = -(-length // f)
+            periodic = _np.zeros(
+                (n_rows * f,) + diff.shape[1:], dtype=_np.float64)
+            periodic[:length] = impulses
+            periodic = periodic.reshape(
+                (n_rows, f) + diff.shape[1:]).cumsum(axis=0)
+            diff += periodic.reshape((n_rows * f,) + diff.shape[1:])[:length]
+
+    return _np.rint(diff.cumsum(axis=0)).astype(_np.int64)
+
+
+def _float_epochs(t0, frequency, span, weight, length):
+    """
+    Развертывание эпох активности задач для вещественных весов
+    (порядок эпох совпадает с порядком в make_timetable, поэтому
+    суммирование через bincount повторяет get_loading побитово)
+    :param t0: массив времен первого запуска (0 <= t0 < length)
+    :param frequency: массив частот запуска
+    :param span: массив продолжительностей выполнения
+    :param weight: массив "весов" задач (или матрица задача x ресурс)
+    :param length: длина интервала моделирования
+    :return: массив эпох и массив соответствующих им весов
+    """
+    n_launches = count_launches(t0, frequency, span, length)
+    starts = _expand_launches(t0, _np.repeat(frequency, n_launches),
+                              n_launches)
+    launch_span = _np.repeat(span, n_launches)
+    launch_weight = _np.repeat(weight, n_launches, axis=0)
+
+    n_epochs = _np.minimum(launch_span, length - starts)
+    epochs = _expand_launches(starts, 1, n_epochs)
+    return epochs, _np.repeat(launch_weight, n_epochs, axis=0)
+
+
+def _expand_launches(t0, step, counts):
+    """
+    Развертывание арифметических прогрессий t0 + k * step, k < counts
+    :param t0: массив начальных значений
+    :param step: шаг прогрессий (скаляр или массив длины counts.sum())
+    :param counts: массив кол-ва членов прогрессий
+    :return: массив членов всех прогрессий (по порядку)
+    """
+    total = int(counts.sum())
+    offsets = _np.cumsum(counts) - counts
+    k = _np.arange(total, dtype=_np.int64) - _np.repeat(offsets, counts)
+    return _np.repeat(t0, counts) + k * step
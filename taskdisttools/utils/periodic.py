@@ -0,0 +1,201 @@
+"""
+Расчет загрузки системы по гиперпериоду расписания
+"""
+
+
+# =============================================================================
+
+
+import math
+import numpy as _np
+from taskdisttools.metric import Metric, PeakMetric, StdMetric, VarMetric
+from taskdisttools.utils.loading import compute_loading, make_task_arrays
+
+
+# =============================================================================
+
+
+__all__ = [
+    'get_hyperperiod',
+    'PeriodicLoading',
+    'compute_periodic_loading',
+    'make_periodic_loading',
+]
+
+
+# =============================================================================
+
+
+# Функции numpy, значения которых рассчитываются по гистограмме загрузки
+HISTOGRAM_METRICS = {
+    _np.std: StdMetric,
+    _np.var: VarMetric,
+    _np.max: PeakMetric,
+    _np.amax: PeakMetric,
+}
+
+
+# =============================================================================
+
+
+def get_hyperperiod(frequency, limit=None):
+    """
+    Расчет гиперпериода расписания (НОК частот запуска задач)
+    :param frequency: массив частот запуска
+    :param limit: предельное значение гиперпериода
+    :return: гиперпериод (None, если он превышает limit)
+    """
+    hyperperiod = 1
+    for f in _np.unique(frequency).tolist():
+        hyperperiod = hyperperiod * f // math.gcd(hyperperiod, f)
+        if limit is not None and hyperperiod > limit:
+            return None
+    return hyperperiod
+
+
+# =============================================================================
+
+
+class PeriodicLoading(object):
+    """
+    Сжатое представление загрузки системы:
+    начальный участок (head), повторяющийся n_cycles раз цикл (cycle)
+    и конечный участок (tail)
+     - загрузка установившегося режима периодична с периодом, равным
+       гиперпериоду расписания, поэтому хранится один цикл
+     - expand() (или np.asarray) разворачивает загрузку на весь интервал
+       моделирования, score(metric) рассчитывает метрику без развертывания
+    """
+
+    def __init__(self, head, cycle=None, n_cycles=0, tail=None):
+        """
+        Инициализация
+        :param head: массив загрузки начального участка
+        :param cycle: массив загрузки одного цикла
+        :param n_cycles: кол-во повторений цикла
+        :param tail: массив загрузки конечного участка
+        """
+        self.head = _np.asarray(head)
+        self.cycle = self.head[:0] if cycle is None else _np.asarray(cycle)
+        self.n_cycles = n_cycles if len(self.cycle) > 0 else 0
+        self.tail = self.head[:0] if tail is None else _np.asarray(tail)
+
+    def __len__(self):
+        """Длина интервала моделирования"""
+        return len(self.head) + self.n_cycles * len(self.cycle) + \
+            len(self.tail)
+
+    def __array__(self, dtype=None, copy=None):
+        """Преобразование в массив numpy"""
+        loading = self.expand()
+        return loading if dtype is None else loading.astype(dtype)
+
+    @property
+    def period(self):
+        """Длина цикла (0 - загрузка не сжата)"""
+        return len(self.cycle)
+
+    def expand(self):
+        """
+        Развертывание загрузки на весь интервал моделирования
+        :return: массив уровней загрузки системы на каждую эпоху
+        """
+        return _np.concatenate(
+            [self.head, _np.tile(self.cycle, self.n_cycles), self.tail])
+
+    def get_histogram(self):
+        """
+        Формирование гистограммы загрузки (порядок эпох не сохраняется)
+        :return: массив уровней загрузки, массив кол-ва эпох
+                 с соответствующим уровнем
+        """
+        values = _np.concatenate([self.head, self.cycle, self.tail])
+        counts = _np.ones(len(values), dtype=_np.int64)
+        counts[len(self.head):len(self.head) + len(self.cycle)] = \
+            self.n_cycles
+        return values, counts
+
+    def score(self, metric):
+        """
+        Расчет метрики загрузки
+         - метрики библиотеки, а также np.std, np.var и np.max
+           рассчитываются по гистограмме загрузки (с точностью до ошибок
+           округления), прочие функции - по развернутой загрузке
+        :param metric: метрика (Metric или функция загрузки системы)
+        :return: значение метрики
+        """
+        if not isinstance(metric, Metric):
+            try:
+                metric = HISTOGRAM_METRICS[metric]()
+            except (KeyError, TypeError):
+                return metric(self.expand())
+        return metric.from_histogram(*self.get_histogram())
+
+
+# =============================================================================
+
+
+def compute_periodic_loading(t0, frequency, span, weight, t_max):
+    """
+    Расчет загрузки системы по гиперпериоду расписания
+     - каждая задача повторяется с периодом frequency, поэтому после
+       завершения первых запусков всех задач загрузка периодична
+       с периодом H = НОК(frequency); рассчитывается загрузка на укороченном
+       (на целое число H) интервале, содержащем начальный участок, цикл
+       и конечный участок (где сказываются границы интервала)
+     - если интервал моделирования не вмещает начальный участок, два
+       цикла и конечный участок, загрузка рассчитывается напрямую
+       (PeriodicLoading без цикла)
+    (эквивалентно compute_loading(...) после expand())
+    :param t0: массив времен первого запуска
+    :param frequency: массив частот запуска
+    :param span: массив продолжительностей выполнения
+    :param weight: массив "весов" задач
+    :param t_max: максимальная эпоха моделирования
+    :return: загрузка системы (PeriodicLoading)
+    """
+    t0 = _np.asarray(t0, dtype=_np.int64)
+    frequency = _np.asarray(frequency, dtype=_np.int64)
+    span = _np.maximum(_np.asarray(span, dtype=_np.int64), 1)
+
+    active = t0 < t_max
+    if t_max <= 0 or not _np.any(active):
+        return PeriodicLoading(
+            compute_loading(t0, frequency, span, weight, t_max))
+
+    # Начало установившегося режима и длина конечного участка
+    # (запуски, прерванные концом интервала, и эпохи t0 < 0, которые
+    # отсчитываются от конца интервала)
+    steady = max(int((t0[active] + span[active] - 1).max()), 0)
+    n_end = int(span[active].max()) + max(-int(t0.min()), 0)
+    hyperperiod = get_hyperperiod(frequency[active], limit=t_max)
+    if hyperperiod is None:
+        n_skipped = 0
+    else:
+        n_skipped = (t_max - steady - n_end) // hyperperiod - 1
+    if n_skipped < 1:
+        return PeriodicLoading(
+            compute_loading(t0, frequency, span, weight, t_max))
+
+    loading = compute_loading(
+        t0, frequency, span, weight, t_max - n_skipped * hyperperiod)
+    return PeriodicLoading(
+        loading[:steady],
+        loading[steady:steady + hyperperiod],
+        n_skipped + 1,
+        loading[steady + hyperperiod:]
+    )
+
+
+def make_periodic_loading(start_times, tasks_data, t_max):
+    """
+    Расчет загрузки системы по гиперпериоду расписания
+    (эквивалентно make_loading(...) после expand())
+    :param start_times: словарь, содержащий время первого запуска задач
+    :param tasks_data: словарь, содержащий данные задач
+        (частота, продолжительность выполнения, вес)
+    :param t_max: максимальная эпоха моделирования
+    :return: загрузка системы (PeriodicLoading)
+    """
+    return compute_periodic_loading(
+        *make_task_arrays(start_times, tasks_data), t_max)
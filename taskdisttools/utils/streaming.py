@@ -0,0 +1,206 @@
+"""
+Потоковый расчет загрузки системы (фрагментами фиксированной длины)
+"""
+
+
+# =============================================================================
+
+
+import functools
+import numpy as _np
+from taskdisttools.metric import Metric
+from taskdisttools.utils.loading import make_task_arrays, count_launches
+from taskdisttools.utils.periodic import HISTOGRAM_METRICS
+
+
+# =============================================================================
+
+
+__all__ = [
+    'compute_loading_chunks',
+    'make_loading_chunks',
+    'score_loading_chunks',
+]
+
+
+# =============================================================================
+
+
+# Длина фрагмента загрузки по умолчанию (эпох)
+_CHUNK_SIZE = 1 << 16
+
+
+# =============================================================================
+
+
+def compute_loading_chunks(t0, frequency, span, weight, t_max,
+                           chunk_size=_CHUNK_SIZE):
+    """
+    Потоковый расчет загрузки системы по массивам параметров задач
+     - загрузка формируется фрагментами по chunk_size эпох, для каждого
+       фрагмента рассчитывается разностный массив по импульсам запусков
+       (как в _integer_loading), поэтому объем памяти не зависит от t_max
+     - для матрицы "весов" задача x ресурс загрузка ресурсов
+       рассчитывается по отдельности, фрагменты - матрицы эпоха x ресурс
+    (np.concatenate(list(...)) эквивалентно compute_loading(...);
+    для вещественных весов - с точностью до ошибок округления)
+    :param t0: массив времен первого запуска
+    :param frequency: массив частот запуска
+    :param span: массив продолжительностей выполнения
+    :param weight: массив "весов" задач (или матрица задача x ресурс)
+    :param t_max: максимальная эпоха моделирования
+    :param chunk_size: длина фрагмента (эпох)
+    :return: генератор массивов уровней загрузки фрагментов
+    """
+    assert chunk_size > 0
+    weight = _np.asarray(weight)
+    if weight.ndim > 1:
+        resources = [
+            compute_loading_chunks(
+                t0, frequency, span, weight[:, k], t_max, chunk_size)
+            for k in range(weight.shape[1])
+        ]
+        return (_np.stack(chunks, axis=1) for chunks in zip(*resources))
+
+    t0 = _np.asarray(t0, dtype=_np.int64)
+    frequency = _np.asarray(frequency, dtype=_np.int64)
+    span = _np.maximum(_np.asarray(span, dtype=_np.int64), 1)
+    weight = _np.broadcast_to(weight, t0.shape)
+
+    # Эпохи t < 0 адресуют расписание с конца (как индексы списка)
+    t_lo = min(int(t0.min()), 0) if t0.size > 0 else 0
+    if t_max > 0 and t_lo < -t_max:
+        raise IndexError('list index out of range')
+
+    active = t0 < t_max
+    t0, frequency = t0[active] - t_lo, frequency[active]
+    span, weight = span[active], weight[active]
+    n_launches = count_launches(t0, frequency, span, t_max - t_lo)
+    integer = weight.dtype.kind in 'iub' or weight.size == 0
+    window = functools.partial(
+        _window_loading,
+        _make_impulses(t0, frequency, span, weight.astype(_np.float64),
+                       n_launches),
+        _np.int64 if integer else weight.dtype
+    )
+    return _iter_chunks(window, t_max, t_lo, chunk_size)
+
+
+def make_loading_chunks(start_times, tasks_data, t_max,
+                        chunk_size=_CHUNK_SIZE):
+    """
+    Потоковый расчет загрузки системы
+    (np.concatenate(list(...)) эквивалентно make_loading(...))
+    :param start_times: словарь, содержащий время первого запуска задач
+    :param tasks_data: словарь, содержащий данные задач
+        (частота, продолжительность выполнения, вес)
+    :param t_max: максимальная эпоха моделирования
+    :param chunk_size: длина фрагмента (эпох)
+    :return: генератор массивов уровней загрузки фрагментов
+    """
+    return compute_loading_chunks(
+        *make_task_arrays(start_times, tasks_data), t_max, chunk_size)
+
+
+def score_loading_chunks(chunks, metric):
+    """
+    Расчет метрики загрузки за один проход по фрагментам
+     - метрики библиотеки, а также np.std, np.var и np.max рассчитываются
+       по накопленным величинам (объем памяти не зависит от длины
+       интервала), прочие функции - по собранной целиком загрузке
+    :param chunks: последовательность массивов загрузки (по порядку эпох)
+    :param metric: метрика (Metric или функция загрузки системы)
+    :return: значение метрики
+    """
+    if not isinstance(metric, Metric):
+        try:
+            metric = HISTOGRAM_METRICS[metric]()
+        except (KeyError, TypeError):
+            chunks = [_np.asarray(chunk) for chunk in chunks]
+            return metric(_np.concatenate(chunks) if len(chunks) > 0
+                          else _np.array([]))
+    return metric.from_chunks(chunks)
+
+
+# =============================================================================
+
+
+def _iter_chunks(window, t_max, t_lo, chunk_size):
+    """
+    Формирование фрагментов загрузки
+    :param window: функция расчета загрузки на отрезке [lo, hi)
+        расширенного интервала
+    :param t_max: максимальная эпоха моделирования
+    :param t_lo: минимальная эпоха (<= 0) расширенного интервала
+    :param chunk_size: длина фрагмента (эпох)
+    :return: генератор массивов уровней загрузки фрагментов
+    """
+    for start in range(0, t_max, chunk_size):
+        stop = min(start + chunk_size, t_max)
+        chunk = window(start - t_lo, stop - t_lo)
+        # Эпохи расширенного интервала t < 0 приходятся на конец
+        wrap = max(start, t_max + t_lo)
+        if wrap < stop:
+            chunk[wrap - start:] += window(
+                wrap - t_max - t_lo, stop - t_max - t_lo)
+        yield chunk
+
+
+def _make_impulses(t0, frequency, span, weight, n_launches):
+    """
+    Формирование импульсов разностного массива, распространяемых
+    с шагом частоты запуска (как в _integer_loading: начало и конец
+    первого запуска, гашение после последнего запуска)
+    :param t0: массив времен первого запуска
+    :param frequency: массив частот запуска
+    :param span: массив продолжительностей выполнения
+    :param weight: массив "весов" задач
+    :param n_launches: массив кол-ва запусков задач
+    :return: список (частота, массив позиций импульсов, массив весов)
+    """
+    groups = list()
+    for f in _np.unique(frequency).tolist():
+        mask = frequency == f
+        f_t0, f_span, f_weight = t0[mask], span[mask], weight[mask]
+        last = f_t0 + n_launches[mask] * f
+        groups.append((
+            f,
+            _np.concatenate([f_t0, f_t0 + f_span, last, last + f_span]),
+            _np.concatenate([f_weight, -f_weight, -f_weight, f_weight])
+        ))
+    return groups
+
+
+def _window_loading(groups, dtype, lo, hi):
+    """
+    Расчет загрузки на отрезке эпох [lo, hi) расширенного интервала
+     - вклад импульсов до начала отрезка рассчитывается в замкнутом виде
+       (по остаткам от деления на частоту), поэтому объем памяти
+       определяется длиной отрезка и частотами запуска
+    :param groups: импульсы, сгруппированные по частоте (_make_impulses)
+    :param dtype: тип значений загрузки (целочисленная загрузка
+        округляется, как в _integer_loading)
+    :param lo: начало отрезка
+    :param hi: конец отрезка (не включается)
+    :return: массив уровней загрузки на отрезке
+    """
+    length = hi - lo
+    base = 0.
+    diff = _np.zeros(length, dtype=_np.float64)
+    for f, points, weight in groups:
+        before = points < lo
+        # Уровень загрузки перед отрезком и распространяемые импульсы
+        base += (weight[before] * ((lo - 1 - points[before]) // f + 1)).sum()
+        pad = lo % f
+        n_rows = -(-(pad + length) // f)
+        inside = ~before & (points < hi)
+        periodic = _np.zeros(n_rows * f, dtype=_np.float64)
+        periodic += _np.bincount(
+            points[inside] - lo + pad, weight[inside], n_rows * f)
+        periodic[:f] += _np.bincount(points[before] % f, weight[before], f)
+        diff += periodic.reshape(n_rows, f).cumsum(axis=0).ravel()[
+            pad:pad + length]
+    loading = base + diff.cumsum()
+    if _np.dtype(dtype).kind in 'iu':
+        return _np.rint(loading).astype(dtype)
+    return loading.astype(dtype, copy=False)
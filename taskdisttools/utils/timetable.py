@@ -6,8 +6,16 @@
 # =============================================================================
 
 
+import numpy as _np
+
+
+# =============================================================================
+
+
 __all__ = [
     'model_launches',
+    'launch_epochs',
+    'batch_launch_epochs',
     'make_timetable',
 ]
 
@@ -34,6 +42,70 @@ def model_launches(t0, f, s, t_max):
             t = t0
 
 
+def launch_epochs(t0, f, s, t_max):
+    """
+    Моделирование запусков задачи (векторизованный вариант model_launches)
+    :param t0: время первого запуска
+    :param f: частота запусков
+    :param s: продолжительность работы
+    :param t_max: максимальная эпоха моделирования
+    :return: массив эпох, на которые приходтся активность задачи
+             (отрицательные эпохи отсчитываются от t_max, как индексы
+             в расписании)
+    """
+    s = max(s, 1)
+    if t0 >= t_max:
+        return _np.empty(0, dtype=_np.int64)
+    if t0 < -t_max:
+        raise IndexError('list index out of range')
+
+    n_launches = min((t_max - 1 - t0) // f + 1,
+                     max(-((t0 + s - 1 - t_max) // f), 0) + 1)
+    epochs = (
+        _np.arange(t0, t0 + n_launches * f, f, dtype=_np.int64)[:, None] +
+        _np.arange(s, dtype=_np.int64)[None, :]
+    ).ravel()
+    epochs = epochs[epochs < t_max]
+    epochs[epochs < 0] += t_max
+    return epochs
+
+
+def batch_launch_epochs(t0, f, s, t_max):
+    """
+    Моделирование запусков задачи для набора значений t0
+    :param t0: массив времен первого запуска
+    :param f: частота запусков
+    :param s: продолжительность работы
+    :param t_max: максимальная эпоха моделирования
+    :return: массив эпох активности задачи (подряд для каждого t0, порядок
+             как в launch_epochs) и массив кол-ва эпох для каждого t0
+    """
+    t0 = _np.asarray(t0, dtype=_np.int64)
+    s = max(s, 1)
+    if _np.any(t0 < -t_max):
+        raise IndexError('list index out of range')
+
+    n_launches = _np.minimum(
+        (t_max - 1 - t0) // f + 1,
+        _np.maximum(-((t0 + s - 1 - t_max) // f), 0) + 1
+    )
+    n_launches = _np.maximum(n_launches, 0)
+    k_max = int(n_launches.max()) if t0.size > 0 else 0
+
+    launches = _np.arange(k_max, dtype=_np.int64)
+    epochs = (
+        t0[:, None, None] +
+        f * launches[None, :, None] +
+        _np.arange(s, dtype=_np.int64)[None, None, :]
+    )
+    mask = (launches[None, :, None] < n_launches[:, None, None]) & \
+        (epochs < t_max)
+    counts = mask.sum(axis=(1, 2))
+    epochs = epochs[mask]
+    epochs[epochs < 0] += t_max
+    return epochs, counts
+
+
 # =============================================================================
 
 
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# =============================================================================
+
+
+import random
+import unittest
+import numpy as np
+from taskdisttools.task import Task, RootTask, TaskManager
+from taskdisttools.optimizer import SimulatedAnnealingOptimizer
+from taskdisttools.optimizer import GreedyOptimizer, OptimizationResults
+from taskdisttools.constraint import DelayConstraint, StepConstraint
+
+
+# =============================================================================
+
+
+T_MAX = 300
+
+
+def make_task_manager(n, seed):
+    """
+    Формирование набора задач с ограничениями и окнами t0
+    :param n: кол-во корневых задач
+    :param seed: инициализация генератора случайных чисел
+    :return: менеджер задач
+    """
+    rnd = random.Random(seed)
+    tm = TaskManager()
+    for i in range(n):
+        t0_min = rnd.choice([0, 0, 5])
+        root = RootTask(f'r{i}', rnd.randint(1, 5),
+                        rnd.choice([10, 15, 30, 60]),
+                        weight=rnd.randint(1, 4), t0_min=t0_min,
+                        t0_max=rnd.choice([None, t0_min + 1, 20]))
+        if rnd.random() < .5:
+            root.add_dependent_task(Task(f'd{i}', 2, weight=1), 1)
+        tm.add_root_task(root)
+    tm.add_constraint('r1', DelayConstraint('r2', 3))
+    for i in range(3, 8):
+        tm.add_constraint(f'r{i}', StepConstraint(rnd.choice([4, 5, 7])))
+    return tm
+
+
+class RecordingOptimizer(SimulatedAnnealingOptimizer):
+    """Оптимизатор, сохраняющий ходы (текущее t0, новое t0, окно)"""
+
+    def __init__(self, *args, **kwargs):
+        """Инициализация"""
+        super().__init__(*args, **kwargs)
+        self.moves = list()
+
+    def _make_move(self, evaluator, root, window, rng):
+        """Выбор нового значения t0 корневой задачи (с сохранением)"""
+        cur_t0 = int(evaluator.root_start_times[root])
+        t0 = super()._make_move(evaluator, root, window, rng)
+        self.moves.append((cur_t0, t0, window))
+        return t0
+
+
+# =============================================================================
+
+
+class SimulatedAnnealingOptimizerTest(unittest.TestCase):
+    """Оптимизация методом имитации отжига"""
+
+    def test_moves(self):
+        """Ходы не выходят за max_shift и окна t0 корневых задач"""
+        for seed in range(3):
+            tm = make_task_manager(30, seed)
+            for max_shift in (None, 1, 3):
+                optimizer = RecordingOptimizer(
+                    np.std, n_evaluations=500, max_shift=max_shift,
+                    initial_temperature=1., random_state=seed)
+                optimizer.optimize(tm, T_MAX)
+                self.assertGreater(len(optimizer.moves), 0)
+                for cur_t0, t0, window in optimizer.moves:
+                    if t0 is None:
+                        self.assertIsNotNone(max_shift)
+                        continue
+                    self.assertIn(t0, window)
+                    self.assertNotEqual(t0, cur_t0)
+                    if max_shift is not None:
+                        self.assertLessEqual(abs(t0 - cur_t0), max_shift)
+
+    def test_score(self):
+        """Значение метрики не хуже, чем для базового расписания"""
+        for seed in range(3):
+            tm = make_task_manager(30, seed)
+            model = tm.freeze()
+            baseline = OptimizationResults.from_model(
+                model, model.make_start_times(model.t0_min), np.std, T_MAX)
+            initial = GreedyOptimizer(
+                np.std, n_iterations=1, random_state=seed).optimize(
+                tm, T_MAX)
+            for max_shift in (None, 2):
+                # Высокая температура - принимаются и ухудшающие ходы
+                for temperature in (None, 100.):
+                    optimizer = SimulatedAnnealingOptimizer(
+                        np.std, n_evaluations=300, max_shift=max_shift,
+                        initial_temperature=temperature, random_state=seed)
+                    results = optimizer.optimize(tm, T_MAX)
+                    self.assertLessEqual(results.score, baseline.score)
+                    results = optimizer.optimize(tm, T_MAX, initial)
+                    self.assertLessEqual(results.score, initial.score)
+
+                    start_times = dict(results.start_times)
+                    tm._apply_constraints(start_times)
+                    self.assertEqual(start_times, results.start_times)
+
+
+# =============================================================================
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# =============================================================================
+
+
+import copy
+import random
+import tempfile
+import unittest
+import numpy as np
+from taskdisttools.task import Task, RootTask, TaskManager
+from taskdisttools.optimizer import GreedyOptimizer, OptimizationResults
+from taskdisttools.optimizer import save_results, load_results
+from taskdisttools.constraint import DelayConstraint, StepConstraint
+from taskdisttools.utils import Beautifier
+
+
+# =============================================================================
+
+
+def make_task_manager(n, seed):
+    """
+    Формирование набора задач с ограничениями на корневые задачи
+    с зависимыми задачами
+    :param n: кол-во корневых задач
+    :param seed: инициализация генератора случайных чисел
+    :return: менеджер задач
+    """
+    rnd = random.Random(seed)
+    tm = TaskManager()
+    for i in range(n):
+        root = RootTask(f'r{i}', rnd.randint(1, 5),
+                        rnd.choice([10, 15, 30, 60]),
+                        weight=rnd.randint(1, 4),
+                        t0_max=rnd.choice([None, 50]))
+        if rnd.random() < .5:
+            dependent = Task(f'd{i}', 2, weight=1)
+            root.add_dependent_task(dependent, 1)
+            if rnd.random() < .5:
+                dependent.add_dependent_task(Task(f'e{i}', 1, weight=2), 0)
+        tm.add_root_task(root)
+    tm.add_constraint('r1', DelayConstraint('r2', 3))
+    for i in range(3, 12):
+        tm.add_constraint(f'r{i}', StepConstraint(rnd.choice([4, 5, 7])))
+    return tm
+
+
+def make_beautifier(names, seed, **kwargs):
+    """
+    Формирование правил выравнивания
+    :param names: идентификаторы выравниваемых задач
+    :param seed: инициализация генератора случайных чисел
+    :return: объект постобработки
+    """
+    rnd = random.Random(seed)
+    bf = Beautifier(**kwargs)
+    for _ in range(20):
+        bf.add_alignment(rnd.sample(names, rnd.randint(2, 6)),
+                         rnd.choice([np.max, np.min, np.median]))
+    return bf
+
+
+def legacy_apply(bf, opt_results, task_manager):
+    """
+    Постобработка в прежнем виде (полный пересчет всех цепочек
+    и загрузки системы)
+    :param bf: объект постобработки
+    :param opt_results: результаты оптимизации
+    :param task_manager: менеджер задач
+    :return: результаты постобработки
+    """
+    target = copy.deepcopy(opt_results)
+    start_times = dict(target.start_times)
+    for alignment in bf._alignments:
+        bf._apply(start_times, alignment)
+    target.start_times, target.tasks_data = task_manager.make_model_input(
+        start_times, apply_constraints=False)
+    return target.evaluate()
+
+
+# =============================================================================
+
+
+class BeautifierTest(unittest.TestCase):
+    """Постобработка расписания"""
+
+    def test_legacy_output(self):
+        """Результаты совпадают с полным пересчетом цепочек"""
+        for seed in range(10):
+            tm = make_task_manager(40, seed)
+            results = GreedyOptimizer(np.std, n_iterations=1).optimize(
+                tm, 600)
+            names = list(tm.root_tasks.keys())
+            expected = legacy_apply(
+                make_beautifier(names, seed), results, tm)
+            actual = make_beautifier(names, seed).apply(results, tm)
+            self.assertEqual(actual.start_times, expected.start_times)
+            self.assertTrue((actual.loading == expected.loading).all())
+            self.assertEqual(actual.score, expected.score)
+
+    def test_dependent_out_of_step(self):
+        """t0 зависимых задач пересчитываются и для несдвинутых цепочек"""
+        tm = TaskManager()
+        root = RootTask('a', 2, 10)
+        root.add_dependent_task(Task('b', 1), 1)
+        tm.add_root_task(root)
+        tm.add_root_task(RootTask('c', 1, 10))
+        tm.add_root_task(RootTask('d', 1, 10))
+        start_times, tasks_data = tm.make_model_input({'a': 3, 'c': 0, 'd': 4})
+        start_times['b'] = 9
+        results = OptimizationResults(start_times, tasks_data, np.std, 60)
+
+        bf = Beautifier()
+        bf.add_alignment(['c', 'd'], np.max)
+        actual = bf.apply(results, tm)
+        expected = legacy_apply(bf, results, tm)
+        self.assertEqual(actual.start_times['b'], 6)
+        self.assertEqual(actual.start_times, expected.start_times)
+        self.assertTrue((actual.loading == expected.loading).all())
+
+    def test_read_only_loading(self):
+        """Постобработка результатов, загруженных из файла"""
+        tm = make_task_manager(30, 0)
+        results = GreedyOptimizer(np.std, n_iterations=1).optimize(tm, 600)
+        names = list(tm.root_tasks.keys())
+        expected = make_beautifier(names, 0).apply(results, tm)
+        expected_scored = make_beautifier(
+            names, 0, tolerance=2).apply(results, tm)
+        with tempfile.TemporaryDirectory() as path:
+            save_results(path, results)
+            loaded = load_results(path, np.std)
+            actual = make_beautifier(names, 0).apply(
+                loaded, tm, inplace=True)
+            self.assertEqual(actual.start_times, expected.start_times)
+            self.assertTrue((actual.loading == expected.loading).all())
+
+            loaded = load_results(path, np.std)
+            actual = make_beautifier(names, 0, tolerance=2).apply(
+                loaded, tm, inplace=True)
+            self.assertEqual(
+                actual.start_times, expected_scored.start_times)
+            del loaded, actual
+
+    def test_scored_constraints(self):
+        """Выравнивание с учетом загрузки не ухудшает значение метрики
+        и не нарушает ограничения и окна t0 сдвинутых задач"""
+        for seed in range(10):
+            tm = make_task_manager(40, seed)
+            results = GreedyOptimizer(
+                np.std, n_iterations=1, random_state=seed).optimize(tm, 600)
+            names = list(tm.root_tasks.keys())
+            for tolerance in (0, 3):
+                actual = make_beautifier(
+                    names, seed, tolerance=tolerance).apply(results, tm)
+                self.assertLessEqual(actual.score, results.score)
+                start_times = dict(actual.start_times)
+                tm._apply_constraints(start_times)
+                self.assertEqual(start_times, actual.start_times)
+                for name, task in tm.root_tasks.items():
+                    t0 = actual.start_times[name]
+                    if t0 != results.start_times[name]:
+                        self.assertGreaterEqual(t0, task.t0_min)
+                        if task.t0_max is not None:
+                            self.assertLessEqual(t0, task.t0_max)
+
+    def test_scored_no_shift(self):
+        """Шаг выравнивания, сдвигаемый ограничениями, не применяется"""
+        tm = TaskManager()
+        tm.add_root_task(RootTask('a', 1, 10))
+        tm.add_root_task(RootTask('b', 1, 10, t0_max=7))
+        tm.add_root_task(RootTask('c', 1, 10))
+        tm.add_constraint('b', StepConstraint(4))
+        start_times, tasks_data = tm.make_model_input(
+            {'a': 0, 'b': 4, 'c': 2})
+        results = OptimizationResults(start_times, tasks_data, np.std, 20)
+
+        # 7 -> 8 по StepConstraint (вне окна t0)
+        bf = Beautifier(tolerance=0)
+        bf.add_alignment(['a', 'b'], lambda deltas: 7)
+        self.assertEqual(bf.apply(results, tm).start_times, start_times)
+
+        # Ограничение невыравниваемой задачи на выравниваемую
+        tm = TaskManager()
+        for name in ('a', 'b', 'c'):
+            tm.add_root_task(RootTask(name, 1, 10))
+        tm.add_constraint('b', StepConstraint(4))
+        tm.add_constraint('c', DelayConstraint('b', 1))
+        start_times, tasks_data = tm.make_model_input(
+            {'a': 0, 'b': 4, 'c': 3})
+        results = OptimizationResults(start_times, tasks_data, np.std, 20)
+        bf = Beautifier(tolerance=0)
+        bf.add_alignment(['a', 'b'], lambda deltas: 8)
+        self.assertEqual(bf.apply(results, tm).start_times, start_times)
+
+
+# =============================================================================
+
+
+if __name__ == '__main__':
+    unittest.main()
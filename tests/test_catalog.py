@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# =============================================================================
+
+
+import os
+import csv
+import json
+import random
+import tempfile
+import unittest
+import numpy as np
+from taskdisttools.task import Task, RootTask, TaskManager, load_catalog
+from taskdisttools.constraint import DelayConstraint, PriorityConstraint
+from taskdisttools.constraint import StepConstraint
+from taskdisttools.utils import make_loading
+
+
+# =============================================================================
+
+
+T_MAX = 120
+RESOURCES = ['cpu', 'io', 'mem']
+
+
+def make_task_manager(n, seed, *, resources=False):
+    """
+    Формирование набора задач с зависимыми задачами и ограничениями
+    :param n: кол-во корневых задач
+    :param seed: инициализация генератора случайных чисел
+    :param resources: флаг "весов" по ресурсам (словари)
+    :return: менеджер задач
+    """
+    rnd = random.Random(seed)
+
+    def weight():
+        if resources:
+            return dict((name, rnd.randint(1, 3))
+                        for name in rnd.sample(RESOURCES, 2))
+        return rnd.choice([1, 2, 3, .5])
+
+    def add_dependent_tasks(task, depth):
+        for j in range(rnd.randint(0, 2) if depth < 3 else 0):
+            dependent = Task(f'{task.name}.{j}', rnd.randint(1, 4),
+                             weight=weight())
+            task.add_dependent_task(dependent, rnd.randint(0, 3))
+            add_dependent_tasks(dependent, depth + 1)
+
+    tm = TaskManager()
+    for i in range(n):
+        t0_min = rnd.choice([0, 3])
+        root = RootTask(f'r{i}', rnd.randint(1, 5),
+                        rnd.choice([10, 15, 30, 60]), weight=weight(),
+                        t0_min=t0_min,
+                        t0_max=rnd.choice([None, t0_min + 10]))
+        add_dependent_tasks(root, 0)
+        tm.add_root_task(root)
+    tm.add_constraint('r1', DelayConstraint('r2', 3))
+    tm.add_constraint('r4', PriorityConstraint('r0', 5))
+    for i in range(5, 9):
+        tm.add_constraint(f'r{i}', StepConstraint(rnd.choice([4, 5, 7])))
+    return tm
+
+
+def export_catalog(tm, *, shuffle=None):
+    """
+    Формирование таблиц задач и ограничений (списки записей)
+    :param tm: менеджер задач
+    :param shuffle: генератор случайных чисел для перемешивания строк
+        (None - корневые задачи, за каждой - ее зависимые задачи)
+    :return: таблица задач, таблица ограничений
+    """
+    tasks = list()
+    stack = [(task, None, None) for task in tm.root_tasks.values()][::-1]
+    while len(stack) > 0:
+        task, parent, delay = stack.pop()
+        record = {'name': task.name, 'span': task.span}
+        if parent is None:
+            record.update(frequency=task.frequency, t0_min=task.t0_min,
+                          t0_max=task.t0_max)
+        else:
+            record.update(parent=parent, delay=delay)
+        if isinstance(task.weight, dict):
+            record.update(
+                (f'weight.{name}', value)
+                for name, value in task.weight.items())
+        else:
+            record['weight'] = task.weight
+        tasks.append(record)
+        stack.extend(
+            (dependent, task.name, delay)
+            for dependent, delay in task.dependent_tasks[::-1])
+    if shuffle is not None:
+        shuffle.shuffle(tasks)
+
+    constraints = list()
+    for name, cnts in tm._constraints.items():
+        for cnt in cnts:
+            if isinstance(cnt, StepConstraint):
+                constraints.append(
+                    {'task': name, 'type': 'step', 'value': cnt.step_size})
+            else:
+                constraints.append({
+                    'task': name,
+                    'type': 'priority' if isinstance(
+                        cnt, PriorityConstraint) else 'delay',
+                    'target': cnt.target,
+                    'value': cnt.max_delay,
+                })
+    return tasks, constraints
+
+
+def to_columns(records):
+    """
+    Перевод списка записей в словарь столбцов
+    :param records: список записей
+    :return: словарь столбцов
+    """
+    names = dict()
+    for record in records:
+        names.update(dict.fromkeys(record.keys()))
+    return dict(
+        (name, [record.get(name) for record in records]) for name in names)
+
+
+def to_record_array(records):
+    """
+    Перевод списка записей в массив записей NumPy
+    (пустые значения - NaN в числовых столбцах, '' в строковых)
+    :param records: список записей
+    :return: массив записей
+    """
+    arrays = list()
+    columns = to_columns(records)
+    for values in columns.values():
+        if all(value is None or isinstance(value, (int, float))
+               for value in values):
+            arrays.append(np.array(
+                [np.nan if value is None else value for value in values],
+                dtype=np.float64))
+        else:
+            arrays.append(np.array(
+                ['' if value is None else value for value in values]))
+    return np.rec.fromarrays(arrays, names=list(columns.keys()))
+
+
+def write_csv(path, records):
+    """
+    Запись таблицы в файл CSV
+    :param path: путь к файлу
+    :param records: список записей
+    """
+    columns = to_columns(records)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns.keys())
+        writer.writerows(
+            ['' if value is None else value for value in row]
+            for row in zip(*columns.values()))
+
+
+def describe(tm):
+    """
+    Описание набора задач без учета порядка задач
+    (порядок зависимых задач определяется порядком строк таблицы)
+    :param tm: менеджер задач
+    :return: словарь параметров задач, словарь ограничений задач
+    """
+    tasks = dict()
+    stack = [(task, None, None) for task in tm.root_tasks.values()]
+    while len(stack) > 0:
+        task, parent, delay = stack.pop()
+        weight = task.weight
+        if isinstance(weight, dict):
+            # Пустые ячейки столбцов weight.<ресурс> - нулевой "вес"
+            weight = dict((name, value) for name, value in weight.items()
+                          if value != 0)
+        tasks[task.name] = (
+            parent, delay, task.span, weight,
+            getattr(task, 'frequency', None), getattr(task, 't0_min', None),
+            getattr(task, 't0_max', None),
+            sorted(dependent.name for dependent, _ in task.dependent_tasks))
+        stack.extend((dependent, task.name, delay)
+                     for dependent, delay in task.dependent_tasks)
+    constraints = dict(
+        (name, [(type(cnt).__name__, vars(cnt)) for cnt in cnts])
+        for name, cnts in tm._constraints.items() if len(cnts) > 0)
+    return tasks, constraints
+
+
+# =============================================================================
+
+
+class CatalogTest(unittest.TestCase):
+    """Массовая загрузка набора задач"""
+
+    def assertModelEqual(self, model, expected):
+        """
+        Сравнение компактных моделей
+        :param model: компактная модель
+        :param expected: ожидаемая компактная модель
+        """
+        self.assertEqual(model.names, expected.names)
+        for name in ('parent', 'root', 'offset', 'frequency', 'span',
+                     'weight', 'root_ids', 't0_min', 't0_max'):
+            self.assertTrue(
+                np.array_equal(getattr(model, name), getattr(expected, name)),
+                name)
+        self.assertEqual(model.resources, expected.resources)
+        self.assertEqual(
+            [(model.names[task], [
+                (type(cnt), vars(cnt),
+                 None if target is None else model.names[target])
+                for cnt, target in cnts])
+             for task, cnts in model.plan.steps],
+            [(expected.names[task], [
+                (type(cnt), vars(cnt),
+                 None if target is None else expected.names[target])
+                for cnt, target in cnts])
+             for task, cnts in expected.plan.steps])
+
+    def check_round_trip(self, tm, tasks, constraints, *, ordered):
+        """
+        Сравнение загруженного набора задач с исходным
+        :param tm: исходный менеджер задач
+        :param tasks: таблица задач
+        :param constraints: таблица ограничений
+        :param ordered: флаг совпадения порядка корневых задач
+        """
+        loaded = load_catalog(tasks, constraints)
+        self.assertEqual(describe(loaded), describe(tm))
+        self.assertEqual(loaded.resources, tm.resources)
+        model = load_catalog(tasks, constraints, freeze=True)
+        self.assertModelEqual(model, loaded.freeze())
+        if ordered:
+            self.assertModelEqual(model, tm.freeze())
+
+        root_start_times = dict(
+            (name, task.t0_min) for name, task in tm.root_tasks.items())
+        start_times, tasks_data = loaded.make_model_input(root_start_times)
+        expected_start_times, expected_data = tm.make_model_input(
+            root_start_times)
+        self.assertEqual(start_times, expected_start_times)
+        self.assertTrue(np.array_equal(
+            make_loading(start_times, tasks_data, T_MAX),
+            make_loading(expected_start_times, expected_data, T_MAX)))
+
+    def test_round_trip(self):
+        """Набор задач, выгруженный в таблицы, загружается без изменений"""
+        for seed in range(5):
+            for resources in (False, True):
+                tm = make_task_manager(15, seed, resources=resources)
+                tasks, constraints = export_catalog(tm)
+                self.check_round_trip(tm, tasks, constraints, ordered=True)
+                self.check_round_trip(
+                    tm, to_columns(tasks), to_columns(constraints),
+                    ordered=True)
+                self.check_round_trip(
+                    tm, to_record_array(tasks), to_record_array(constraints),
+                    ordered=True)
+
+                # Родительские задачи могут следовать за зависимыми
+                tasks, constraints = export_catalog(
+                    tm, shuffle=random.Random(seed))
+                self.check_round_trip(tm, tasks, constraints, ordered=False)
+
+    def test_files(self):
+        """Загрузка из файлов CSV и JSON"""
+        for resources in (False, True):
+            tm = make_task_manager(15, 0, resources=resources)
+            tasks, constraints = export_catalog(tm)
+            with tempfile.TemporaryDirectory() as path:
+                write_csv(os.path.join(path, 'tasks.csv'), tasks)
+                write_csv(os.path.join(path, 'constraints.csv'), constraints)
+                with open(os.path.join(path, 'tasks.json'), 'w') as f:
+                    json.dump(tasks, f)
+                with open(os.path.join(path, 'constraints.json'), 'w') as f:
+                    json.dump(to_columns(constraints), f)
+                for ext in ('csv', 'json'):
+                    self.check_round_trip(
+                        tm, os.path.join(path, f'tasks.{ext}'),
+                        os.path.join(path, f'constraints.{ext}'),
+                        ordered=True)
+
+    def test_manager(self):
+        """Задачи добавляются в заданный менеджер задач"""
+        tm = make_task_manager(15, 0)
+        tasks, constraints = export_catalog(tm)
+        manager = TaskManager()
+        manager.add_root_task(RootTask('extra', 1, 10))
+        self.assertIs(load_catalog(tasks, constraints, manager=manager),
+                      manager)
+        self.assertEqual(list(manager.root_tasks.keys()),
+                         ['extra'] + list(tm.root_tasks.keys()))
+        self.assertEqual(describe(manager)[1], describe(tm)[1])
+
+
+# =============================================================================
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# =============================================================================
+
+
+import random
+import unittest
+from taskdisttools.constraint import ConstraintPlan
+from taskdisttools.constraint import DelayConstraint, StepConstraint
+
+
+# =============================================================================
+
+
+def make_constraint(rnd, task, names):
+    """
+    Формирование случайного ограничения
+    :param rnd: генератор случайных чисел
+    :param task: идентификатор задачи
+    :param names: идентификаторы возможных целевых задач
+    :return: ограничение
+    """
+    targets = [name for name in names if name != task]
+    if rnd.random() < .5 or len(targets) == 0:
+        return StepConstraint(rnd.choice([2, 3, 5]))
+    return DelayConstraint(rnd.choice(targets), rnd.randint(0, 5))
+
+
+def describe(plan):
+    """
+    Описание плана через идентификаторы задач
+    :param plan: план применения ограничений
+    :return: список шагов (задача, [(ограничение, целевая задача)])
+    """
+    return [
+        (plan.columns[column], [
+            (id(cnt), None if target is None else plan.columns[target])
+            for cnt, target in cnts
+        ])
+        for column, cnts in plan.steps
+    ]
+
+
+# =============================================================================
+
+
+class ConstraintPlanTest(unittest.TestCase):
+    """План применения ограничений"""
+
+    def test_extend(self):
+        """Дополнение плана совпадает с компиляцией"""
+        for seed in range(50):
+            rnd = random.Random(seed)
+            names = [f't{i}' for i in range(12)]
+            constraints = dict()
+            plan = ConstraintPlan.compile(constraints)
+            for _ in range(30):
+                task = rnd.choice(names)
+                constraints.setdefault(task, []).append(
+                    make_constraint(rnd, task, names))
+                try:
+                    expected = ConstraintPlan.compile(constraints)
+                except RuntimeError:
+                    constraints[task].pop()
+                    continue
+                extended = plan.extend(task, constraints[task])
+                plan = expected if extended is None else extended
+                self.assertEqual(describe(plan), describe(expected))
+                for tasks in (names[:4], names[6:]):
+                    self.assertEqual(
+                        [plan.steps[i][0]
+                         for i in plan.get_targeted_by(tasks)],
+                        [column for column, cnts in plan.steps
+                         if any(target is not None and
+                                plan.columns[target] in tasks
+                                for _, target in cnts)])
+
+
+# =============================================================================
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# =============================================================================
+
+
+import random
+import unittest
+import numpy as np
+from taskdisttools.task import Task, RootTask, TaskManager
+from taskdisttools.optimizer import IncrementalEvaluator, OptimizationResults
+from taskdisttools.optimizer import ScoreCache
+from taskdisttools.constraint import DelayConstraint, StepConstraint
+
+
+# =============================================================================
+
+
+T_MAX = 600
+
+
+def make_model(n, seed, *, float_weights=False):
+    """
+    Формирование компактной модели набора задач с ограничениями
+    :param n: кол-во корневых задач
+    :param seed: инициализация генератора случайных чисел
+    :param float_weights: флаг дробных "весов" задач
+    :return: компактная модель набора задач
+    """
+    rnd = random.Random(seed)
+
+    def weight():
+        return rnd.random() * 3 if float_weights else rnd.randint(1, 4)
+
+    tm = TaskManager()
+    for i in range(n):
+        root = RootTask(f'r{i}', rnd.randint(1, 5),
+                        rnd.choice([10, 15, 30, 60]), weight=weight(),
+                        t0_max=rnd.choice([None, 50]))
+        if rnd.random() < .5:
+            root.add_dependent_task(Task(f'd{i}', 2, weight=weight()), 1)
+        tm.add_root_task(root)
+    tm.add_constraint('r1', DelayConstraint('r2', 3))
+    for i in range(3, 8):
+        tm.add_constraint(f'r{i}', StepConstraint(rnd.choice([4, 5, 7])))
+    return tm.freeze()
+
+
+def legacy_evaluate(model, metric, root_start_times):
+    """
+    Полный расчет параметров расписания (как Optimizer._evaluate)
+    :param model: компактная модель набора задач
+    :param metric: метрика
+    :param root_start_times: массив t0 корневых задач
+    :return: результаты расчета
+    """
+    return OptimizationResults.from_model(
+        model, model.make_start_times(root_start_times), metric, T_MAX)
+
+
+# =============================================================================
+
+
+class IncrementalEvaluatorTest(unittest.TestCase):
+    """Инкрементальный расчет параметров расписания"""
+
+    def check_moves(self, metric, *, float_weights, exact):
+        """
+        Сравнение оценок и загрузки после изменений с полным расчетом
+        :param metric: метрика
+        :param float_weights: флаг дробных "весов" задач
+        :param exact: флаг точного совпадения значений
+        """
+        for seed in range(5):
+            model = make_model(30, seed, float_weights=float_weights)
+            rnd = random.Random(seed)
+            evaluator = IncrementalEvaluator(
+                model, metric, T_MAX, model.t0_min)
+            for _ in range(40):
+                root = rnd.randrange(len(model.root_ids))
+                t0 = rnd.choice(model.get_start_times(root, T_MAX))
+                root_start_times = evaluator.root_start_times.copy()
+                root_start_times[root] = t0
+                expected = legacy_evaluate(model, metric, root_start_times)
+
+                score = evaluator.evaluate_move(root, t0)
+                evaluator.apply_move(root, t0)
+                self.assertTrue(
+                    (evaluator.start_times == expected.start_times_array)
+                    .all())
+                if exact:
+                    self.assertEqual(score, expected.score)
+                    self.assertTrue(
+                        (evaluator.loading == expected.loading).all())
+                else:
+                    self.assertAlmostEqual(score, expected.score, places=9)
+                    self.assertTrue(
+                        np.allclose(evaluator.loading, expected.loading))
+
+    def test_integer_weights(self):
+        """Для целочисленных "весов" значения совпадают с полным расчетом"""
+        self.check_moves(np.max, float_weights=False, exact=True)
+        self.check_moves(
+            lambda loading: float(np.percentile(loading, 90)),
+            float_weights=False, exact=True)
+
+    def test_moment_metrics(self):
+        """np.std и np.var рассчитываются по точным суммам"""
+        self.check_moves(np.std, float_weights=False, exact=False)
+        self.check_moves(np.var, float_weights=False, exact=False)
+
+    def test_float_weights(self):
+        """Для дробных "весов" значения совпадают с точностью до округления"""
+        self.check_moves(np.std, float_weights=True, exact=False)
+        self.check_moves(np.max, float_weights=True, exact=False)
+
+    def test_cache(self):
+        """Оценки с кешем совпадают с оценками без кеша"""
+        model = make_model(30, 0)
+        rnd = random.Random(0)
+        cache = ScoreCache(1000)
+        cached = IncrementalEvaluator(
+            model, np.std, T_MAX, model.t0_min, cache=cache)
+        evaluator = IncrementalEvaluator(model, np.std, T_MAX, model.t0_min)
+        for _ in range(100):
+            root = rnd.randrange(len(model.root_ids))
+            t0s = list(model.get_start_times(root, T_MAX))
+            self.assertTrue((cached.evaluate_moves(root, t0s) ==
+                             evaluator.evaluate_moves(root, t0s)).all())
+            t0 = rnd.choice(t0s)
+            self.assertEqual(cached.evaluate_move(root, t0),
+                             evaluator.evaluate_move(root, t0))
+            if rnd.random() < .3:
+                cached.apply_move(root, t0)
+                evaluator.apply_move(root, t0)
+        self.assertGreater(cache.hits, 0)
+
+    def test_selected_t0s(self):
+        """Оценки по t0, отобранным select_moves, совпадают с полными"""
+        model = make_model(30, 1)
+        rnd = random.Random(1)
+        evaluator = IncrementalEvaluator(model, np.std, T_MAX, model.t0_min)
+        for _ in range(50):
+            root = rnd.randrange(len(model.root_ids))
+            t0s = list(model.get_start_times(root, T_MAX))
+            positions, moved_t0s = evaluator.select_moves(
+                root, t0s, return_t0s=True)
+            self.assertTrue(
+                (positions == evaluator.select_moves(root, t0s)).all())
+            moves = [t0s[j] for j in positions.tolist()]
+            self.assertTrue(
+                (evaluator.evaluate_moves(root, moves, moved_t0s=moved_t0s)
+                 == evaluator.evaluate_moves(root, moves)).all())
+            if rnd.random() < .3 and len(moves) > 0:
+                evaluator.apply_move(root, rnd.choice(moves))
+
+
+# =============================================================================
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# =============================================================================
+
+
+import itertools
+import random
+import unittest
+from unittest import mock
+import numpy as np
+from taskdisttools.task import Task, RootTask, TaskManager
+from taskdisttools.optimizer import ExactOptimizer, GreedyOptimizer
+from taskdisttools.optimizer import exact_optimizer
+from taskdisttools.constraint import DelayConstraint, StepConstraint
+from taskdisttools.utils import compute_loading
+
+
+# =============================================================================
+
+
+T_MAX = 24
+
+# Решатели, доступные в окружении
+BACKENDS = [name for name, (_, available) in
+            exact_optimizer._BACKENDS.items() if available]
+
+
+def make_task_manager(seed):
+    """
+    Формирование небольшого набора задач с ограничениями
+    :param seed: инициализация генератора случайных чисел
+    :return: менеджер задач
+    """
+    rnd = random.Random(seed)
+    tm = TaskManager()
+    for i in range(4):
+        root = RootTask(f'r{i}', rnd.randint(1, 3), rnd.choice([6, 8, 12]),
+                        weight=rnd.randint(1, 3), t0_max=rnd.randint(3, 6))
+        if rnd.random() < .5:
+            dependent = Task(f'd{i}', rnd.randint(1, 2),
+                             weight=rnd.randint(1, 2))
+            root.add_dependent_task(dependent, rnd.randint(0, 1))
+        tm.add_root_task(root)
+    tm.add_constraint('r1', StepConstraint(2))
+    tm.add_constraint('r3', DelayConstraint('r2', 2))
+    return tm
+
+
+def brute_force(model, objective):
+    """
+    Минимум целевой функции перебором всех t0 корневых задач
+    (относительные ограничения должны выполняться без коррекции t0)
+    :param model: компактная модель набора задач
+    :param objective: функция загрузки системы
+    :return: минимальное значение целевой функции
+    """
+    best = np.inf
+    delayed = model.root[model.index['r3']]
+    for root_start_times in itertools.product(*(
+            model.get_start_times(root, T_MAX)
+            for root in range(len(model.root_ids)))):
+        root_start_times = np.array(root_start_times, dtype=np.int64)
+        start_times = model.make_start_times(root_start_times)
+        if start_times[model.index['r3']] != root_start_times[delayed]:
+            continue
+        best = min(best, objective(compute_loading(
+            start_times, model.frequency, model.span, model.weight, T_MAX)))
+    return best
+
+
+# =============================================================================
+
+
+class ExactOptimizerTest(unittest.TestCase):
+    """Точный алгоритм оптимизации"""
+
+    @unittest.skipIf(len(BACKENDS) == 0, 'No MILP solver available')
+    def test_brute_force(self):
+        """Значение целевой функции совпадает с минимумом перебором"""
+        for seed in range(3):
+            tm = make_task_manager(seed)
+            model = tm.freeze()
+            for objective in ('peak', 'spread'):
+                for backend in BACKENDS:
+                    optimizer = ExactOptimizer(
+                        np.max, objective=objective, backend=backend)
+                    results = optimizer.optimize(tm, T_MAX)
+                    self.assertEqual(optimizer.status_, 'optimal')
+                    expected = brute_force(model, optimizer.get_objective)
+                    self.assertAlmostEqual(
+                        optimizer.objective_, expected, places=6)
+                    self.assertAlmostEqual(
+                        optimizer.get_objective(results.loading), expected,
+                        places=6)
+                    self.assertAlmostEqual(optimizer.gap_, 0., places=6)
+
+                    start_times = dict(results.start_times)
+                    tm._apply_constraints(start_times)
+                    self.assertEqual(start_times, results.start_times)
+
+    def test_fallback(self):
+        """При отсутствии решателя используется запасной оптимизатор"""
+        tm = make_task_manager(0)
+        unavailable = dict(
+            (name, (solve, False))
+            for name, (solve, _) in exact_optimizer._BACKENDS.items())
+        with mock.patch.dict(exact_optimizer._BACKENDS, unavailable):
+            optimizer = ExactOptimizer(
+                np.std, fallback=GreedyOptimizer(
+                    np.std, n_iterations=2, random_state=0))
+            results = optimizer.optimize(tm, T_MAX)
+            self.assertEqual(optimizer.status_, 'fallback')
+            self.assertIsNone(optimizer.bound_)
+            expected = GreedyOptimizer(
+                np.std, n_iterations=2, random_state=0).optimize(tm, T_MAX)
+            self.assertEqual(results.start_times, expected.start_times)
+            self.assertEqual(results.score, expected.score)
+
+            with self.assertRaises(RuntimeError):
+                ExactOptimizer(np.std).optimize(tm, T_MAX)
+
+
+# =============================================================================
+
+
+if __name__ == '__main__':
+    unittest.main()
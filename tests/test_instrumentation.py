@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# =============================================================================
+
+
+import random
+import logging
+import unittest
+from unittest import mock
+import numpy as np
+from taskdisttools.task import Task, RootTask, TaskManager
+from taskdisttools.optimizer import GreedyOptimizer, Instrumentation
+from taskdisttools.optimizer import LoggingCallback, instrumentation
+from taskdisttools.constraint import DelayConstraint, StepConstraint
+
+
+# =============================================================================
+
+
+T_MAX = 300
+
+
+def make_task_manager(n, seed):
+    """
+    Формирование набора задач с ограничениями
+    :param n: кол-во корневых задач
+    :param seed: инициализация генератора случайных чисел
+    :return: менеджер задач
+    """
+    rnd = random.Random(seed)
+    tm = TaskManager()
+    for i in range(n):
+        root = RootTask(f'r{i}', rnd.randint(1, 5),
+                        rnd.choice([10, 15, 30, 60]),
+                        weight=rnd.randint(1, 4))
+        if rnd.random() < .5:
+            root.add_dependent_task(Task(f'd{i}', 2, weight=1), 1)
+        tm.add_root_task(root)
+    tm.add_constraint('r1', DelayConstraint('r2', 3))
+    tm.add_constraint('r3', StepConstraint(5))
+    return tm
+
+
+def optimize(tm, n_jobs):
+    """
+    Оптимизация 'жадным' алгоритмом со сбором статистики
+    :param tm: менеджер задач
+    :param n_jobs: кол-во параллельных процессов
+    :return: результаты оптимизации, статистика, список событий
+    """
+    events = list()
+    stats = Instrumentation(lambda event, data: events.append((event, data)))
+    results = GreedyOptimizer(
+        np.std, n_iterations=4, random_state=0, n_jobs=n_jobs,
+        instrumentation=stats).optimize(tm, T_MAX)
+    return results, stats, events
+
+
+# =============================================================================
+
+
+class InstrumentationTest(unittest.TestCase):
+    """Сбор статистики работы алгоритма оптимизации"""
+
+    def test_counters(self):
+        """Счетчики, время этапов и объединение статистики"""
+        stats = Instrumentation()
+        stats.count('a')
+        stats.count('a', 2)
+        stats.count('b', 5)
+        stats.add_time('x', .5)
+        stats.add_time('x', .25)
+        self.assertEqual(stats.to_dict(), {
+            'counters': {'a': 3, 'b': 5},
+            'timers': {'x': .75},
+        })
+
+        # Время блока учитывается и при исключении
+        with mock.patch.object(instrumentation.time, 'perf_counter',
+                               side_effect=[1., 3.5, 10., 11.]):
+            with stats.timer('y'):
+                pass
+            with self.assertRaises(ValueError):
+                with stats.timer('y'):
+                    raise ValueError()
+        self.assertEqual(stats.timers, {'x': .75, 'y': 3.5})
+
+        other = Instrumentation()
+        other.count('a', 4)
+        other.count('c')
+        other.add_time('y', 1.)
+        self.assertIs(stats.merge(other.to_dict()), stats)
+        self.assertEqual(stats.to_dict(), {
+            'counters': {'a': 7, 'b': 5, 'c': 1},
+            'timers': {'x': .75, 'y': 4.5},
+        })
+        # Статистика - копия, не изменяемая объектом
+        result = stats.to_dict()
+        stats.count('a')
+        self.assertEqual(result['counters']['a'], 7)
+
+        self.assertIs(stats.reset(), stats)
+        self.assertEqual(stats.to_dict(), {'counters': {}, 'timers': {}})
+
+    def test_events(self):
+        """Передача событий подписчикам и запись в журнал"""
+        events = list()
+        logger = logging.getLogger('taskdisttools.test')
+        stats = Instrumentation(
+            lambda event, data: events.append((event, data)),
+            LoggingCallback(logger))
+        with self.assertLogs(logger, logging.INFO) as logs:
+            stats.emit('iteration', iteration=1, score=np.float64(.5))
+        self.assertEqual(events, [('iteration', {'iteration': 1,
+                                                 'score': .5})])
+        self.assertEqual(logs.output, [
+            'INFO:taskdisttools.test:iteration '
+            '{"iteration": 1, "score": 0.5}'])
+
+    def test_greedy(self):
+        """Статистика 'жадного' алгоритма согласована с событиями"""
+        tm = make_task_manager(30, 0)
+        results, stats, events = optimize(tm, 1)
+        names = [event for event, _ in events]
+        self.assertEqual(names[0], 'start')
+        self.assertEqual(names[-1], 'finish')
+        self.assertEqual(names.count('iteration'), 4)
+        self.assertEqual(events[-1][1]['score'], results.score)
+
+        counters = stats.counters
+        self.assertEqual(counters['iterations'], 4)
+        evaluations = [data for event, data in events
+                       if event == 'evaluation']
+        self.assertEqual(
+            counters['evaluations'],
+            sum(data['n_evaluated'] for data in evaluations))
+        self.assertEqual(
+            counters['rejected'],
+            sum(data['n_candidates'] - data['n_evaluated']
+                for data in evaluations))
+        self.assertGreater(counters['accepted'], 0)
+        self.assertLessEqual(counters['accepted'], counters['evaluations'])
+        self.assertEqual(
+            counters['cache_hits'] + counters['cache_misses'],
+            counters['evaluations'])
+        for name in ('freeze', 'baseline', 'optimize', 'select',
+                     'evaluate', 'apply', 'results'):
+            self.assertIn(name, stats.timers)
+            self.assertGreaterEqual(stats.timers[name], 0.)
+        self.assertLessEqual(stats.timers['evaluate'],
+                             stats.timers['optimize'])
+
+    def test_merge(self):
+        """
+        Статистика процессов-исполнителей (n_jobs > 1) суммируется
+        и совпадает с последовательным выполнением
+        """
+        tm = make_task_manager(30, 0)
+        results, stats, _ = optimize(tm, 1)
+        parallel_results, parallel_stats, events = optimize(tm, 2)
+        self.assertEqual(parallel_results.start_times, results.start_times)
+        self.assertEqual(parallel_results.score, results.score)
+
+        # У каждого процесса собственный кеш: совпадает лишь общее
+        # кол-во обращений
+        counters = dict(stats.counters)
+        parallel_counters = dict(parallel_stats.counters)
+        self.assertEqual(
+            parallel_counters.pop('cache_hits') +
+            parallel_counters.pop('cache_misses'),
+            counters.pop('cache_hits') + counters.pop('cache_misses'))
+        self.assertEqual(parallel_counters, counters)
+        self.assertEqual(set(parallel_stats.timers), set(stats.timers))
+
+        # События оценок в процессах не передаются
+        names = [event for event, _ in events]
+        self.assertNotIn('evaluation', names)
+        self.assertEqual(names.count('iteration'), 4)
+        self.assertEqual(
+            min(data['score'] for event, data in events
+                if event == 'iteration'), results.score)
+
+
+# =============================================================================
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# =============================================================================
+
+
+import unittest
+import numpy as np
+from taskdisttools.metric import PeakMetric, VarMetric, StdMetric
+from taskdisttools.metric import NormMetric, OverloadMetric
+from taskdisttools.metric import PercentileMetric, ResourceMetric
+from taskdisttools.metric import CompositeMetric
+
+
+# =============================================================================
+
+
+T_MAX = 500
+CAPACITY = np.array([6., 9.])
+
+
+def make_metrics():
+    """
+    Формирование метрик библиотеки и функций их полного расчета
+    :return: список пар (метрика, функция загрузки системы)
+    """
+    return [
+        (PeakMetric(), np.max),
+        (VarMetric(), np.var),
+        (StdMetric(), np.std),
+        (NormMetric(3),
+         lambda x: np.sum(np.abs(x) ** 3) ** (1 / 3)),
+        (OverloadMetric(5, power=2),
+         lambda x: np.sum(np.maximum(x - 5, 0) ** 2)),
+        (PercentileMetric(90), lambda x: np.percentile(x, 90)),
+        (PercentileMetric(0), np.min),
+        (PeakMetric() + .5 * StdMetric(),
+         lambda x: np.max(x) + .5 * np.std(x)),
+        (CompositeMetric([(np.mean, 2), (VarMetric(), -1)]),
+         lambda x: 2 * np.mean(x) - np.var(x)),
+    ]
+
+
+def make_resource_metrics():
+    """
+    Формирование метрик загрузки по ресурсам и функций их полного расчета
+    :return: список пар (метрика, функция матрицы загрузки эпоха x ресурс)
+    """
+    return [
+        (ResourceMetric(capacity=CAPACITY),
+         lambda x: np.max(np.max(x, axis=0) / CAPACITY)),
+        (ResourceMetric(StdMetric(), reduce=np.sum),
+         lambda x: np.sum(np.std(x, axis=0))),
+        (ResourceMetric(PercentileMetric(75), CAPACITY, np.mean),
+         lambda x: np.mean(np.percentile(x, 75, axis=0) / CAPACITY)),
+    ]
+
+
+def make_loading(rnd, shape, integer):
+    """
+    Формирование случайной загрузки системы
+    :param rnd: генератор случайных чисел
+    :param shape: форма массива загрузки
+    :param integer: флаг целочисленной загрузки
+    :return: массив загрузки
+    """
+    if integer:
+        return rnd.integers(0, 10, shape)
+    return rnd.random(shape) * 10
+
+
+def make_delta(rnd, shape, integer):
+    """
+    Формирование случайного изменения загрузки
+    :param rnd: генератор случайных чисел
+    :param shape: форма массива загрузки
+    :param integer: флаг целочисленной загрузки
+    :return: массив эпох (без повторов), массив изменений
+    """
+    size = int(rnd.integers(1, 20))
+    epochs = rnd.choice(shape[0], size, replace=False)
+    if integer:
+        return epochs, rnd.integers(-3, 4, (size,) + shape[1:])
+    return epochs, rnd.random((size,) + shape[1:]) * 6 - 3
+
+
+# =============================================================================
+
+
+class MetricTest(unittest.TestCase):
+    """Метрики загрузки системы"""
+
+    def check_metric(self, metric, func, shape, integer):
+        """
+        Сравнение значений метрики с полным расчетом
+        :param metric: метрика
+        :param func: функция полного расчета
+        :param shape: форма массива загрузки
+        :param integer: флаг целочисленной загрузки
+        """
+        rnd = np.random.default_rng(0)
+        loading = make_loading(rnd, shape, integer)
+        self.assertAlmostEqual(metric(loading), func(loading), places=9)
+
+        # Расчет по оси эпох матрицы загрузок
+        loadings = np.stack(
+            [make_loading(rnd, shape, integer) for _ in range(4)])
+        expected = [func(row) for row in loadings]
+        self.assertTrue(np.allclose(metric(loadings, axis=1), expected))
+        self.assertTrue(np.allclose(
+            metric(np.moveaxis(loadings, 0, 1), axis=0), expected))
+
+        # Расчет по гистограмме и по фрагментам
+        values, counts = np.unique(loading, axis=0, return_counts=True)
+        self.assertAlmostEqual(
+            metric.from_histogram(values, counts), func(loading), places=9)
+        self.assertAlmostEqual(
+            metric.from_chunks(np.array_split(loading, 7)), func(loading),
+            places=9)
+
+        # Инкрементальный расчет
+        self.assertAlmostEqual(
+            metric.reset(loading.copy()), func(loading), places=9)
+        for _ in range(50):
+            epochs, delta = make_delta(rnd, shape, integer)
+            changed = loading.copy()
+            changed[epochs] += delta
+            expected = func(changed)
+            self.assertAlmostEqual(
+                metric.peek(loading, epochs, delta), expected, places=9)
+            if rnd.random() < .5:
+                continue
+            self.assertAlmostEqual(
+                metric.update(loading, epochs, delta), expected, places=9)
+            self.assertAlmostEqual(metric.value, expected, places=9)
+            loading = changed
+
+    def test_integer(self):
+        """Целочисленная загрузка"""
+        for metric, func in make_metrics():
+            with self.subTest(metric=metric):
+                self.check_metric(metric, func, (T_MAX,), True)
+
+    def test_float(self):
+        """Вещественная загрузка"""
+        for metric, func in make_metrics():
+            with self.subTest(metric=metric):
+                self.check_metric(metric, func, (T_MAX,), False)
+
+    def test_resources(self):
+        """Загрузка по ресурсам (матрица эпоха x ресурс)"""
+        for metric, func in make_resource_metrics():
+            for integer in (True, False):
+                with self.subTest(metric=metric, integer=integer):
+                    self.check_metric(
+                        metric, func, (T_MAX, len(CAPACITY)), integer)
+
+
+# =============================================================================
+
+
+if __name__ == '__main__':
+    unittest.main()
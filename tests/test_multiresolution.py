@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# =============================================================================
+
+
+import random
+import unittest
+import numpy as np
+from taskdisttools.task import Task, RootTask, TaskManager
+from taskdisttools.optimizer import GreedyOptimizer, MultiResolutionOptimizer
+from taskdisttools.constraint import DelayConstraint, StepConstraint
+
+
+# =============================================================================
+
+
+def make_task_manager(n, seed):
+    """
+    Формирование набора задач с ограничениями на корневые задачи
+    с зависимыми задачами
+    :param n: кол-во корневых задач
+    :param seed: инициализация генератора случайных чисел
+    :return: менеджер задач
+    """
+    rnd = random.Random(seed)
+    tm = TaskManager()
+    for i in range(n):
+        root = RootTask(f'r{i}', rnd.randint(1, 10),
+                        rnd.choice([30, 60, 120]),
+                        weight=rnd.randint(1, 3),
+                        t0_max=rnd.choice([None, 29]))
+        if rnd.random() < .6:
+            root.add_dependent_task(
+                Task(f'd{i}', rnd.randint(1, 10)), rnd.randint(0, 5))
+        tm.add_root_task(root)
+    for i in rnd.sample(range(1, n), n // 3):
+        if rnd.random() < .5:
+            tm.add_constraint(f'r{i}', StepConstraint(rnd.choice([5, 15])))
+        else:
+            tm.add_constraint(
+                f'r{i}', DelayConstraint(f'r{rnd.randrange(i)}', 20))
+    return tm
+
+
+# =============================================================================
+
+
+class MultiResolutionOptimizerTest(unittest.TestCase):
+    """Многоуровневая оптимизация"""
+
+    def test_final_level(self):
+        """Результат совпадает с решением последнего уровня"""
+        for seed in range(20):
+            tm = make_task_manager(40, seed)
+            optimizer = MultiResolutionOptimizer(
+                GreedyOptimizer(np.std, n_iterations=1, random_state=seed),
+                factors=(10,))
+            results = optimizer.optimize(tm, 480)
+            self.assertEqual(results.score, optimizer.levels_[-1]['score'])
+            start_times = dict(results.start_times)
+            tm._apply_constraints(start_times)
+            self.assertEqual(start_times, results.start_times)
+
+
+# =============================================================================
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# =============================================================================
+
+
+import random
+import unittest
+import numpy as np
+from taskdisttools.task import Task, RootTask, NodeTaskManager
+from taskdisttools.optimizer import NodeOptimizer, NodeOptimizationResults
+from taskdisttools.constraint import DelayConstraint, StepConstraint
+from taskdisttools.constraint import AffinityConstraint
+from taskdisttools.constraint import AntiAffinityConstraint
+from taskdisttools.constraint import ColocationConstraint
+from taskdisttools.utils import make_loading
+
+
+# =============================================================================
+
+
+T_MAX = 120
+NODES = ['n0', 'n1', 'n2']
+
+
+def make_task_manager(n, seed, nodes):
+    """
+    Формирование набора задач с ограничениями на t0 и узлы
+    :param n: кол-во корневых задач
+    :param seed: инициализация генератора случайных чисел
+    :param nodes: узлы (см. NodeTaskManager)
+    :return: менеджер задач
+    """
+    rnd = random.Random(seed)
+    tm = NodeTaskManager(nodes)
+    for i in range(n):
+        root = RootTask(f'r{i}', rnd.randint(1, 5),
+                        rnd.choice([10, 15, 30, 60]),
+                        weight=rnd.randint(1, 4))
+        if rnd.random() < .5:
+            root.add_dependent_task(
+                Task(f'd{i}', 2, weight=rnd.randint(1, 2)), 1)
+        tm.add_root_task(root)
+    tm.add_constraint('r1', DelayConstraint('r2', 3))
+    for i in range(3, 8):
+        tm.add_constraint(f'r{i}', StepConstraint(rnd.choice([4, 5, 7])))
+    if len(tm.nodes) > 1:
+        names = tm.nodes
+        for i in range(8, 12):
+            tm.add_node_constraint(
+                f'r{i}', AffinityConstraint(rnd.sample(names, 2)))
+        tm.add_node_constraint('r12', AntiAffinityConstraint('r13'))
+        tm.add_node_constraint('r14', ColocationConstraint('r15'))
+        tm.add_node_constraint('r16', AntiAffinityConstraint('r12'))
+    return tm
+
+
+# =============================================================================
+
+
+class NodeOptimizerTest(unittest.TestCase):
+    """Оптимизация t0 и узлов выполнения корневых задач"""
+
+    def test_constraints(self):
+        """Ограничения на узлы и t0 выполняются"""
+        for seed in range(3):
+            tm = make_task_manager(30, seed, NODES)
+            results = NodeOptimizer(
+                n_iterations=3, random_state=seed).optimize(tm, T_MAX)
+            self.assertIsInstance(results, NodeOptimizationResults)
+            self.assertEqual(results.node_names, NODES)
+
+            # Цепочка выполняется на узле корневой задачи
+            self.assertEqual(results.nodes, tm.make_node_input(dict(
+                (name, results.nodes[name]) for name in tm.root_tasks)))
+            self.assertTrue(tm.test_nodes(results.nodes))
+            for i in range(8, 12):
+                self.assertIn(results.nodes[f'r{i}'],
+                              tm.node_constraints[f'r{i}'][0].nodes)
+            self.assertNotEqual(results.nodes['r12'], results.nodes['r13'])
+            self.assertEqual(results.nodes['r14'], results.nodes['r15'])
+            self.assertNotEqual(results.nodes['r16'], results.nodes['r12'])
+
+            start_times = dict(results.start_times)
+            tm._apply_constraints(start_times)
+            self.assertEqual(start_times, results.start_times)
+
+            # Загрузка узлов - загрузка их задач
+            total = np.zeros(T_MAX, dtype=np.int64)
+            for node in NODES:
+                node_results = results.get_node_results(node, np.max)
+                self.assertTrue((node_results.loading ==
+                                 results.get_node_loading(node)).all())
+                total += node_results.loading
+            self.assertTrue((total == make_loading(
+                *tm.make_model_input(dict(
+                    (name, results.start_times[name])
+                    for name in tm.root_tasks), apply_constraints=False),
+                T_MAX)).all())
+
+    def test_capacity(self):
+        """Емкость узлов не превышается"""
+        tm = make_task_manager(30, 0, dict.fromkeys(NODES, 12))
+        results = NodeOptimizer(
+            n_iterations=3, random_state=0).optimize(tm, T_MAX)
+        self.assertLessEqual(results.loading.max(), 12)
+        tm = make_task_manager(30, 0, dict.fromkeys(NODES, 1))
+        with self.assertRaises(RuntimeError):
+            NodeOptimizer(n_iterations=3, random_state=0).optimize(tm, T_MAX)
+
+    def test_single_node(self):
+        """Для одного узла результаты совпадают с расчетом без узлов"""
+        for seed in range(3):
+            tm = make_task_manager(30, seed, ['n0'])
+            results = NodeOptimizer(
+                n_iterations=3, random_state=seed).optimize(tm, T_MAX)
+            self.assertEqual(set(results.nodes.values()), {'n0'})
+            self.assertEqual(results.loading.shape, (T_MAX, 1))
+
+            single = results.get_node_results('n0', np.max)
+            start_times, tasks_data = tm.make_model_input(dict(
+                (name, results.start_times[name])
+                for name in tm.root_tasks))
+            self.assertEqual(single.start_times, start_times)
+            self.assertTrue((single.loading == make_loading(
+                start_times, tasks_data, T_MAX)).all())
+            self.assertTrue(
+                (results.get_node_loading('n0') == single.loading).all())
+
+            # Оптимизация не ухудшает пиковую загрузку
+            initial = make_loading(*tm.make_model_input(dict(
+                (name, task.t0_min)
+                for name, task in tm.root_tasks.items())), T_MAX)
+            self.assertLessEqual(single.score, initial.max())
+
+
+# =============================================================================
+
+
+if __name__ == '__main__':
+    unittest.main()
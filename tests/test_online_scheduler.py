@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# =============================================================================
+
+
+import random
+import unittest
+import numpy as np
+from taskdisttools.task import Task, RootTask, TaskManager
+from taskdisttools.optimizer import OnlineScheduler
+from taskdisttools.metric import PeakMetric, StdMetric
+from taskdisttools.constraint import DelayConstraint, StepConstraint
+from taskdisttools.utils import make_loading
+
+
+# =============================================================================
+
+
+T_MAX = 300
+
+
+def make_root_task(rnd, name, *, resources=False):
+    """
+    Формирование случайной корневой задачи с зависимыми задачами
+    :param rnd: генератор случайных чисел
+    :param name: идентификатор корневой задачи
+    :param resources: флаг "весов" по ресурсам (словари)
+    :return: корневая задача
+    """
+    def weight():
+        if resources:
+            return dict((resource, rnd.randint(0, 3))
+                        for resource in rnd.sample(['cpu', 'io'], 2))
+        return rnd.randint(1, 4)
+
+    root = RootTask(name, rnd.randint(1, 5), rnd.choice([10, 15, 30, 60]),
+                    weight=weight())
+    if rnd.random() < .5:
+        root.add_dependent_task(Task(f'{name}.d', 2, weight=weight()), 1)
+    return root
+
+
+def make_task_manager(n, seed, **kwargs):
+    """
+    Формирование набора задач с ограничениями
+    :param n: кол-во корневых задач
+    :param seed: инициализация генератора случайных чисел
+    :param kwargs: параметры make_root_task
+    :return: менеджер задач
+    """
+    rnd = random.Random(seed)
+    tm = TaskManager()
+    for i in range(n):
+        tm.add_root_task(make_root_task(rnd, f'r{i}', **kwargs))
+    tm.add_constraint('r1', DelayConstraint('r2', 3))
+    tm.add_constraint('r3', StepConstraint(5))
+    return tm
+
+
+def make_constraints(rnd, name, names):
+    """
+    Формирование случайных ограничений новой корневой задачи
+    :param rnd: генератор случайных чисел
+    :param name: идентификатор корневой задачи
+    :param names: идентификаторы размещенных корневых задач
+    :return: словарь списков ограничений
+    """
+    value = rnd.random()
+    if value < .3:
+        return {name: [StepConstraint(rnd.choice([2, 3, 5]))]}
+    if value < .6:
+        return {name: [DelayConstraint(rnd.choice(names), 10)]}
+    return None
+
+
+# =============================================================================
+
+
+class OnlineSchedulerTest(unittest.TestCase):
+    """Размещение задач во время работы системы"""
+
+    def check_state(self, scheduler, tm):
+        """
+        Сравнение текущего состояния с полным расчетом
+        :param scheduler: объект размещения задач
+        :param tm: менеджер задач
+        """
+        start_times, tasks_data = tm.make_model_input(
+            scheduler.root_start_times)
+        self.assertEqual(set(scheduler.start_times), set(start_times))
+        self.assertTrue((scheduler.loading == make_loading(
+            scheduler.start_times, tasks_data, T_MAX)).all())
+        start_times = dict(scheduler.start_times)
+        tm._apply_constraints(start_times)
+        self.assertEqual(start_times, scheduler.start_times)
+        self.assertEqual(scheduler.score, scheduler.get_results().score)
+
+    def check_operations(self, metric, seed, **kwargs):
+        """
+        Проверка состояния после размещения, повторного размещения
+        и удаления задач
+        :param metric: метрика
+        :param seed: инициализация генератора случайных чисел
+        :param kwargs: параметры make_root_task
+        """
+        rnd = random.Random(seed)
+        tm = make_task_manager(20, seed, **kwargs)
+        scheduler = OnlineScheduler(tm, metric, T_MAX)
+        self.check_state(scheduler, tm)
+        for i in range(30):
+            names = list(tm.root_tasks.keys())
+            value = rnd.random()
+            if value < .5:
+                name = f'n{i}'
+                t0 = scheduler.place(
+                    make_root_task(rnd, name, **kwargs),
+                    make_constraints(rnd, name, names))
+                self.assertEqual(scheduler.root_start_times[name], t0)
+                self.assertIn(t0, tm.get_start_times(name, T_MAX))
+            elif value < .8:
+                name = rnd.choice(names)
+                score = scheduler.score
+                scheduler.replace(name)
+                # Прежнее t0 - один из вариантов размещения
+                self.assertLessEqual(scheduler.score, score + 1e-9)
+            else:
+                name = rnd.choice([name for name in names
+                                   if name.startswith('n')] or [None])
+                if name is None:
+                    continue
+                loading = scheduler.loading.copy()
+                try:
+                    scheduler.remove(name)
+                except RuntimeError:
+                    # Задача - цель ограничений других задач
+                    self.assertIn(name, tm.root_tasks)
+                    self.assertTrue((scheduler.loading == loading).all())
+                else:
+                    self.assertNotIn(name, tm.root_tasks)
+            self.check_state(scheduler, tm)
+
+    def test_loading(self):
+        """Загрузка совпадает с полным расчетом после каждой операции"""
+        for seed in range(3):
+            self.check_operations(np.std, seed)
+            self.check_operations(StdMetric(), seed)
+            self.check_operations(PeakMetric(), seed)
+            self.check_operations(
+                lambda loading: float(np.percentile(loading, 90)), seed)
+
+    def test_resources(self):
+        """Загрузка по ресурсам совпадает с полным расчетом"""
+        for seed in range(3):
+            self.check_operations(
+                lambda loading: float(np.max(loading, axis=0).sum()), seed,
+                resources=True)
+
+    def test_rollback(self):
+        """Неудачное размещение не изменяет менеджер задач и загрузку"""
+        tm = make_task_manager(20, 0)
+        scheduler = OnlineScheduler(tm, np.std, T_MAX)
+        names = list(tm.root_tasks.keys())
+        plan = tm.constraint_plan.steps
+        loading = scheduler.loading.copy()
+
+        # Ограничения несовместимы ни для одного t0 из окна
+        root = RootTask('x', 1, 10, t0_min=3, t0_max=5)
+        root.add_dependent_task(Task('x.d', 1), 0)
+        with self.assertRaises(RuntimeError):
+            scheduler.place(root, {
+                'x': [StepConstraint(4), StepConstraint(3)],
+                'x.d': [DelayConstraint('r0', 100)],
+            })
+        # Ресурс, отсутствующий в загрузке
+        with self.assertRaises(RuntimeError):
+            scheduler.place(RootTask('y', 1, 10, weight={'cpu': 1}))
+        # Задача уже размещена
+        with self.assertRaises(RuntimeError):
+            scheduler.place(RootTask('r0', 1, 10))
+
+        self.assertEqual(list(tm.root_tasks.keys()), names)
+        self.assertNotIn('x', tm._constraints)
+        self.assertNotIn('x.d', tm._constraints)
+        self.assertEqual(len(tm.constraint_plan.steps), len(plan))
+        self.assertTrue((scheduler.loading == loading).all())
+        self.check_state(scheduler, tm)
+
+        # Задача с тем же идентификатором размещается после отката
+        scheduler.place(RootTask('x', 1, 10))
+        self.check_state(scheduler, tm)
+
+
+# =============================================================================
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# =============================================================================
+
+
+import random
+import unittest
+import numpy as np
+from taskdisttools.task import Task, RootTask, TaskManager
+from taskdisttools.optimizer import GreedyOptimizer, OptimizationResults
+from taskdisttools.metric import NormMetric, PeakMetric
+from taskdisttools.utils import compute_loading, compute_periodic_loading
+from taskdisttools.utils import get_hyperperiod
+
+
+# =============================================================================
+
+
+def make_arrays(n, seed, t_max, frequencies=(10, 15, 30, 60)):
+    """
+    Формирование случайных массивов параметров задач
+    :param n: кол-во задач
+    :param seed: инициализация генератора случайных чисел
+    :param t_max: максимальная эпоха моделирования
+    :param frequencies: возможные частоты запуска
+    :return: массивы t0, частот, продолжительностей и "весов"
+    """
+    rng = np.random.default_rng(seed)
+    frequency = rng.choice(frequencies, n)
+    t0 = rng.integers(0, np.minimum(frequency, t_max))
+    span = rng.integers(1, 12, n)
+    weight = rng.integers(1, 5, n)
+    return t0, frequency, span, weight
+
+
+def make_task_manager(n, seed, frequencies=(10, 15, 30, 60)):
+    """
+    Формирование набора задач
+    :param n: кол-во корневых задач
+    :param seed: инициализация генератора случайных чисел
+    :param frequencies: возможные частоты запуска
+    :return: менеджер задач
+    """
+    rnd = random.Random(seed)
+    tm = TaskManager()
+    for i in range(n):
+        root = RootTask(f'r{i}', rnd.randint(1, 5), rnd.choice(frequencies),
+                        weight=rnd.randint(1, 4))
+        if rnd.random() < .5:
+            root.add_dependent_task(Task(f'd{i}', 2, weight=1), 1)
+        tm.add_root_task(root)
+    return tm
+
+
+# =============================================================================
+
+
+class PeriodicLoadingTest(unittest.TestCase):
+    """Расчет загрузки по гиперпериоду расписания"""
+
+    def test_expand(self):
+        """Развернутая загрузка совпадает с полным расчетом"""
+        for seed in range(20):
+            for t_max in (50, 600, 1441):
+                arrays = make_arrays(40, seed, t_max)
+                periodic = compute_periodic_loading(*arrays, t_max)
+                expected = compute_loading(*arrays, t_max)
+                self.assertEqual(len(periodic), t_max)
+                self.assertTrue((periodic.expand() == expected).all())
+                if t_max > 600:
+                    self.assertGreater(periodic.period, 0)
+
+    def test_score(self):
+        """Значения метрик совпадают с расчетом по полной загрузке"""
+        arrays = make_arrays(40, 0, 1440)
+        periodic = compute_periodic_loading(*arrays, 1440)
+        loading = compute_loading(*arrays, 1440)
+        for metric in (np.std, np.var, np.max, PeakMetric(),
+                       NormMetric(2), lambda x: np.percentile(x, 90)):
+            self.assertAlmostEqual(
+                periodic.score(metric), metric(loading), places=9)
+
+    def test_no_hyperperiod(self):
+        """Гиперпериод больше интервала - загрузка не сжимается"""
+        arrays = make_arrays(20, 0, 500, frequencies=(97, 101, 103))
+        self.assertIsNone(get_hyperperiod(arrays[1], limit=500))
+        periodic = compute_periodic_loading(*arrays, 500)
+        self.assertEqual(periodic.period, 0)
+        self.assertTrue(
+            (periodic.head == compute_loading(*arrays, 500)).all())
+
+
+class PeriodicResultsTest(unittest.TestCase):
+    """Расчет метрики результатов по гиперпериоду"""
+
+    def test_results(self):
+        """Результаты совпадают с полным расчетом"""
+        tm = make_task_manager(50, 0)
+        model = tm.freeze()
+        start_times = model.make_start_times(model.t0_min + 3)
+        full = OptimizationResults.from_model(
+            model, start_times, np.std, 1440)
+        periodic = OptimizationResults.from_model(
+            model, start_times, np.std, 1440, periodic=True)
+        self.assertAlmostEqual(periodic.score, full.score, places=9)
+        self.assertTrue((periodic.loading == full.loading).all())
+
+        legacy = OptimizationResults(
+            full.start_times, full.tasks_data, np.std, 1440, periodic=True)
+        self.assertAlmostEqual(legacy.score, full.score, places=9)
+
+    def test_fallback(self):
+        """Без гиперпериода значение метрики - по полной загрузке"""
+        tm = make_task_manager(30, 0, frequencies=(97, 101, 103))
+        model = tm.freeze()
+        start_times = model.make_start_times(model.t0_min)
+        full = OptimizationResults.from_model(
+            model, start_times, np.std, 500)
+        periodic = OptimizationResults.from_model(
+            model, start_times, np.std, 500, periodic=True)
+        self.assertEqual(periodic.score, full.score)
+        self.assertTrue((periodic.loading == full.loading).all())
+
+    def test_optimizer(self):
+        """Оптимизатор формирует результаты с расчетом по гиперпериоду"""
+        tm = make_task_manager(30, 1)
+        results = GreedyOptimizer(
+            np.std, n_iterations=1, random_state=0, periodic=True
+        ).optimize(tm, 1440)
+        self.assertTrue(results.periodic)
+        self.assertAlmostEqual(
+            results.score, float(np.std(results.loading)), places=9)
+
+
+# =============================================================================
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# =============================================================================
+
+
+import random
+import unittest
+import numpy as np
+from taskdisttools.task import Task, RootTask, TaskManager
+from taskdisttools.metric import ResourceMetric, StdMetric
+from taskdisttools.utils import make_loading, compute_loading
+
+
+# =============================================================================
+
+
+T_MAX = 300
+RESOURCES = ['cpu', 'io', 'mem']
+
+
+def make_task_manager(n, seed, resource=None):
+    """
+    Формирование набора задач с "весами" по ресурсам
+    :param n: кол-во корневых задач
+    :param seed: инициализация генератора случайных чисел
+    :param resource: название ресурса, "вес" по которому становится
+        скалярным "весом" задачи (None - "веса" задаются словарями)
+    :return: менеджер задач
+    """
+    rnd = random.Random(seed)
+
+    def weight():
+        values = dict((name, rnd.randint(0, 3))
+                      for name in rnd.sample(RESOURCES, 2))
+        return values if resource is None else values.get(resource, 0)
+
+    tm = TaskManager()
+    for i in range(n):
+        root = RootTask(f'r{i}', rnd.randint(1, 5),
+                        rnd.choice([10, 15, 30, 60]), weight=weight())
+        if rnd.random() < .5:
+            root.add_dependent_task(Task(f'd{i}', 2, weight=weight()), 1)
+        tm.add_root_task(root)
+    return tm
+
+
+def make_root_start_times(tm, seed):
+    """
+    Формирование случайных t0 корневых задач
+    :param tm: менеджер задач
+    :param seed: инициализация генератора случайных чисел
+    :return: словарь t0 корневых задач
+    """
+    rnd = random.Random(seed)
+    return dict((name, rnd.randrange(60)) for name in tm.root_tasks.keys())
+
+
+# =============================================================================
+
+
+class ResourcesTest(unittest.TestCase):
+    """Загрузка системы по нескольким ресурсам"""
+
+    def test_resources(self):
+        """Список ресурсов обновляется при изменении набора задач"""
+        tm = make_task_manager(10, 0)
+        self.assertEqual(tm.resources, RESOURCES)
+        tm.resources.append('gpu')
+        self.assertEqual(tm.resources, RESOURCES)
+
+        tm.add_root_task(RootTask('gpu', 1, 10, weight={'gpu': 1}))
+        self.assertEqual(tm.resources, ['cpu', 'gpu', 'io', 'mem'])
+        tm.remove_root_task('gpu')
+        self.assertEqual(tm.resources, RESOURCES)
+
+        # Зависимая задача добавлена после корневой
+        tm.root_tasks['r0'].add_dependent_task(
+            Task('net', 1, weight={'net': 2}), 0)
+        model = tm.freeze()
+        self.assertEqual(model.resources, RESOURCES + ['net'])
+        self.assertEqual(tm.resources, RESOURCES + ['net'])
+
+    def test_mixed_weights(self):
+        """Скалярные "веса" вместе с "весами" по ресурсам не допускаются"""
+        tm = make_task_manager(10, 1)
+        tm.add_root_task(RootTask('scalar', 1, 10, weight=1))
+        with self.assertRaises(RuntimeError):
+            tm.freeze()
+        with self.assertRaises(RuntimeError):
+            tm.make_model_input(make_root_start_times(tm, 1))
+
+    def test_loading(self):
+        """Загрузка ресурса совпадает с загрузкой по скалярным "весам" задач"""
+        for seed in range(5):
+            tm = make_task_manager(30, seed)
+            root_start_times = make_root_start_times(tm, seed)
+            loading = make_loading(
+                *tm.make_model_input(root_start_times), T_MAX)
+            model = tm.freeze()
+            self.assertEqual(loading.shape, (T_MAX, len(RESOURCES)))
+            self.assertTrue((compute_loading(
+                model.make_start_times(np.array(
+                    [root_start_times[name] for name in model.root_names])),
+                model.frequency, model.span, model.weight, T_MAX
+            ) == loading).all())
+
+            for k, resource in enumerate(RESOURCES):
+                scalar = make_task_manager(30, seed, resource)
+                self.assertEqual(scalar.resources, [])
+                expected = make_loading(
+                    *scalar.make_model_input(root_start_times), T_MAX)
+                self.assertTrue((loading[:, k] == expected).all())
+
+    def test_metric(self):
+        """Значения ResourceMetric совпадают с расчетом по ресурсам"""
+        rnd = np.random.default_rng(0)
+        capacity = np.array([4., 8., 16.])
+        loading = rnd.integers(0, 10, (T_MAX, 3))
+        for metric, expected in (
+                (ResourceMetric(capacity=capacity),
+                 np.max(loading / capacity, axis=0).max()),
+                (ResourceMetric(StdMetric(), reduce=np.sum),
+                 np.std(loading, axis=0).sum()),
+                (ResourceMetric(np.mean, capacity, np.mean),
+                 np.mean(loading / capacity, axis=0).mean())):
+            self.assertAlmostEqual(metric(loading), expected, places=9)
+            rows = np.stack([loading, loading[::-1]])
+            self.assertTrue(np.allclose(
+                metric(rows, axis=1),
+                [metric(loading), metric(loading[::-1])]))
+
+            # Инкрементальный расчет совпадает с полным
+            current = loading.astype(float)
+            metric.reset(current.copy())
+            for _ in range(20):
+                epochs = rnd.choice(T_MAX, 10, replace=False)
+                delta = rnd.integers(-2, 3, (10, 3)).astype(float)
+                changed = current.copy()
+                changed[epochs] += delta
+                self.assertAlmostEqual(
+                    metric.peek(current, epochs, delta), metric(changed),
+                    places=9)
+                self.assertAlmostEqual(
+                    metric.update(current, epochs, delta), metric(changed),
+                    places=9)
+                current = changed
+
+
+# =============================================================================
+
+
+if __name__ == '__main__':
+    unittest.main()
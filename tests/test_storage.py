@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# =============================================================================
+
+
+import random
+import tempfile
+import unittest
+import numpy as np
+from taskdisttools.task import Task, RootTask, TaskManager
+from taskdisttools.optimizer import GreedyOptimizer, OptimizationResults
+from taskdisttools.optimizer import save_results, load_results
+from taskdisttools.constraint import DelayConstraint, StepConstraint
+
+
+# =============================================================================
+
+
+T_MAX = 600
+
+
+def make_task_manager(n, seed, *, resources=False):
+    """
+    Формирование набора задач с ограничениями
+    :param n: кол-во корневых задач
+    :param seed: инициализация генератора случайных чисел
+    :param resources: флаг "весов" по ресурсам (словари)
+    :return: менеджер задач
+    """
+    rnd = random.Random(seed)
+
+    def weight():
+        if resources:
+            return dict((name, rnd.randint(0, 3))
+                        for name in rnd.sample(['cpu', 'io', 'mem'], 2))
+        return rnd.randint(1, 4)
+
+    tm = TaskManager()
+    for i in range(n):
+        root = RootTask(f'r{i}', rnd.randint(1, 5),
+                        rnd.choice([10, 15, 30, 60]), weight=weight())
+        if rnd.random() < .5:
+            root.add_dependent_task(Task(f'd{i}', 2, weight=weight()), 1)
+        tm.add_root_task(root)
+    tm.add_constraint('r1', DelayConstraint('r2', 3))
+    for i in range(3, 8):
+        tm.add_constraint(f'r{i}', StepConstraint(rnd.choice([4, 5, 7])))
+    return tm
+
+
+def make_legacy_results(tm, seed, metric):
+    """
+    Формирование результатов по словарям t0 и данных задач
+    :param tm: менеджер задач
+    :param seed: инициализация генератора случайных чисел
+    :param metric: метрика
+    :return: результаты оптимизации
+    """
+    rnd = random.Random(seed)
+    start_times, tasks_data = tm.make_model_input(dict(
+        (name, rnd.randrange(60)) for name in tm.root_tasks.keys()))
+    return OptimizationResults(start_times, tasks_data, metric, T_MAX)
+
+
+# =============================================================================
+
+
+class StorageTest(unittest.TestCase):
+    """Сохранение и загрузка результатов оптимизации"""
+
+    def check_round_trip(self, results, metric, **kwargs):
+        """
+        Сравнение загруженных результатов с исходными
+        :param results: результаты оптимизации
+        :param metric: метрика
+        :param kwargs: параметры load_results
+        """
+        with tempfile.TemporaryDirectory() as path:
+            save_results(path, results)
+            loaded = load_results(path, metric, **kwargs)
+            self.assertEqual(loaded.is_model_backed, results.is_model_backed)
+            self.assertEqual(loaded.score, results.score)
+            self.assertEqual(loaded.t_max, results.t_max)
+            self.assertTrue((loaded.loading == results.loading).all())
+            start_times, tasks_data = loaded.get_input()
+            expected, expected_data = results.get_input()
+            self.assertEqual(start_times, expected)
+            self.assertEqual(
+                dict((name, (item.frequency, item.span,
+                             np.asarray(item.weight).tolist()))
+                     for name, item in tasks_data.items()),
+                dict((name, (item.frequency, item.span,
+                             np.asarray(item.weight).tolist()))
+                     for name, item in expected_data.items()))
+            self.assertEqual(loaded.evaluate().score, results.score)
+            del loaded
+
+    def test_model_backed(self):
+        """Результаты по компактной модели (в т.ч. отображение в память)"""
+        tm = make_task_manager(30, 0)
+        results = GreedyOptimizer(
+            np.std, n_iterations=1, random_state=0).optimize(tm, T_MAX)
+        self.assertTrue(results.is_model_backed)
+        self.check_round_trip(results, np.std)
+        self.check_round_trip(results, np.std, mmap_mode=None)
+
+        with tempfile.TemporaryDirectory() as path:
+            save_results(path, results)
+            loaded = load_results(path, np.std)
+            self.assertIsInstance(loaded.loading, np.memmap)
+            self.assertFalse(loaded.loading.flags.writeable)
+            self.assertIsInstance(loaded.start_times_array, np.memmap)
+            del loaded
+
+    def test_resources(self):
+        """Результаты с "весами" задач по ресурсам"""
+        tm = make_task_manager(30, 1, resources=True)
+
+        def metric(loading):
+            return float(np.max(loading, axis=0).sum())
+
+        results = GreedyOptimizer(
+            metric, n_iterations=1, random_state=1).optimize(tm, T_MAX)
+        self.assertEqual(results.loading.shape, (T_MAX, 3))
+        self.check_round_trip(results, metric)
+        self.check_round_trip(make_legacy_results(tm, 1, metric), metric)
+
+    def test_legacy(self):
+        """Результаты, сформированные по словарям (OptimizationResults)"""
+        tm = make_task_manager(30, 2)
+        results = make_legacy_results(tm, 2, np.std)
+        self.assertFalse(results.is_model_backed)
+        self.check_round_trip(results, np.std)
+        self.check_round_trip(results, np.std, mmap_mode=None)
+
+        # Результаты по модели после изменения данных задач
+        results = GreedyOptimizer(
+            np.std, n_iterations=1, random_state=2).optimize(tm, T_MAX)
+        results.tasks_data = dict(results.tasks_data)
+        self.assertFalse(results.is_model_backed)
+        self.check_round_trip(results, np.std)
+
+
+# =============================================================================
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# =============================================================================
+
+
+import unittest
+import numpy as np
+from taskdisttools.metric import ResourceMetric, StdMetric
+from taskdisttools.utils import compute_loading, compute_loading_chunks
+from taskdisttools.utils import score_loading_chunks
+
+
+# =============================================================================
+
+
+def make_arrays(n, seed, t_max, *, n_resources=None, float_weights=False):
+    """
+    Формирование случайных массивов параметров задач
+    :param n: кол-во задач
+    :param seed: инициализация генератора случайных чисел
+    :param t_max: максимальная эпоха моделирования
+    :param n_resources: кол-во ресурсов (None - скалярные "веса")
+    :param float_weights: флаг дробных "весов" задач
+    :return: массивы t0, частот, продолжительностей и "весов"
+    """
+    rng = np.random.default_rng(seed)
+    frequency = rng.choice([7, 10, 15, 60, 1000], n)
+    t0 = rng.integers(-5, np.minimum(frequency, t_max))
+    span = rng.integers(1, 20, n)
+    shape = n if n_resources is None else (n, n_resources)
+    weight = rng.random(shape) * 3 if float_weights \
+        else rng.integers(0, 5, shape)
+    return t0, frequency, span, weight
+
+
+# =============================================================================
+
+
+class LoadingChunksTest(unittest.TestCase):
+    """Потоковый расчет загрузки"""
+
+    def check_chunks(self, **kwargs):
+        """
+        Сравнение фрагментов загрузки с полным расчетом
+        :param kwargs: параметры формирования массивов задач
+        """
+        for seed in range(10):
+            for t_max, chunk_size in ((100, 7), (1000, 64), (1000, 5000)):
+                arrays = make_arrays(30, seed, t_max, **kwargs)
+                expected = compute_loading(*arrays, t_max)
+                chunks = list(compute_loading_chunks(
+                    *arrays, t_max, chunk_size))
+                self.assertTrue(all(
+                    len(chunk) <= chunk_size for chunk in chunks))
+                actual = np.concatenate(chunks)
+                self.assertEqual(actual.shape, expected.shape)
+                if kwargs.get('float_weights'):
+                    self.assertTrue(np.allclose(actual, expected))
+                else:
+                    self.assertTrue((actual == expected).all())
+
+    def test_integer_weights(self):
+        """Целочисленные "веса" - точное совпадение"""
+        self.check_chunks()
+
+    def test_float_weights(self):
+        """Дробные "веса" - совпадение с точностью до округления"""
+        self.check_chunks(float_weights=True)
+
+    def test_resources(self):
+        """Матрица "весов" задача x ресурс"""
+        self.check_chunks(n_resources=3)
+        self.check_chunks(n_resources=2, float_weights=True)
+
+    def test_score(self):
+        """Значения метрик по фрагментам совпадают с полным расчетом"""
+        arrays = make_arrays(30, 0, 1000)
+        loading = compute_loading(*arrays, 1000)
+        for metric in (np.std, np.max, StdMetric(),
+                       lambda x: np.percentile(x, 90)):
+            self.assertAlmostEqual(
+                score_loading_chunks(
+                    compute_loading_chunks(*arrays, 1000, 64), metric),
+                metric(loading), places=9)
+
+        arrays = make_arrays(30, 0, 1000, n_resources=3)
+        loading = compute_loading(*arrays, 1000)
+        metric = ResourceMetric(capacity=[10, 20, 30])
+        self.assertAlmostEqual(
+            score_loading_chunks(
+                compute_loading_chunks(*arrays, 1000, 64), metric),
+            metric(loading), places=9)
+
+
+# =============================================================================
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# =============================================================================
+
+
+import random
+import unittest
+import numpy as np
+from taskdisttools.task import Task, RootTask, TaskManager
+from taskdisttools.optimizer import GreedyOptimizer
+from taskdisttools.constraint import DelayConstraint, StepConstraint
+
+
+# =============================================================================
+
+
+def make_task_manager(n, seed):
+    """
+    Формирование набора задач с ограничениями на корневые задачи
+    с зависимыми задачами
+    :param n: кол-во корневых задач
+    :param seed: инициализация генератора случайных чисел
+    :return: менеджер задач
+    """
+    rnd = random.Random(seed)
+    tm = TaskManager()
+    for i in range(n):
+        root = RootTask(f'r{i}', rnd.randint(1, 10),
+                        rnd.choice([30, 60, 120]),
+                        weight=rnd.randint(1, 3),
+                        t0_max=rnd.choice([None, 29]))
+        if rnd.random() < .6:
+            dependent = Task(f'd{i}', rnd.randint(1, 10))
+            root.add_dependent_task(dependent, rnd.randint(0, 5))
+            if rnd.random() < .5:
+                dependent.add_dependent_task(Task(f'e{i}', 2), 1)
+        tm.add_root_task(root)
+    for i in rnd.sample(range(1, n), n // 3):
+        if rnd.random() < .5:
+            tm.add_constraint(f'r{i}', StepConstraint(rnd.choice([5, 15])))
+        else:
+            tm.add_constraint(
+                f'r{i}', DelayConstraint(f'r{rnd.randrange(i)}', 20))
+    return tm
+
+
+# =============================================================================
+
+
+class WarmStartTest(unittest.TestCase):
+    """Оптимизация от предыдущего расписания"""
+
+    def test_round_trip(self):
+        """Без изменений набора задач расписание воспроизводится"""
+        for seed in range(20):
+            tm = make_task_manager(40, seed)
+            previous = GreedyOptimizer(
+                np.std, n_iterations=1, random_state=seed).optimize(tm, 240)
+            results = GreedyOptimizer(
+                np.std, n_iterations=1, random_state=seed).optimize(
+                tm, 240, previous, revisit='changed')
+            self.assertEqual(results.start_times, previous.start_times)
+            self.assertEqual(results.score, previous.score)
+
+    def test_chain_baseline(self):
+        """Базовое расписание сохраняет цепочки всех корневых задач"""
+        for seed in range(20):
+            tm = make_task_manager(40, seed)
+            previous = GreedyOptimizer(
+                np.std, n_iterations=1, random_state=seed).optimize(tm, 240)
+            model = tm.freeze()
+            root_start_times = GreedyOptimizer._make_initial(
+                model, 240, previous)
+            self.assertTrue((model.make_start_times(root_start_times) ==
+                             previous.start_times_array).all())
+
+
+# =============================================================================
+
+
+if __name__ == '__main__':
+    unittest.main()